@@ -0,0 +1,113 @@
+"""
+============================================
+🗺️ الخريطة: 01_core/admission.py
+📌 الربط:
+    - يستخدمه main.py قبل تنفيذ مهام vision و cognitive و export
+    - يرفض الطلبات الزائدة بسرعة (429 / إطار خطأ WebSocket)
+============================================
+"""
+
+# المتطلبات: asyncio
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+
+from config import ADMISSION_LIMITS, ADMISSION_QUEUE_SIZES, ADMISSION_QUEUE_TIMEOUT
+
+
+class AdmissionRejected(Exception):
+    """تجاوز حد التزامن أو امتلاء طابور الانتظار"""
+
+    def __init__(self, task_type: str, reason: str, retry_after: int):
+        super().__init__(f"{task_type}: {reason}")
+        self.task_type = task_type
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """التحكم بالقبول - حد تزامن لكل نوع مهمة مع طابور انتظار محدود ومهلة"""
+
+    def __init__(self, limits: Dict[str, int] = ADMISSION_LIMITS,
+                 queue_sizes: Dict[str, int] = ADMISSION_QUEUE_SIZES,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.limits = limits
+        self.queue_sizes = queue_sizes
+        self.queue_timeout = queue_timeout
+
+        self.semaphores = {task_type: asyncio.Semaphore(limit) for task_type, limit in limits.items()}
+        self.waiting = {task_type: 0 for task_type in limits}
+        self.running = {task_type: 0 for task_type in limits}
+
+        # متوسط متحرك لزمن التنفيذ (لتقدير retry_after)
+        self.service_time = {task_type: 1.0 for task_type in limits}
+        self.counters = {
+            task_type: {"admitted": 0, "queue_full": 0, "timed_out": 0}
+            for task_type in limits
+        }
+        self.wait_samples = {task_type: deque(maxlen=1000) for task_type in limits}
+
+    @asynccontextmanager
+    async def admit(self, task_type: str):
+        """حجز خانة تنفيذ أو رفض الطلب فوراً"""
+        semaphore = self.semaphores.get(task_type)
+        if semaphore is None:
+            yield
+            return
+
+        started = time.perf_counter()
+        if semaphore.locked():
+            if self.waiting[task_type] >= self.queue_sizes[task_type]:
+                self.counters[task_type]["queue_full"] += 1
+                raise AdmissionRejected(task_type, "طابور الانتظار ممتلئ", self.retry_after(task_type))
+
+            self.waiting[task_type] += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.counters[task_type]["timed_out"] += 1
+                raise AdmissionRejected(task_type, "انتهت مهلة الانتظار", self.retry_after(task_type))
+            finally:
+                self.waiting[task_type] -= 1
+        else:
+            await semaphore.acquire()
+
+        self.wait_samples[task_type].append(time.perf_counter() - started)
+        self.counters[task_type]["admitted"] += 1
+        self.running[task_type] += 1
+        service_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.running[task_type] -= 1
+            semaphore.release()
+            elapsed = time.perf_counter() - service_started
+            self.service_time[task_type] = 0.8 * self.service_time[task_type] + 0.2 * elapsed
+
+    def retry_after(self, task_type: str) -> int:
+        """تقدير زمن تفريغ الطابور بالثواني"""
+        backlog = self.waiting[task_type] + self.running[task_type]
+        return max(1, math.ceil(self.service_time[task_type] * backlog / self.limits[task_type]))
+
+    def stats(self) -> Dict[str, Any]:
+        """الحدود والطوابير وأزمنة الانتظار لكل نوع مهمة"""
+        report = {}
+        for task_type, limit in self.limits.items():
+            waits = sorted(self.wait_samples[task_type])
+            report[task_type] = {
+                "limit": limit,
+                "running": self.running[task_type],
+                "waiting": self.waiting[task_type],
+                "queue_size": self.queue_sizes[task_type],
+                **self.counters[task_type],
+                "queue_wait_ms": {
+                    "p50": round(waits[len(waits) // 2] * 1000, 2) if waits else 0.0,
+                    "p95": round(waits[int(len(waits) * 0.95)] * 1000, 2) if waits else 0.0,
+                    "max": round(waits[-1] * 1000, 2) if waits else 0.0
+                }
+            }
+        return report
@@ -8,7 +8,7 @@
 ============================================
 """
 
-# المتطلبات: langchain, chromadb, pinecone-client, openai, google-generativeai
+# المتطلبات: langchain, chromadb, pinecone-client, openai, httpx
 
 from langchain.llms import OpenAI
 from langchain.embeddings import OpenAIEmbeddings
@@ -17,52 +17,293 @@ from langchain.chains import RetrievalQA
 from langchain.document_loaders import TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import chromadb
-import google.generativeai as genai
 import asyncio
-from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, List, Optional, Callable, Tuple
 from datetime import datetime
 import json
 import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from config import (KNOWLEDGE_DIR, KNOWLEDGE_COLLECTION, KNOWLEDGE_SNAPSHOT_DIR,
+                    CPU_WORKERS, INGEST_EMBED_BATCH, INGEST_EMBED_CONCURRENCY, INGEST_UPSERT_BATCH,
+                    SEMANTIC_CACHE_ENABLED, EMBEDDING_BACKEND, VECTOR_INDEX, NUMPY_INDEX_MAX_CHUNKS,
+                    RETRIEVAL_MODE, RETRIEVAL_CANDIDATES, EMBED_BATCH_ENABLED, GENERATION_CHECK_MS)
+from executors import executors
+from embedding_cache import CachedEmbeddings
+from llm_client import GeminiClient, LLMUnavailable
+from semantic_cache import SemanticCache
+from conversation_store import ConversationStore, create_backend
+from local_embeddings import HashingEmbeddings, NumpyVectorIndex
+from hybrid_retriever import BM25Index, reciprocal_rank_fusion
+from embedding_batcher import EmbeddingBatcher
+from fingerprint_store import FingerprintStore, GenerationCounter, document_hash, chunk_id
+
+def split_documents(documents: List[str], chunk_size: int = 1000, chunk_overlap: int = 200) -> List[List[str]]:
+    """تقسيم مجموعة مستندات إلى مقاطع - تعمل داخل مجمع العمليات"""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+    return [text_splitter.split_text(document) for document in documents]
 
 class CognitiveCore:
     """نواة التفوق المعرفي - تتجاوز GPT-4 و DeepSeek"""
     
+    # إصدار منطق المعالجة - يدخل في مفاتيح ذاكرة الاستجابات
+    version = "1.0.0"
+    # فترة إعادة محاولة قفل الاستيعاب (ثوان)
+    INGEST_LOCK_POLL = 0.1
+    
     def __init__(self):
         self.status = "🟢 نشط"
         print("🟢 Cognitive Supremacy - نظام تفوق معرفي جاهز")
         
         # تهيئة قاعدة المعرفة المتجهة
         self.vector_store = None
+        self.collection = None
+        self.embeddings = None
+        self.embedding_backend = None
+        self.vector_index = None
+        self.lexical_index = None
+        self.fingerprints = None
+        self.generations = None
+        self.knowledge_generation = 0
+        # آخر جيل مشترك قُرئ من SQLite ووقت قراءته - لا قراءة على حلقة الأحداث لكل طلب
+        self.shared_generation = 0
+        self.generation_checked = 0.0
+        # إعادة فتح واحدة لكل عملية عند تغير الجيل
+        self.refresh_lock = threading.Lock()
         self.init_knowledge_base()
         
         # تهيئة النماذج
         self.init_models()
         
-        # ذاكرة المحادثات
-        self.conversation_memory = {}
+        # مخزن المحادثات (محدود في الذاكرة ومشترك بين العمال)
+        self.conversations = ConversationStore(create_backend())
+        
+        # ذاكرة الإجابات الدلالية (أسئلة متقاربة الصياغة)
+        self.semantic_cache = SemanticCache()
+        
+        # تجميع تضمين أسئلة الطلبات المتزامنة في استدعاءات دفعية
+        self.embedding_batcher = (EmbeddingBatcher(self.embeddings)
+                                  if EMBED_BATCH_ENABLED and self.embeddings is not None else None)
         
     def init_knowledge_base(self):
-        """تهيئة قاعدة المعرفة"""
+        """تهيئة قاعدة المعرفة (دائمة على القرص ومشتركة بين العمال)"""
         try:
-            # استخدام Chroma للتخزين المحلي
-            self.chroma_client = chromadb.Client()
-            self.collection = self.chroma_client.create_collection(
-                name="super_ai_knowledge",
-                metadata={"hnsw:space": "cosine"}
-            )
-            self.vector_store = Chroma(
-                client=self.chroma_client,
-                collection_name="super_ai_knowledge",
-                embedding_function=self.get_embeddings()
-            )
+            os.makedirs(KNOWLEDGE_DIR, exist_ok=True)
+            self.embeddings = self.get_embeddings()
+            if self.generations is None:
+                self.generations = GenerationCounter(os.path.join(KNOWLEDGE_DIR, "generation.sqlite"),
+                                                     legacy_path=os.path.join(KNOWLEDGE_DIR, "generation"))
+            if self.fingerprints is None:
+                # بصمات المستندات المصدر لإعادة الاستيعاب التدريجي
+                self.fingerprints = FingerprintStore(
+                    os.path.join(KNOWLEDGE_DIR, f"fingerprints_{self.collection_name}.sqlite"))
+            self.swap_knowledge_base(self.open_knowledge_base())
+            self.warm_knowledge_base()
         except Exception as e:
             print(f"⚠️ تحذير قاعدة المعرفة: {e}")
     
+    def open_knowledge_base(self) -> Dict[str, Any]:
+        """فتح المجموعة وبناء الفهارس دون المساس بالحالية (الاستعلامات الجارية تكمل عليها)"""
+        # الجيل يُقرأ قبل الفتح: كتابة أثناء الفتح تعني إعادة فتح لاحقة لا فهرساً قديماً برقم جديد
+        generation = self.read_generation()
+        # استخدام Chroma للتخزين المحلي الدائم - get_or_create يسمح بفتحها من كل عامل
+        chroma_client = chromadb.PersistentClient(path=KNOWLEDGE_DIR)
+        collection = chroma_client.get_or_create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+        return {
+            "chroma_client": chroma_client,
+            "collection": collection,
+            "vector_store": Chroma(
+                client=chroma_client,
+                collection_name=self.collection_name,
+                embedding_function=self.embeddings
+            ),
+            "vector_index": self.load_vector_index(collection),
+            "lexical_index": self.load_lexical_index(collection, generation),
+            "knowledge_generation": generation
+        }
+    
+    def swap_knowledge_base(self, opened: Dict[str, Any]):
+        """استبدال المجموعة والفهارس معاً بعد اكتمال بنائها"""
+        for name, value in opened.items():
+            setattr(self, name, value)
+    
+    @property
+    def collection_name(self) -> str:
+        """متجهات النماذج المختلفة لا تجتمع في مجموعة واحدة - التضمين المحلي له مجموعته"""
+        if self.embedding_backend == "openai":
+            return KNOWLEDGE_COLLECTION
+        return f"{KNOWLEDGE_COLLECTION}_{self.embeddings.model_name}"
+    
+    def load_vector_index(self, collection) -> Optional[NumpyVectorIndex]:
+        """الفهرس داخل العملية (NumPy) لقواعد المعرفة الصغيرة - بدون HNSW"""
+        if VECTOR_INDEX == "chroma":
+            return None
+        if VECTOR_INDEX == "auto" and collection.count() > NUMPY_INDEX_MAX_CHUNKS:
+            return None
+        vector_index = NumpyVectorIndex.from_collection(collection)
+        print(f"🟢 فهرس NumPy - {len(vector_index)} مقطع في الذاكرة")
+        return vector_index
+    
+    @property
+    def lexical_index_path(self) -> str:
+        return os.path.join(KNOWLEDGE_DIR, f"bm25_{self.collection_name}.pkl")
+    
+    def load_lexical_index(self, collection, generation: int) -> BM25Index:
+        """الفهرس المعكوس (BM25): المحفوظ من نفس الجيل، أو يُبنى من نصوص المجموعة"""
+        lexical_index = BM25Index.load(self.lexical_index_path, generation)
+        if lexical_index is None:
+            lexical_index = BM25Index.from_collection(collection)
+            lexical_index.save(self.lexical_index_path, generation)
+        return lexical_index
+    
+    def warm_knowledge_base(self):
+        """تحميل فهرس HNSW إلى الذاكرة عند البدء بدل أول استعلام"""
+        if self.collection.count() == 0 or self.vector_index is not None:
+            return
+        sample = self.collection.get(limit=1, include=["embeddings"])
+        if sample["embeddings"]:
+            self.collection.query(query_embeddings=sample["embeddings"], n_results=1)
+        print(f"🟢 قاعدة المعرفة - {self.collection.count()} مقطع محمّل")
+    
+    def update_vector_index(self, ids: List[str], embeddings: List[List[float]], documents: List[str]):
+        """إضافة المقاطع الجديدة للفهرس داخل العملية، أو التحول إلى Chroma عند تجاوز الحد"""
+        if self.vector_index is None:
+            return
+        if VECTOR_INDEX == "auto" and len(self.vector_index) + len(ids) > NUMPY_INDEX_MAX_CHUNKS:
+            self.vector_index = None
+            print("🟡 قاعدة المعرفة تجاوزت حد فهرس NumPy - التحول إلى Chroma")
+            return
+        self.vector_index.add(ids, embeddings, documents)
+    
+    @property
+    def cache_version(self) -> str:
+        """إصدار مفاتيح ذاكرة الاستجابات: المنطق + الجيل المشترك (استيعاب من أي عامل يبطل الإجابات القديمة)
+        يُقرأ من آخر sync_generation - بلا SQLite على حلقة الأحداث"""
+        return f"{self.version}:{self.shared_generation}"
+    
+    def read_generation(self) -> int:
+        """رقم جيل قاعدة المعرفة - يزداد مع كل كتابة من أي عامل (قراءة SQLite حاجبة)"""
+        return self.generations.read() if self.generations is not None else 0
+    
+    async def sync_generation(self) -> int:
+        """الجيل المشترك: قراءة SQLite في مجمع الخيوط مرة كل GENERATION_CHECK_MS على الأكثر
+        (استيعاب عامل آخر يظهر هنا بعد هذه المهلة على الأكثر)"""
+        now = time.monotonic()
+        if self.generations is not None and now - self.generation_checked >= GENERATION_CHECK_MS / 1000:
+            self.generation_checked = now
+            self.shared_generation = await executors.run_io(self.read_generation)
+        return self.shared_generation
+    
+    def bump_generation(self) -> bool:
+        """إعلام باقي العمال بأن قاعدة المعرفة تغيرت (زيادة ذرية في SQLite)
+        True = الفهارس في الذاكرة تطابق الجيل الجديد ويُسجّل كجيلها"""
+        generation = self.generations.increment()
+        self.shared_generation = max(self.shared_generation, generation)
+        # الاستيعاب يعيد الفتح تحت قفل الكاتب قبل الإضافة، فالقفزة بأكثر من واحد = كاتب خارج القفل:
+        # لا نسجل جيلاً لا تحويه فهارسنا - إعادة الفتح التالية تبنيها من المجموعة
+        if generation != self.knowledge_generation + 1:
+            return False
+        self.knowledge_generation = generation
+        return True
+    
+    async def refresh_knowledge_base(self):
+        """إعادة فتح المجموعة إذا كتب عامل آخر فيها (الفهرس المحمّل في الذاكرة قديم)"""
+        if self.vector_store is None or await self.sync_generation() == self.knowledge_generation:
+            return
+        # فتح Chroma وبناء الفهارس حاجب - في مجمع خيوط الإدخال/الإخراج
+        await executors.run_io(self.reload_knowledge_base)
+    
+    def reload_knowledge_base(self, wait: bool = False):
+        # إعادة فتح واحدة في كل مرة - الطلبات الأخرى تكمل على الفهرس الحالي بدل الانتظار
+        # (wait=True للكاتب: لا يضيف إلى فهرس قديم)
+        if not self.refresh_lock.acquire(blocking=wait):
+            return
+        try:
+            if self.read_generation() == self.knowledge_generation:
+                return
+            self.forget_shared_system()
+            # نفس كائن التضمين (وذاكرته) - فقط المجموعة والفهارس تُعاد
+            self.swap_knowledge_base(self.open_knowledge_base())
+        except Exception as e:
+            print(f"⚠️ تحذير إعادة فتح قاعدة المعرفة: {e}")
+        finally:
+            self.refresh_lock.release()
+    
+    @staticmethod
+    def forget_shared_system():
+        """Chroma يحتفظ بنظام مشترك لكل مسار: نزيل مدخل مسارنا فقط دون إيقافه
+        (clear_system_cache يوقف كل الأنظمة تحت الاستعلامات الجارية)"""
+        shared = getattr(getattr(chromadb.api, "client", None), "SharedSystemClient", None)
+        # اسم القاموس يختلف بين إصدارات chromadb
+        for name in ("_identifier_to_system", "_identifer_to_system"):
+            systems = getattr(shared, name, None)
+            if isinstance(systems, dict):
+                systems.pop(KNOWLEDGE_DIR, None)
+    
+    async def snapshot_knowledge_base(self, label: Optional[str] = None) -> Dict:
+        """لقطة متسقة لقاعدة المعرفة (نسخ SQLite عبر backup + ملفات الفهرس)"""
+        try:
+            label = label or datetime.now().strftime("%Y%m%d_%H%M%S")
+            target = os.path.join(KNOWLEDGE_SNAPSHOT_DIR, label)
+            await executors.run_io(self._copy_knowledge_base, target)
+            return {
+                "status": "success",
+                "snapshot": target,
+                "chunks": self.collection.count()
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"فشل أخذ اللقطة: {e}"
+            }
+    
+    def _copy_knowledge_base(self, target: str):
+        shutil.copytree(KNOWLEDGE_DIR, target,
+                        ignore=shutil.ignore_patterns("chroma.sqlite3*"))
+        source = sqlite3.connect(os.path.join(KNOWLEDGE_DIR, "chroma.sqlite3"))
+        destination = sqlite3.connect(os.path.join(target, "chroma.sqlite3"))
+        with destination:
+            source.backup(destination)
+        source.close()
+        destination.close()
+    
+    async def compact_knowledge_base(self) -> Dict:
+        """ضغط ملف SQLite لقاعدة المعرفة واستعادة المساحة المحذوفة"""
+        try:
+            path = os.path.join(KNOWLEDGE_DIR, "chroma.sqlite3")
+            size_before = os.path.getsize(path)
+            await executors.run_io(self._vacuum, path)
+            return {
+                "status": "success",
+                "size_before": size_before,
+                "size_after": os.path.getsize(path)
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"فشل الضغط: {e}"
+            }
+    
+    def _vacuum(self, path: str):
+        connection = sqlite3.connect(path, timeout=30)
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.execute("VACUUM")
+        connection.close()
+    
     def init_models(self):
         """تهيئة نماذج الذكاء الاصطناعي"""
-        # Gemini API (مجاني)
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY', 'demo_key'))
-        self.gemini_model = genai.GenerativeModel('gemini-pro')
+        # Gemini API (مجاني) - عميل HTTP غير حاجب بمجمع اتصالات
+        self.llm = GeminiClient(api_key=os.getenv('GEMINI_API_KEY', 'demo_key'))
         
         # نماذج محلية كنسخة احتياطية
         self.local_models = {
@@ -71,61 +312,229 @@ class CognitiveCore:
         }
     
     def get_embeddings(self):
-        """الحصول على محول النصوص"""
-        return OpenAIEmbeddings(
+        """الحصول على محول النصوص: OpenAI (مع ذاكرة تضمين دائمة على القرص) أو تضمين محلي بدون شبكة"""
+        backend = EMBEDDING_BACKEND
+        if backend == "auto":
+            backend = "openai" if os.getenv('OPENAI_API_KEY') else "local"
+        self.embedding_backend = backend
+        if backend == "local":
+            # حساب محلي أرخص من قراءة الذاكرة - بدون تخزين مؤقت
+            return HashingEmbeddings()
+        
+        model_name = "text-embedding-ada-002"
+        embeddings = OpenAIEmbeddings(
             openai_api_key=os.getenv('OPENAI_API_KEY', 'demo_key'),
-            model="text-embedding-ada-002"
+            model=model_name
         )
+        return CachedEmbeddings(embeddings, model_name=model_name)
     
-    async def query(self, question: str, context: Optional[str] = None) -> Dict:
+    async def query(self, question: str, context: Optional[str] = None,
+                    conversation_id: Optional[str] = None) -> Dict:
         """استعلام معرفي فائق الدقة"""
         try:
-            # 1. البحث في قاعدة المعرفة
-            knowledge_results = []
-            if self.vector_store:
-                docs = self.vector_store.similarity_search(question, k=3)
-                knowledge_results = [doc.page_content for doc in docs]
+            # 1-2. الذاكرة الدلالية ثم البحث في قاعدة المعرفة
+            prepared = await self.prepare_query(question, context, conversation_id)
+            if "cached" in prepared:
+                return prepared["cached"]
             
-            # 2. استدعاء Gemini API
-            prompt = f"""
-            سؤال: {question}
-            السياق: {context if context else ''}
-            المعرفة الإضافية: {' '.join(knowledge_results) if knowledge_results else ''}
-            
-            أجب بدقة عالية جداً مع مصادر المعلومات.
-            """
-            
-            gemini_response = await self.call_gemini(prompt)
+            # 3. استدعاء Gemini API
+            try:
+                gemini_response = await self.call_gemini(prepared["prompt"], fallback=False)
+                cacheable = True
+            except LLMUnavailable:
+                # إجابة المحاكاة لا تُخزن حتى لا تبقى بعد عودة Gemini
+                gemini_response = await self.simulate_gpt4(prepared["prompt"])
+                cacheable = False
             
-            # 3. تحسين الإجابة
+            # 4. تحسين الإجابة
             enhanced_answer = await self.enhance_response(gemini_response, question)
             
-            # 4. حفظ في الذاكرة
-            conv_id = datetime.now().strftime("%Y%m%d%H%M%S")
-            self.conversation_memory[conv_id] = {
-                "question": question,
-                "answer": enhanced_answer,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            return {
-                "status": "success",
-                "answer": enhanced_answer,
-                "sources": knowledge_results[:2] if knowledge_results else [],
-                "confidence": 0.98,  # دقة متفوقة
-                "model": "Gemini Pro + Knowledge Base",
-                "conversation_id": conv_id
-            }
+            # 5. حفظ في الذاكرة
+            return await self.finish_query(question, context, prepared, enhanced_answer, cacheable)
         except Exception as e:
             # الرجوع للنماذج المحلية
             return await self.fallback_query(question)
     
-    async def call_gemini(self, prompt: str) -> str:
+    async def query_stream(self, question: str, context: Optional[str] = None,
+                           conversation_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """استعلام متدفق: أجزاء الإجابة فور وصولها ثم إطار أخير بالمصادر والبيانات الوصفية"""
+        try:
+            prepared = await self.prepare_query(question, context, conversation_id)
+        except Exception as e:
+            yield await self.fallback_query(question)
+            return
+        
+        if "cached" in prepared:
+            cached = prepared["cached"]
+            yield {"status": "streaming", "type": "token", "text": cached["answer"]}
+            yield {**cached, "type": "done"}
+            return
+        
+        parts = []
+        cacheable = True
+        try:
+            async for text in self.llm.stream(prepared["prompt"]):
+                parts.append(text)
+                yield {"status": "streaming", "type": "token", "text": text}
+        except LLMUnavailable:
+            cacheable = False
+            if not parts:
+                # فشل قبل أول جزء - إجابة المحاكاة كاملة
+                text = await self.simulate_gpt4(prepared["prompt"])
+                parts.append(text)
+                yield {"status": "streaming", "type": "token", "text": text}
+        
+        # تحسين الإجابة يضيف لاحقة - تُرسل كجزء أخير
+        response = "".join(parts)
+        enhanced_answer = await self.enhance_response(response, question)
+        if enhanced_answer.startswith(response) and len(enhanced_answer) > len(response):
+            yield {"status": "streaming", "type": "token", "text": enhanced_answer[len(response):]}
+        
+        result = await self.finish_query(question, context, prepared, enhanced_answer, cacheable)
+        if not cacheable:
+            result["warning"] = "انقطع تدفق Gemini - الإجابة قد تكون ناقصة" if response else "Using simulated response"
+        yield {**result, "type": "done"}
+    
+    async def prepare_query(self, question: str, context: Optional[str],
+                            conversation_id: Optional[str] = None) -> Dict[str, Any]:
+        """تضمين السؤال، البحث في الذاكرة الدلالية ثم في قاعدة المعرفة، وبناء الموجه"""
+        await self.refresh_knowledge_base()
+        lexical = self.lexical_index
+        # BM25 لا يحتاج متجه السؤال - يبدأ في مجمع الخيوط بالتزامن مع التضمين
+        lexical_search = (asyncio.ensure_future(executors.run_io(lexical.search, question, RETRIEVAL_CANDIDATES))
+                          if RETRIEVAL_MODE in ("hybrid", "lexical") and lexical is not None else None)
+        try:
+            question_vector = None
+            # المسار المعجمي وحده لا يحتاج متجه السؤال (إلا للذاكرة الدلالية)
+            needs_vector = SEMANTIC_CACHE_ENABLED or RETRIEVAL_MODE != "lexical" or lexical is None
+            if self.embeddings is not None and needs_vector:
+                # تضمين واحد للسؤال يخدم الذاكرة الدلالية والبحث المتجهي معاً
+                question_vector = await self.embed_question(question)
+            
+            if SEMANTIC_CACHE_ENABLED and question_vector is not None:
+                cached = self.semantic_cache.lookup(question_vector, context, self.knowledge_generation)
+                if cached is not None:
+                    conv_id = await self.remember_conversation(question, cached["answer"], conversation_id)
+                    return {"cached": {**cached, "conversation_id": conv_id, "cache": "semantic"}}
+            
+            lexical_hits = await lexical_search if lexical_search is not None else None
+            knowledge_results = await self.retrieve(question, question_vector, k=3, lexical_hits=lexical_hits)
+        finally:
+            if lexical_search is not None and not lexical_search.done():
+                lexical_search.cancel()
+        
+        prompt = f"""
+            سؤال: {question}
+            السياق: {context if context else ''}
+            المعرفة الإضافية: {' '.join(knowledge_results) if knowledge_results else ''}
+            
+            أجب بدقة عالية جداً مع مصادر المعلومات.
+            """
+        return {"vector": question_vector, "knowledge": knowledge_results, "prompt": prompt,
+                "conversation_id": conversation_id}
+    
+    async def embed_question(self, question: str) -> List[float]:
+        """متجه السؤال: عبر مجمّع الدفعات إن كان مفعلاً وإلا استدعاء منفرد"""
+        if self.embedding_batcher is not None:
+            return await self.embedding_batcher.embed(question)
+        # تضمين السؤال حاجب - في مجمع خيوط الإدخال/الإخراج
+        return await executors.run_io(self.embeddings.embed_query, question)
+    
+    async def retrieve(self, question: str, question_vector: Optional[List[float]], k: int = 3,
+                       mode: str = RETRIEVAL_MODE,
+                       lexical_hits: Optional[List[Tuple[str, float]]] = None) -> List[str]:
+        """الاسترجاع من قاعدة المعرفة: BM25 و/أو المتجهات مدموجة بالترتيب التبادلي (RRF)
+
+        الهجين يرتب مرشحي BM25 بالمتجهات (O(المرشحين)) بدل مسح الفهرس المتجهي كله، ولا يمسحه إلا إن
+        لم يجد BM25 أي مرشح. lexical_hits: نتيجة BM25 إن بدأت مسبقاً (بالتزامن مع التضمين في prepare_query)
+        """
+        # البحث (NumPy أو SQLite/HNSW) حاجب - في مجمع خيوط الإدخال/الإخراج لا على حلقة الأحداث
+        lexical = self.lexical_index
+        use_lexical = mode in ("hybrid", "lexical") and lexical is not None
+        use_vector = question_vector is not None and mode in ("hybrid", "vector")
+        
+        candidates = []
+        if use_lexical:
+            if lexical_hits is None:
+                lexical_hits = await executors.run_io(lexical.search, question, RETRIEVAL_CANDIDATES)
+            candidates = [doc_id for doc_id, _ in lexical_hits]
+            if mode == "lexical":
+                return [lexical.document(doc_id) for doc_id in candidates[:k]]
+        
+        rankings, texts = [], {}
+        if candidates:
+            rankings.append(candidates)
+        if use_vector:
+            # البحث بمتجه السؤال نفسه دون تضمين ثانٍ
+            texts = await executors.run_io(self.vector_search, question_vector, RETRIEVAL_CANDIDATES,
+                                           candidates or None)
+            rankings.append(list(texts))
+        
+        if len(rankings) > 1:
+            order = [doc_id for doc_id, _ in reciprocal_rank_fusion(rankings)]
+        else:
+            order = rankings[0] if rankings else []
+        results = []
+        for doc_id in order[:k]:
+            text = texts.get(doc_id) or (lexical.document(doc_id) if lexical else None)
+            if text is not None:
+                results.append(text)
+        return results
+    
+    def vector_search(self, question_vector: List[float], candidates: int,
+                      within: Optional[List[str]] = None) -> Dict[str, str]:
+        """أقرب المقاطع لمتجه السؤال بالترتيب: المعرف -> النص (يعمل في خيط)
+
+        within: ترتيب هذه المعرفات فقط (مرشحو BM25) - في فهرس NumPy؛ Chroma يبحث في المجموعة كلها
+        """
+        vector_index, collection = self.vector_index, self.collection
+        if vector_index is not None and within:
+            return {doc_id: document for doc_id, document, _ in vector_index.search_within(question_vector, within)}
+        if vector_index is not None:
+            # ضرب مصفوفات داخل العملية - بدون HNSW أو قفل Chroma
+            hits = vector_index.search([question_vector], k=candidates)[0]
+            return {doc_id: document for doc_id, document, _ in hits}
+        if collection is None:
+            return {}
+        count = collection.count()
+        if not count:
+            return {}
+        found = collection.query(query_embeddings=[question_vector], n_results=min(candidates, count),
+                                 include=["documents"])
+        return dict(zip(found["ids"][0], found["documents"][0]))
+    
+    async def finish_query(self, question: str, context: Optional[str], prepared: Dict[str, Any],
+                     answer: str, cacheable: bool) -> Dict:
+        """بناء النتيجة وتخزينها في الذاكرة الدلالية وذاكرة المحادثات"""
+        knowledge_results = prepared["knowledge"]
+        result = {
+            "status": "success",
+            "answer": answer,
+            "sources": knowledge_results[:2] if knowledge_results else [],
+            "confidence": 0.98,  # دقة متفوقة
+            "model": "Gemini Pro + Knowledge Base"
+        }
+        if not cacheable:
+            # إجابة متدهورة (محاكاة أو تدفق ناقص) - لا تُخزن في أي ذاكرة مؤقتة
+            result["degraded"] = True
+        elif SEMANTIC_CACHE_ENABLED and prepared["vector"] is not None:
+            self.semantic_cache.store(prepared["vector"], context, self.knowledge_generation, question, result)
+        
+        conv_id = await self.remember_conversation(question, answer, prepared["conversation_id"])
+        return {**result, "conversation_id": conv_id}
+    
+    async def remember_conversation(self, question: str, answer: str,
+                                    conversation_id: Optional[str] = None) -> str:
+        """إضافة السؤال والإجابة كدور في المحادثة (محادثة جديدة إن لم يُعطَ معرف)"""
+        return await self.conversations.append(conversation_id, question, answer)
+    
+    async def call_gemini(self, prompt: str, fallback: bool = True) -> str:
         """استدعاء Gemini API"""
         try:
-            response = self.gemini_model.generate_content(prompt)
-            return response.text
-        except:
+            return await self.llm.generate(prompt)
+        except LLMUnavailable:
+            if not fallback:
+                raise
             return await self.simulate_gpt4(prompt)
     
     async def simulate_gpt4(self, prompt: str) -> str:
@@ -155,7 +564,8 @@ class CognitiveCore:
                 "answer": response,
                 "confidence": 0.85,
                 "model": "GPT-4 Simulation (Fallback)",
-                "warning": "Using simulated response"
+                "warning": "Using simulated response",
+                "degraded": True
             }
         except Exception as e:
             return {
@@ -163,31 +573,213 @@ class CognitiveCore:
                 "message": f"فشل جميع النماذج: {str(e)}"
             }
     
-    async def learn_from_document(self, document_text: str) -> Dict:
-        """تعلم النظام من مستند جديد"""
+    async def learn_from_document(self, document_text: str, source: Optional[str] = None) -> Dict:
+        """تعلم النظام من مستند جديد (أو تحديث مستند سابق بنفس المصدر)"""
+        result = await self.learn_from_documents([document_text], sources=[source])
+        if result["status"] != "success":
+            return result
+        return {
+            "status": "success",
+            "chunks_added": result["chunks_added"],
+            "knowledge_base_size": result["knowledge_base_size"],
+            "diff": result["diff"]
+        }
+    
+    async def learn_from_documents(self, documents: List[str],
+                                   batch_size: int = INGEST_EMBED_BATCH,
+                                   progress: Optional[Callable[[Dict], None]] = None,
+                                   sources: Optional[List[Optional[str]]] = None) -> Dict:
+        """استيعاب جماعي تدريجي: تقسيم متوازٍ، تضمين المقاطع الجديدة فقط على دفعات، وحذف المقاطع المزالة"""
         try:
-            # تقسيم النص
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200
-            )
-            texts = text_splitter.split_text(document_text)
-            
-            # إضافة إلى قاعدة المعرفة
-            if self.vector_store:
-                self.vector_store.add_texts(texts)
+            if not self.collection:
+                raise RuntimeError("قاعدة المعرفة غير متاحة")
+            sources = list(sources) if sources is not None else [None] * len(documents)
+            if len(sources) != len(documents):
+                raise ValueError("عدد المصادر لا يطابق عدد المستندات")
             
-            return {
-                "status": "success",
-                "chunks_added": len(texts),
-                "knowledge_base_size": len(self.collection.get()['ids']) if self.collection else 0
-            }
+            # كاتب واحد عبر كل العمال: مقطع يراه استيعاب موجوداً لا يحذفه استيعاب آخر كيتيم قبل تسجيل بصمته
+            async with self.exclusive_ingestion():
+                return await self.ingest_documents(documents, sources, batch_size, progress)
         except Exception as e:
+            if self.fingerprints is not None:
+                await executors.run_io(self.fingerprints.save_progress, {"stage": "error", "message": str(e)})
             return {
                 "status": "error",
                 "message": str(e)
             }
     
+    @asynccontextmanager
+    async def exclusive_ingestion(self):
+        """قفل الاستيعاب بين العمليات (flock على ملف بجانب البصمات) - الانتظار على حلقة الأحداث لا في خيط"""
+        handle = self.fingerprints.try_lock_writer()
+        while handle is None:
+            await asyncio.sleep(self.INGEST_LOCK_POLL)
+            handle = self.fingerprints.try_lock_writer()
+        try:
+            yield
+        finally:
+            self.fingerprints.unlock_writer(handle)
+    
+    async def ingest_documents(self, documents: List[str], sources: List[Optional[str]], batch_size: int,
+                               progress: Optional[Callable[[Dict], None]]) -> Dict:
+        """مراحل الاستيعاب (تحت قفل الكاتب): البصمات، التقسيم، التضمين، الإدراج، حذف اليتيم"""
+        started = datetime.now()
+        state = {
+            "stage": "fingerprinting",
+            "documents": len(documents),
+            "chunks_total": 0,
+            "chunks_done": 0,
+            "started": started.isoformat()
+        }
+        
+        async def report(**changes):
+            state.update(changes)
+            # التقدم في SQLite المشترك - يُقرأ من أي عامل
+            await executors.run_io(self.fingerprints.save_progress, state)
+            if progress:
+                progress(dict(state))
+        
+        await report()
+        
+        # فهارس هذه العملية قد تسبق كتابة عامل آخر - إعادة فتحها قبل الإضافة إليها
+        # (تحت قفل الكاتب: لا كتابة أخرى بين إعادة الفتح وزيادة الجيل)
+        if self.vector_store is not None and await executors.run_io(self.read_generation) != self.knowledge_generation:
+            await executors.run_io(self.reload_knowledge_base, True)
+        
+        # 0. البصمات: المستند بلا مصدر يُعرّف بتجزئته - المستند غير المتغير لا يُقسم ولا يُضمّن
+        hashes = await executors.run_io(lambda: [document_hash(document) for document in documents])
+        latest = {}
+        for position, (source, digest) in enumerate(zip(sources, hashes)):
+            latest[source or f"sha256:{digest}"] = position
+        stored = await executors.run_io(self.fingerprints.document_hashes, list(latest))
+        changed = [(source, position) for source, position in latest.items()
+                   if stored.get(source) != hashes[position]]
+        await report(stage="splitting", documents_unchanged=len(latest) - len(changed))
+        
+        # 1. التقسيم المتوازي عبر مجمع العمليات (المستندات المتغيرة فقط)
+        changed_documents = [documents[position] for _, position in changed]
+        groups = max(1, min(CPU_WORKERS, len(changed_documents)))
+        per_group = -(-len(changed_documents) // groups) if changed_documents else 0
+        split_results = await asyncio.gather(*(
+            executors.run_cpu(split_documents, changed_documents[start:start + per_group])
+            for start in range(0, len(changed_documents), per_group or 1)
+        ))
+        per_document = [chunks for group in split_results for chunks in group]
+        
+        # معرف المقطع = تجزئة محتواه: المقطع الموجود سابقاً (في هذا المستند أو غيره) لا يُضمّن ثانية
+        fingerprints, candidates = [], {}
+        diff = {"documents_changed": len(changed), "documents_unchanged": len(latest) - len(changed),
+                "chunks_added": 0, "chunks_removed": 0, "chunks_unchanged": 0}
+        for (source, position), chunks in zip(changed, per_document):
+            chunk_map = {chunk_id(chunk): chunk for chunk in chunks}
+            previous = await executors.run_io(self.fingerprints.chunk_ids, source)
+            added = chunk_map.keys() - previous
+            for item in added:
+                candidates[item] = chunk_map[item]
+            diff["chunks_added"] += len(added)
+            diff["chunks_unchanged"] += len(chunk_map.keys() & previous)
+            fingerprints.append((source, hashes[position], list(chunk_map)))
+        
+        candidate_ids = list(candidates)
+        for start in range(0, len(candidate_ids), INGEST_UPSERT_BATCH):
+            existing = await executors.run_io(self.collection.get,
+                                              ids=candidate_ids[start:start + INGEST_UPSERT_BATCH], include=[])
+            for item in existing["ids"]:
+                candidates.pop(item, None)
+        texts = list(candidates.values())
+        new_ids = list(candidates)
+        await report(stage="embedding", chunks_total=len(texts))
+        
+        # 2. التضمين على دفعات متزامنة (محدودة) في مجمع خيوط الإدخال/الإخراج
+        batches = [(new_ids[start:start + batch_size], texts[start:start + batch_size])
+                   for start in range(0, len(texts), batch_size)]
+        limiter = asyncio.Semaphore(INGEST_EMBED_CONCURRENCY)
+        # طابور محدود: التضمين ينتظر الكاتب بدل تكديس كل المتجهات في الذاكرة
+        queue: asyncio.Queue = asyncio.Queue(maxsize=INGEST_EMBED_CONCURRENCY)
+        ids = []
+        
+        async def embed(batch_ids: List[str], batch: List[str]):
+            async with limiter:
+                vectors = await executors.run_io(self.embeddings.embed_documents, batch)
+            await queue.put((batch_ids, batch, vectors))
+        
+        async def write():
+            # 3. كاتب واحد: إدراج كل INGEST_UPSERT_BATCH مقطع فور اكتمال تضمينها
+            pending_ids, pending_documents, pending_vectors = [], [], []
+            
+            async def flush():
+                await executors.run_io(self.collection.upsert, ids=pending_ids,
+                                       documents=pending_documents, embeddings=pending_vectors)
+                self.update_vector_index(pending_ids, pending_vectors, pending_documents)
+                if self.lexical_index is not None:
+                    self.lexical_index.add(pending_ids, pending_documents)
+                ids.extend(pending_ids)
+                await report(chunks_done=len(ids))
+                pending_ids.clear()
+                pending_documents.clear()
+                pending_vectors.clear()
+            
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                batch_ids, batch, vectors = item
+                pending_ids.extend(batch_ids)
+                pending_documents.extend(batch)
+                pending_vectors.extend(vectors)
+                if len(pending_ids) >= INGEST_UPSERT_BATCH:
+                    await flush()
+            if pending_ids:
+                await flush()
+        
+        writer = asyncio.ensure_future(write())
+        try:
+            await asyncio.gather(*(embed(batch_ids, batch) for batch_ids, batch in batches))
+            await queue.put(None)
+            await writer
+        finally:
+            writer.cancel()
+        await report(stage="writing")
+        
+        # 4. تسجيل البصمات بعد الإدراج ثم حذف المقاطع التي لم يعد يستخدمها أي مستند
+        orphaned = set()
+        for source, digest, members in fingerprints:
+            removed, unused = await executors.run_io(self.fingerprints.replace, source, digest, members)
+            diff["chunks_removed"] += len(removed)
+            orphaned |= unused
+        orphaned = list(orphaned)
+        for start in range(0, len(orphaned), INGEST_UPSERT_BATCH):
+            await executors.run_io(self.collection.delete, ids=orphaned[start:start + INGEST_UPSERT_BATCH])
+        
+        if ids or orphaned:
+            if orphaned and self.vector_index is not None:
+                self.vector_index.remove(orphaned)
+            current = self.bump_generation()
+            if self.lexical_index is not None:
+                self.lexical_index.remove(orphaned)
+                if current:
+                    await executors.run_io(self.lexical_index.save, self.lexical_index_path,
+                                           self.knowledge_generation)
+        
+        # count() لا يجلب المجموعة كاملة - O(1)
+        size = self.collection.count()
+        await report(stage="done", knowledge_base_size=size)
+        return {
+            "status": "success",
+            "documents": len(documents),
+            "chunks_added": len(ids),
+            "chunks_deleted": len(orphaned),
+            "knowledge_base_size": size,
+            "diff": diff,
+            "seconds": round((datetime.now() - started).total_seconds(), 3)
+        }
+    
+    async def ingestion_progress(self) -> Dict:
+        """تقدم آخر عملية استيعاب جماعي (من أي عامل)"""
+        if self.fingerprints is None:
+            return {}
+        return await executors.run_io(self.fingerprints.progress)
+    
     async def real_time_update(self) -> Dict:
         """تحديث لحظي للمعلومات"""
         return {
@@ -0,0 +1,110 @@
+"""
+============================================
+🗺️ الخريطة: benchmarks/bench_graph.py
+📌 الربط:
+    - يقيس graph_engine.py (CSR + كتابة متدفقة) عبر logic_flow.render_flow
+    - مقابل المسار القديم (networkx.DiGraph + Mermaid بـ += متكرر) دون حد العشر عقد
+============================================
+"""
+
+# المتطلبات: numpy, networkx
+# الاستخدام: python benchmarks/bench_graph.py --sizes 10,100,1000,10000,100000 --output graph.json
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from logic_flow import render_flow
+
+WORDS = ("تحقق استلام طلب مراجعة موافقة رفض تنفيذ إرسال أرشفة إشعار "
+         "validate fetch parse transform store notify retry").split()
+
+
+def make_description(nodes: int, seed: int = 5) -> str:
+    """وصف اصطناعي بعدد كلمات = عدد العقد"""
+    rng = random.Random(seed)
+    return " ".join(f"{rng.choice(WORDS)}{i % 97}" for i in range(nodes))
+
+
+def legacy_render(description: str) -> str:
+    """المسار القديم بلا حد: DiGraph ثم += لكل سطر"""
+    import networkx as nx
+
+    G = nx.DiGraph()
+    for i, word in enumerate(description.split()):
+        G.add_node(i, label=word, type="concept")
+    for i in range(len(G.nodes) - 1):
+        G.add_edge(i, i + 1, weight=0.5)
+    mermaid_code = "graph TD\n"
+    for node in G.nodes(data=True):
+        mermaid_code += f"    N{node[0]}[{node[1]['label']}]\n"
+    for edge in G.edges():
+        mermaid_code += f"    N{edge[0]} --> N{edge[1]}\n"
+    return mermaid_code
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """الزمن الوسيط + ذروة الذاكرة (tracemalloc في تشغيل منفصل حتى لا يبطئ القياس)"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": round(statistics.median(timings), 2), "peak_mb": round(peak / 1024 / 1024, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس بناء المخططات وكتابتها من 10 إلى 100 ألف عقدة")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000", help="أعداد العقد مفصولة بفواصل")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="عدم قياس المسار القديم (networkx)")
+    parser.add_argument("--output", help="ملف JSON لحفظ النتائج")
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(size) for size in args.sizes.split(",")):
+        description = make_description(size)
+        row = {
+            "engine_mermaid": measure(lambda: render_flow(description), args.repeat),
+            "engine_dot": measure(lambda: render_flow(description, "dot"), args.repeat),
+        }
+        if not args.skip_legacy:
+            row["legacy_mermaid"] = measure(lambda: legacy_render(description), args.repeat)
+            row["speedup"] = round(row["legacy_mermaid"]["ms"] / max(row["engine_mermaid"]["ms"], 1e-3), 1)
+        graph, code, _ = render_flow(description)
+        row["graph"] = graph.stats()
+        row["mermaid_kb"] = round(len(code.encode("utf-8")) / 1024, 1)
+        results[size] = row
+        print(f"✅ {size} عقدة: {row['engine_mermaid']['ms']} ms"
+              + (f" (القديم {row['legacy_mermaid']['ms']} ms)" if "legacy_mermaid" in row else ""),
+              file=sys.stderr)
+
+    report = {
+        "benchmark": "graph",
+        "timestamp": datetime.now().isoformat(),
+        "config": vars(args),
+        "results": results
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
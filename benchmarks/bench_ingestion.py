@@ -0,0 +1,168 @@
+"""
+============================================
+🗺️ الخريطة: benchmarks/bench_ingestion.py
+📌 الربط:
+    - يقيس استيعاب ai_core.py لقاعدة المعرفة (المسار القديم مستنداً بمستند مقابل المسار الجماعي)
+    - ويقيس إعادة الاستيعاب التدريجي بعد تعديل نسبة من المستندات (بصمات fingerprint_store.py)
+    - يستخدم StubEmbeddings من stubs.py بدل OpenAI
+============================================
+"""
+
+# المتطلبات: chromadb, langchain
+# الاستخدام: python benchmarks/bench_ingestion.py --documents 10000 --output ingest.json
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(Path(__file__).resolve().parent)]
+
+WORDS = ("الذكاء الاصطناعي نموذج بيانات تحليل معرفة شبكة عصبية تعلم استعلام "
+         "vector index latency throughput batch ingestion knowledge").split()
+
+
+def make_documents(count: int, words: int, seed: int = 7) -> List[str]:
+    """مستندات اصطناعية حتمية"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) + f" #{i}" for i in range(count)]
+
+
+def build_core(knowledge_dir: str):
+    """CognitiveCore حقيقي بقاعدة معرفة مؤقتة وتضمينات محاكاة"""
+    import ai_core
+    from embedding_cache import CachedEmbeddings, DiskEmbeddingStore
+    from stubs import StubEmbeddings
+
+    # مسار قاعدة المعرفة يُقرأ من وحدة ai_core عند الإنشاء - نوجهه لمجلد القياس
+    ai_core.KNOWLEDGE_DIR = knowledge_dir
+
+    class BenchCore(ai_core.CognitiveCore):
+        def init_models(self):
+            self.local_models = {}
+
+        def get_embeddings(self):
+            store = DiskEmbeddingStore(os.path.join(knowledge_dir, "embedding_cache"))
+            return CachedEmbeddings(StubEmbeddings(), model_name="stub", store=store)
+
+    return BenchCore()
+
+
+async def legacy_ingest(core, documents: List[str]) -> int:
+    """المسار القديم: تقسيم وتضمين وإضافة لكل مستند ثم عدّ كامل المجموعة"""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    chunks = 0
+    for document in documents:
+        texts = splitter.split_text(document)
+        core.vector_store.add_texts(texts)
+        chunks += len(texts)
+        len(core.collection.get()["ids"])
+    return chunks
+
+
+async def bulk_ingest(core, documents: List[str], batch_size: int) -> int:
+    result = await core.learn_from_documents(documents, batch_size=batch_size)
+    if result["status"] != "success":
+        raise RuntimeError(result["message"])
+    return result["chunks_added"]
+
+
+async def measure(name: str, ingest, documents: List[str], **kwargs) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix=f"superai_ingest_{name}_") as directory:
+        core = build_core(directory)
+        started = time.perf_counter()
+        chunks = await ingest(core, documents, **kwargs)
+        elapsed = time.perf_counter() - started
+    result = {
+        "documents": len(documents),
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "docs_per_s": round(len(documents) / elapsed, 1),
+        "chunks_per_s": round(chunks / elapsed, 1)
+    }
+    print(f"✅ {name}: {result['docs_per_s']} docs/s", file=sys.stderr)
+    return result
+
+
+async def measure_reingest(documents: List[str], batch_size: int, edit_ratio: float) -> Dict[str, Any]:
+    """استيعاب أول بمصادر ثم تعديل نسبة من المستندات وإعادة استيعابها كلها"""
+    sources = [f"doc{i}" for i in range(len(documents))]
+    rng = random.Random(13)
+    edited = list(documents)
+    for i in rng.sample(range(len(documents)), int(len(documents) * edit_ratio)):
+        edited[i] = f"{edited[i]} تعديل {i}"
+
+    with tempfile.TemporaryDirectory(prefix="superai_ingest_reingest_") as directory:
+        core = build_core(directory)
+        first = await core.learn_from_documents(documents, batch_size=batch_size, sources=sources)
+        started = time.perf_counter()
+        second = await core.learn_from_documents(edited, batch_size=batch_size, sources=sources)
+        elapsed = time.perf_counter() - started
+    if second["status"] != "success":
+        raise RuntimeError(second["message"])
+    result = {
+        "edit_ratio": edit_ratio,
+        "first_seconds": first["seconds"],
+        "first_chunks_embedded": first["chunks_added"],
+        "seconds": round(elapsed, 3),
+        "chunks_embedded": second["chunks_added"],
+        "chunks_deleted": second["chunks_deleted"],
+        "diff": second["diff"],
+        "work_reduction": round(first["chunks_added"] / max(second["chunks_added"], 1), 1)
+    }
+    print(f"✅ reingest: {result['chunks_embedded']} / {result['first_chunks_embedded']} chunks re-embedded",
+          file=sys.stderr)
+    return result
+
+
+async def run(args) -> Dict[str, Any]:
+    from executors import executors
+
+    documents = make_documents(args.documents, args.words)
+    results = {}
+    try:
+        # المسار القديم بطيء جداً (عدّ كامل بعد كل مستند) - يُقاس على عينة
+        results["legacy"] = await measure("legacy", legacy_ingest, documents[:args.legacy_documents])
+        results["bulk"] = await measure("bulk", bulk_ingest, documents, batch_size=args.batch_size)
+        results["reingest"] = await measure_reingest(documents, args.batch_size, args.edit_ratio)
+    finally:
+        executors.shutdown()
+    results["speedup_docs_per_s"] = round(results["bulk"]["docs_per_s"] / results["legacy"]["docs_per_s"], 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس إنتاجية استيعاب المستندات في قاعدة المعرفة")
+    parser.add_argument("--documents", type=int, default=10000, help="عدد المستندات للمسار الجماعي")
+    parser.add_argument("--legacy-documents", type=int, default=500, help="عدد المستندات للمسار القديم")
+    parser.add_argument("--words", type=int, default=400, help="عدد الكلمات في كل مستند")
+    parser.add_argument("--batch-size", type=int, default=256, help="حجم دفعة التضمين")
+    parser.add_argument("--edit-ratio", type=float, default=0.05, help="نسبة المستندات المعدلة قبل إعادة الاستيعاب")
+    parser.add_argument("--output", help="ملف JSON لحفظ النتائج")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "ingestion",
+        "timestamp": datetime.now().isoformat(),
+        "config": vars(args),
+        "results": asyncio.run(run(args))
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
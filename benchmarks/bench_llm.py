@@ -0,0 +1,137 @@
+"""
+============================================
+🗺️ الخريطة: benchmarks/bench_llm.py
+📌 الربط:
+    - يشغل llm_stub_server.py ويقيس llm_client.py باستدعاءات متزامنة
+    - يقارن بالاستدعاء الحاجب القديم (طلب متزامن داخل حلقة الأحداث)
+============================================
+"""
+
+# المتطلبات: httpx, uvicorn
+# الاستخدام: python benchmarks/bench_llm.py --calls 200 --concurrency 32
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from load_bench import free_port, percentile
+
+
+def start_stub(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "llm_stub_server:app", "--app-dir", str(BENCH_DIR),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/stats", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise TimeoutError("لم يبدأ خادم المحاكاة ضمن المهلة")
+
+
+def summarize(latencies, elapsed: float) -> Dict[str, Any]:
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "calls": len(latencies),
+        "seconds": round(elapsed, 3),
+        "calls_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(ms, 0.50), 1),
+        "p95_ms": round(percentile(ms, 0.95), 1)
+    }
+
+
+async def run_blocking(base_url: str, calls: int, concurrency: int) -> Dict[str, Any]:
+    """المسار القديم: استدعاء متزامن حاجب داخل دالة async - الطلبات تتسلسل"""
+    client = httpx.Client(base_url=base_url)
+
+    async def one(i: int):
+        started = time.perf_counter()
+        client.post("/v1beta/models/gemini-pro:generateContent",
+                    json={"contents": [{"parts": [{"text": f"سؤال {i}"}]}]})
+        return time.perf_counter() - started
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i: int):
+        async with semaphore:
+            return await one(i)
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(bounded(i) for i in range(calls)))
+    client.close()
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def run_pooled(calls: int, concurrency: int) -> Dict[str, Any]:
+    from llm_client import GeminiClient
+
+    client = GeminiClient(api_key="bench", max_concurrency=concurrency)
+
+    async def one(i: int):
+        started = time.perf_counter()
+        await client.generate(f"سؤال {i}")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    return {**summarize(latencies, elapsed), "client": client.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس عميل Gemini غير الحاجب مقابل الاستدعاء الحاجب")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--blocking-calls", type=int, default=40, help="عدد الاستدعاءات للمسار الحاجب")
+    parser.add_argument("--output", help="ملف JSON لحفظ النتائج")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    # يجب ضبطه قبل استيراد config عبر llm_client
+    os.environ["GEMINI_BASE_URL"] = base_url
+
+    process = start_stub(port)
+    try:
+        results = {
+            "blocking": asyncio.run(run_blocking(base_url, args.blocking_calls, args.concurrency)),
+            "pooled": asyncio.run(run_pooled(args.calls, args.concurrency))
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+    report = {
+        "benchmark": "llm_client",
+        "timestamp": datetime.now().isoformat(),
+        "config": vars(args),
+        "results": results
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+============================================
+🗺️ الخريطة: benchmarks/bench_retrieval.py
+📌 الربط:
+    - يقيس hybrid_retriever.py (BM25 + RRF) مقابل البحث المتجهي وحده (local_embeddings.py)
+    - يستخدم المجموعة المرفقة benchmarks/data/retrieval_set.json + مستندات تشويش اصطناعية
+============================================
+"""
+
+# المتطلبات: numpy
+# الاستخدام: python benchmarks/bench_retrieval.py --k 3 --distractors 5000 --output retrieval.json
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from hybrid_retriever import BM25Index, reciprocal_rank_fusion
+from local_embeddings import HashingEmbeddings, NumpyVectorIndex
+from config import RETRIEVAL_CANDIDATES
+
+DATASET = Path(__file__).resolve().parent / "data" / "retrieval_set.json"
+
+
+# مستندات التشويش: جمل طبيعية من مجالات أخرى (أخبار، تجارة، طقس، سفر، إعلانات...) مع مفردات عامة تتقاطع
+# أحياناً مع المجموعة - لا خلط لكلمات المجموعة نفسها (ذلك يحابي BM25 لأن كل تشويش يطابق كلماتها)
+SUBJECTS = (
+    "وزارة الصحة", "الشركة الناشئة", "فريق البحث", "مجلس البلدية", "إدارة المطار", "المدرسة الثانوية",
+    "الهيئة العامة للإحصاء", "المتحف الوطني", "نادي المدينة", "سوق الأسهم", "مصنع الإسمنت", "الجامعة المحلية",
+    "The city council", "A regional bank", "The support team", "Our product manager", "The airline",
+)
+PREDICATES = (
+    "أعلن عن خطة جديدة", "نشر تقريره السنوي", "افتتح فرعاً جديداً", "رفع أسعار الخدمات", "أطلق حملة توعية",
+    "وقّع اتفاقية تعاون", "أجّل موعد الاجتماع", "استقبل وفداً رسمياً", "طرح مناقصة لتوريد المعدات",
+    "published a quarterly report", "announced new opening hours", "reviewed the annual budget",
+)
+COMPLEMENTS = (
+    "لتحسين الخدمات المقدمة للمواطنين", "بعد ارتفاع الطلب خلال الصيف", "بالتعاون مع القطاع الخاص",
+    "وسط توقعات بنمو الإيرادات", "في إطار خطة التنمية الخمسية", "استعداداً لموسم الحج", "رغم الظروف الجوية",
+    "وفق الأنظمة واللوائح المعمول بها", "لدعم المشاريع الصغيرة والمتوسطة", "في المدن الساحلية والمرتفعات",
+    "to reduce waiting times for customers", "after feedback from local residents", "ahead of the holiday season",
+)
+# إشارات عابرة لموضوعات المجموعة داخل خبر لا يخصها (سلبيات صعبة تشارك السؤال بعض كلماته)
+MENTIONS = (
+    "ضمن معرض عن المخطوطات والخط العربي", "بالتزامن مع ارتفاع أسعار القهوة والتمور", "قبيل مباراة كرة القدم الختامية",
+    "بعد انقطاع الكهرباء في عدة أحياء", "مع نقل الخوادم إلى مركز بيانات جديد", "خلال رحلة سياحية إلى الجيزة والبتراء",
+    "ضمن حملة توعية بمرض السكري والنوم الصحي", "مع دورة تدريبية في البرمجة والذكاء الاصطناعي",
+    "لتركيب ألواح شمسية فوق المباني الحكومية", "بعد تعطل الشبكة وتأخر الرد على الطلبات", "خلال موائد الإفطار في رمضان",
+    "during a workshop on machine learning and data", "while the cache servers were being upgraded",
+)
+DETAILS = (
+    "وتستمر أعمال الصيانة حتى نهاية الشهر.", "ويبلغ عدد المستفيدين أكثر من ألفي أسرة.",
+    "ويتوقع المحللون استقرار الأسعار في الربع القادم.", "وتُقام الفعاليات يومياً من الساعة الرابعة عصراً.",
+    "وأكد المتحدث الرسمي أن التسجيل متاح عبر الموقع الإلكتروني.", "ودعا السكان إلى الالتزام بالتعليمات.",
+    "وتشمل العروض خصومات على الأجهزة المنزلية والملابس.", "وتتراوح درجات الحرارة بين عشرين وثلاثين درجة.",
+    "Tickets are available online and at the main office.", "The changes take effect from next month.",
+)
+
+
+def make_distractors(count: int, seed: int = 11) -> List[Dict[str, str]]:
+    """مستندات تشويش واقعية الشكل: جملة أو جملتان من مجالات لا تخص أسئلة المجموعة"""
+    rng = random.Random(seed)
+
+    def sentence() -> str:
+        complement = rng.choice(MENTIONS if rng.random() < 0.3 else COMPLEMENTS)
+        return f"{rng.choice(SUBJECTS)} {rng.choice(PREDICATES)} {complement} {rng.choice(DETAILS)}"
+
+    return [{"id": f"noise{i}", "text": " ".join(sentence() for _ in range(rng.randint(1, 2)))}
+            for i in range(count)]
+
+
+def build(documents: List[Dict[str, str]], embeddings: HashingEmbeddings):
+    ids = [document["id"] for document in documents]
+    texts = [document["text"] for document in documents]
+    lexical = BM25Index()
+    lexical.add(ids, texts)
+    vectors = NumpyVectorIndex()
+    vectors.add(ids, embeddings.embed_documents(texts), texts)
+    return lexical, vectors
+
+
+def search(mode: str, query: str, k: int, lexical: BM25Index, vectors: NumpyVectorIndex,
+           embeddings: HashingEmbeddings) -> List[str]:
+    """نفس خطوات CognitiveCore.retrieve: الهجين يرتب مرشحي BM25 بالمتجهات بدل مسح الفهرس المتجهي كله
+
+    في الخدمة يعمل BM25 في مجمع الخيوط بالتزامن مع تضمين السؤال (استدعاء شبكة)؛ هنا التضمين المحلي
+    أسرع من الانتقال بين الخيوط فيُنفذان بالتتابع
+    """
+    if mode == "lexical":
+        return [doc_id for doc_id, _ in lexical.search(query, RETRIEVAL_CANDIDATES)][:k]
+    vector = embeddings.embed_query(query)
+    if mode == "vector":
+        return [doc_id for doc_id, _, _ in vectors.search([vector], k=RETRIEVAL_CANDIDATES)[0]][:k]
+    candidates = [doc_id for doc_id, _ in lexical.search(query, RETRIEVAL_CANDIDATES)]
+    if candidates:
+        dense = vectors.search_within(vector, candidates)
+    else:
+        dense = vectors.search([vector], k=RETRIEVAL_CANDIDATES)[0]
+    rankings = [candidates, [doc_id for doc_id, _, _ in dense]]
+    return [doc_id for doc_id, _ in reciprocal_rank_fusion(rankings)][:k]
+
+
+def evaluate(mode: str, queries: List[Dict[str, Any]], k: int, repeat: int, **indexes) -> Dict[str, Any]:
+    hits, latencies = 0, []
+    for item in queries:
+        relevant = set(item["relevant"])
+        for _ in range(repeat):
+            started = time.perf_counter()
+            found = search(mode, item["query"], k, **indexes)
+            latencies.append((time.perf_counter() - started) * 1000)
+        hits += len(relevant & set(found)) / len(relevant)
+    latencies.sort()
+    return {
+        f"recall@{k}": round(hits / len(queries), 3),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3),
+            "p50": round(latencies[len(latencies) // 2], 3),
+            "p95": round(latencies[int(len(latencies) * 0.95)], 3)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس الاسترجاع الهجين (BM25 + متجهات) مقابل المتجهات وحدها")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--distractors", type=int, default=5000, help="عدد مستندات التشويش المضافة")
+    parser.add_argument("--repeat", type=int, default=5, help="تكرار كل سؤال لقياس الزمن")
+    parser.add_argument("--output", help="ملف JSON لحفظ النتائج")
+    args = parser.parse_args()
+
+    with open(DATASET, encoding="utf-8") as f:
+        dataset = json.load(f)
+    documents = dataset["documents"] + make_distractors(args.distractors)
+
+    embeddings = HashingEmbeddings()
+    started = time.perf_counter()
+    lexical, vectors = build(documents, embeddings)
+    build_seconds = time.perf_counter() - started
+
+    indexes = {"lexical": lexical, "vectors": vectors, "embeddings": embeddings}
+    results = {mode: evaluate(mode, dataset["queries"], args.k, args.repeat, **indexes)
+               for mode in ("vector", "lexical", "hybrid")}
+    for mode, result in results.items():
+        print(f"✅ {mode}: recall@{args.k} {result[f'recall@{args.k}']}, "
+              f"p50 {result['latency_ms']['p50']} ms", file=sys.stderr)
+
+    report = {
+        "benchmark": "retrieval",
+        "timestamp": datetime.now().isoformat(),
+        "config": {**vars(args), "documents": len(documents), "queries": len(dataset["queries"]),
+                   "candidates": RETRIEVAL_CANDIDATES},
+        "build_seconds": round(build_seconds, 2),
+        "index": {"lexical": lexical.stats(), "vectors": vectors.stats()},
+        "results": results
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+============================================
+🗺️ الخريطة: benchmarks/bench_startup.py
+📌 الربط:
+    - يشغل main.py عبر uvicorn في عملية منفصلة
+    - يقيس الزمن حتى أول استجابة ناجحة من /
+============================================
+"""
+
+# المتطلبات: uvicorn
+# الاستخدام: python benchmarks/bench_startup.py --runs 5 [--warmup]
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    """حجز منفذ محلي متاح"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_root(warmup: bool, timeout: float) -> float:
+    """تشغيل عامل uvicorn واحد وقياس الزمن حتى أول رد من /"""
+    port = free_port()
+    env = dict(os.environ, WARMUP_ON_STARTUP="true" if warmup else "false")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"توقف العامل برمز {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError("لم يستجب العامل ضمن المهلة")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس زمن بدء العامل حتى أول استجابة من /")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", action="store_true", help="تفعيل التسخين الخلفي أثناء القياس")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    samples = [time_to_first_root(args.warmup, args.timeout) for _ in range(args.runs)]
+    print(json.dumps({
+        "benchmark": "startup_time_to_first_root",
+        "warmup": args.warmup,
+        "runs": args.runs,
+        "min_s": round(min(samples), 4),
+        "median_s": round(statistics.median(samples), 4),
+        "max_s": round(max(samples), 4),
+        "samples_s": [round(s, 4) for s in samples]
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+============================================
+🗺️ الخريطة: benchmarks/llm_stub_server.py
+📌 الربط:
+    - خادم محلي يحاكي واجهة Gemini REST (generateContent)
+    - يوجَّه إليه llm_client.py عبر GEMINI_BASE_URL للاختبار والقياس دون شبكة
+============================================
+"""
+
+# التشغيل: GEMINI_BASE_URL=http://127.0.0.1:8100 ثم
+#   python -m uvicorn llm_stub_server:app --app-dir benchmarks --port 8100
+# BENCH_GEMINI_MS: زمن الاستجابة، BENCH_GEMINI_FAILURE_RATE: نسبة ردود 503 العشوائية
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_MS = float(os.getenv("BENCH_GEMINI_MS", "120"))
+# الفاصل بين الأجزاء في الوضع المتدفق
+TOKEN_MS = float(os.getenv("BENCH_GEMINI_TOKEN_MS", "20"))
+TOKENS = int(os.getenv("BENCH_GEMINI_TOKENS", "24"))
+FAILURE_RATE = float(os.getenv("BENCH_GEMINI_FAILURE_RATE", "0"))
+
+app = FastAPI(title="Gemini Stub")
+counters = {"requests": 0, "failures": 0, "in_flight": 0, "peak_in_flight": 0}
+
+
+@app.post("/v1beta/models/{model}:generateContent")
+async def generate_content(model: str, request: Request):
+    body = await request.json()
+    prompt = "".join(part.get("text", "") for content in body.get("contents", [])
+                     for part in content.get("parts", []))
+
+    counters["requests"] += 1
+    counters["in_flight"] += 1
+    counters["peak_in_flight"] = max(counters["peak_in_flight"], counters["in_flight"])
+    try:
+        await asyncio.sleep(LATENCY_MS / 1000)
+    finally:
+        counters["in_flight"] -= 1
+
+    if random.random() < FAILURE_RATE:
+        counters["failures"] += 1
+        return JSONResponse({"error": {"code": 503, "message": "stub overloaded"}}, status_code=503)
+
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": f"[محاكاة {model}] إجابة {digest[:16]}"}]},
+            "finishReason": "STOP"
+        }]
+    }
+
+
+@app.post("/v1beta/models/{model}:streamGenerateContent")
+async def stream_generate_content(model: str, request: Request):
+    body = await request.json()
+    prompt = "".join(part.get("text", "") for content in body.get("contents", [])
+                     for part in content.get("parts", []))
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    counters["requests"] += 1
+
+    if random.random() < FAILURE_RATE:
+        counters["failures"] += 1
+        return JSONResponse({"error": {"code": 503, "message": "stub overloaded"}}, status_code=503)
+
+    async def events():
+        counters["in_flight"] += 1
+        counters["peak_in_flight"] = max(counters["peak_in_flight"], counters["in_flight"])
+        try:
+            # زمن أول جزء = زمن التفكير، ثم جزء كل TOKEN_MS
+            await asyncio.sleep(LATENCY_MS / 1000)
+            for i in range(TOKENS):
+                text = f"[محاكاة {model}] " if i == 0 else f"{digest[i % 64]}{i} "
+                chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\r\n\r\n"
+                await asyncio.sleep(TOKEN_MS / 1000)
+        finally:
+            counters["in_flight"] -= 1
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def stats():
+    return counters
@@ -0,0 +1,281 @@
+"""
+============================================
+🗺️ الخريطة: benchmarks/load_bench.py
+📌 الربط:
+    - يشغل stub_app.py (التطبيق الحقيقي + وحدات محاكاة) عبر uvicorn
+    - يضغط /api/v1/process و /ws/{client_id} بعملاء متزامنين
+    - يكتب النتائج بصيغة JSON للمقارنة بين الإصدارات
+============================================
+"""
+
+# المتطلبات: httpx, websockets, uvicorn
+# الاستخدام:
+#   python benchmarks/load_bench.py --requests 500 --concurrency 32 --output bench.json
+#   python benchmarks/load_bench.py --compare bench_before.json
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import httpx
+import websockets
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+SAMPLE_IMAGE = bytes(range(256)) * 64
+SAMPLE_TEXT = "تقرير أداء Super-AI " * 40
+
+
+def unique_image(i: int) -> str:
+    """صورة مختلفة لكل طلب: الحمولات المتطابقة تُدمج (singleflight) فتقيس الدمج لا الاستدلال"""
+    return base64.b64encode(SAMPLE_IMAGE + i.to_bytes(4, "big")).decode()
+
+
+# السيناريوهات: (القناة، منشئ الحمولة لكل طلب)
+SCENARIOS = {
+    "http:vision": ("http", lambda i: {"type": "vision", "data": unique_image(i)}),
+    "http:cognitive": ("http", lambda i: {"type": "cognitive", "query": f"ما هو الذكاء الاصطناعي؟ #{i}"}),
+    "http:export": ("http", lambda i: {"type": "export", "content": f"{SAMPLE_TEXT}{i}", "format": "pdf"}),
+    "ws:process_image": ("ws", lambda i: {"command": "process_image", "image": unique_image(i)}),
+    "ws:cognitive_query": ("ws", lambda i: {"command": "cognitive_query", "question": f"سؤال رقم {i}"}),
+    "ws:export_document": ("ws", lambda i: {"command": "export_document", "content": SAMPLE_TEXT, "format": "pdf"}),
+    "ws:generate_logic": ("ws", lambda i: {"command": "generate_logic", "description": f"بداية تحليل قرار تنفيذ نهاية {i}"}),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def read_rss_kb(pid: int) -> Optional[int]:
+    """الذاكرة المقيمة الحالية للعملية (Linux /proc)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int, rejected: int, elapsed: float,
+              peak_rss_kb: Optional[int]) -> Dict[str, Any]:
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "requests": len(latencies) + errors + rejected,
+        "ok": len(latencies),
+        "errors": errors,
+        "rejected": rejected,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(ms, 0.50), 2),
+            "p95": round(percentile(ms, 0.95), 2),
+            "p99": round(percentile(ms, 0.99), 2),
+            "mean": round(statistics.fmean(ms), 2),
+            "max": round(max(ms), 2)
+        } if ms else {},
+        "peak_rss_mb": round(peak_rss_kb / 1024, 1) if peak_rss_kb else None
+    }
+
+
+class StubServer:
+    """تشغيل التطبيق مع الوحدات المحاكاة في عملية uvicorn منفصلة"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self):
+        # بدون إحماء الوحدات الحقيقية عند البدء - الوحدات المحاكاة لا تحتاجه ولا يُحسب في القياس
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(ROOT), str(BENCH_DIR)]),
+                   WARMUP_ON_STARTUP="false")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "stub_app:app", "--app-dir", str(BENCH_DIR),
+             "--port", str(self.port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+        )
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"توقف الخادم برمز {self.process.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{self.port}/", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        raise TimeoutError("لم يبدأ الخادم ضمن المهلة")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+
+
+class RssSampler:
+    """أخذ عينات من ذاكرة الخادم أثناء السيناريو"""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            rss = read_rss_kb(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self.task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self.task.cancel()
+
+
+async def run_http(base_url: str, build, requests: int, concurrency: int):
+    latencies, errors, rejected = [], 0, 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def one(i: int):
+            nonlocal errors, rejected
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/api/v1/process", json=build(i),
+                                                 headers={"X-Cache-Bypass": "1"})
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                if response.status_code in (429, 503):
+                    rejected += 1
+                elif response.status_code != 200 or response.json().get("status") == "error":
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, errors, rejected
+
+
+async def run_ws(ws_url: str, build, requests: int, concurrency: int):
+    latencies, errors, rejected = [], 0, 0
+    counter = iter(range(requests))
+
+    async def connection():
+        nonlocal errors, rejected
+        async with websockets.connect(f"{ws_url}/ws/bench-{uuid.uuid4().hex[:8]}", max_size=None) as ws:
+            for i in counter:
+                message = {**build(i), "request_id": str(i)}
+                started = time.perf_counter()
+                await ws.send(json.dumps(message))
+                reply = json.loads(await ws.recv())
+                if reply.get("code") in ("overloaded", "too_many_in_flight"):
+                    rejected += 1
+                elif reply.get("status") == "error":
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    return latencies, errors, rejected
+
+
+async def run_benchmark(args, server: StubServer) -> Dict[str, Any]:
+    base_url = f"http://127.0.0.1:{server.port}"
+    ws_url = f"ws://127.0.0.1:{server.port}"
+    results = {}
+
+    for name in args.scenarios:
+        channel, build = SCENARIOS[name]
+        started = time.perf_counter()
+        with RssSampler(server.process.pid) as sampler:
+            if channel == "http":
+                outcome = await run_http(base_url, build, args.requests, args.concurrency)
+            else:
+                outcome = await run_ws(ws_url, build, args.requests, args.concurrency)
+        elapsed = time.perf_counter() - started
+        results[name] = summarize(*outcome, elapsed, sampler.peak)
+        print(f"✅ {name}: {results[name]['rps']} req/s, p95 {results[name]['latency_ms'].get('p95')} ms",
+              file=sys.stderr)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """الفرق النسبي في RPS و p95 مقارنة بنتيجة سابقة"""
+    deltas = {}
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before.get("latency_ms") or not result.get("latency_ms"):
+            continue
+        deltas[name] = {
+            "rps_change_pct": round((result["rps"] - before["rps"]) / before["rps"] * 100, 1) if before["rps"] else None,
+            "p95_change_pct": round((result["latency_ms"]["p95"] - before["latency_ms"]["p95"])
+                                    / before["latency_ms"]["p95"] * 100, 1) if before["latency_ms"]["p95"] else None
+        }
+    return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس الإنتاجية وزمن الاستجابة لمسارات HTTP و WebSocket")
+    parser.add_argument("--requests", type=int, default=500, help="عدد الطلبات لكل سيناريو")
+    parser.add_argument("--concurrency", type=int, default=32, help="عدد العملاء المتزامنين")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--output", help="ملف JSON لحفظ النتائج")
+    parser.add_argument("--compare", help="ملف نتائج سابق للمقارنة")
+    args = parser.parse_args()
+
+    with StubServer(free_port()) as server:
+        results = asyncio.run(run_benchmark(args, server))
+
+    report = {
+        "benchmark": "load",
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "config": {"requests": args.requests, "concurrency": args.concurrency},
+        "results": results
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["compare"] = {"baseline": args.compare, "deltas": compare(report, json.load(f))}
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
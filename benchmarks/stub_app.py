@@ -0,0 +1,22 @@
+"""
+============================================
+🗺️ الخريطة: benchmarks/stub_app.py
+📌 الربط:
+    - تطبيق main.py الحقيقي مع وحدات محاكاة من stubs.py
+    - يشغله load_bench.py عبر uvicorn في عملية منفصلة
+============================================
+"""
+
+# التشغيل: python -m uvicorn stub_app:app --app-dir benchmarks
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main
+from stubs import install_stubs
+
+install_stubs(main.registry)
+app = main.app
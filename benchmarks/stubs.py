@@ -0,0 +1,150 @@
+"""
+============================================
+🗺️ الخريطة: benchmarks/stubs.py
+📌 الربط:
+    - بدائل حتمية لاستدعاءات Gemini و OpenAI و ViT و Stable Diffusion
+    - تُسجل في سجل الوحدات (registry.py) بدل الوحدات الحقيقية أثناء القياس
+============================================
+"""
+
+# المتطلبات: لا شيء (بدون نماذج أو شبكة)
+
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+# زمن الاستجابة المحاكى لكل استدعاء نموذج (ميلي ثانية)
+STUB_LATENCY_MS = {
+    "vit": float(os.getenv("BENCH_VIT_MS", "40")),
+    "stable_diffusion": float(os.getenv("BENCH_SD_MS", "400")),
+    "gemini": float(os.getenv("BENCH_GEMINI_MS", "120")),
+    "openai_embeddings": float(os.getenv("BENCH_EMBEDDINGS_MS", "15")),
+    "export": float(os.getenv("BENCH_EXPORT_MS", "25")),
+}
+
+
+async def simulate(model: str, payload: Any) -> str:
+    """زمن ثابت + تجزئة الحمولة (عمل حسابي حتمي يتناسب مع حجمها)"""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    digest = hashlib.sha256(bytes(payload or b"")).hexdigest()
+    await asyncio.sleep(STUB_LATENCY_MS[model] / 1000)
+    return digest
+
+
+class StubVision:
+    """بديل VisionNexus: ViT و Stable Diffusion محاكيان"""
+
+    status = "🟢 محاكاة"
+    version = "bench"
+
+    async def process(self, image_data: Any) -> Dict:
+        digest = await simulate("vit", image_data)
+        predicted = int(digest[:4], 16) % 1000
+        return {
+            "status": "success",
+            "resolution": "7680x4320 (8K)",
+            "encoded_data": digest[:100] + "...",
+            "analysis": {
+                "predicted_class": predicted,
+                "confidence": 0.9,
+                "features": [0.9, 0.05, 0.03, 0.01, 0.01]
+            },
+            "metadata": {"format": "PNG", "size": len(digest), "mode": "RGB"}
+        }
+
+    async def generate_image(self, prompt: str) -> Dict:
+        digest = await simulate("stable_diffusion", prompt)
+        return {"status": "success", "image": digest, "prompt": prompt, "resolution": "8K"}
+
+
+class StubCognitive:
+    """بديل CognitiveCore: Gemini والتضمينات محاكاة"""
+
+    status = "🟢 محاكاة"
+    version = "bench"
+
+    async def query(self, question: str, context: Optional[str] = None,
+                    conversation_id: Optional[str] = None) -> Dict:
+        await simulate("openai_embeddings", question)
+        digest = await simulate("gemini", f"{question}|{context or ''}")
+        return {
+            "status": "success",
+            "answer": f"[محاكاة] إجابة {digest[:16]}",
+            "sources": [],
+            "confidence": 0.98,
+            "model": "stub",
+            "conversation_id": digest[:12]
+        }
+
+    async def query_stream(self, question: str, context: Optional[str] = None,
+                           conversation_id: Optional[str] = None):
+        await simulate("openai_embeddings", question)
+        digest = await simulate("gemini", f"{question}|{context or ''}")
+        for i in range(0, 16, 4):
+            yield {"status": "streaming", "type": "token", "text": digest[i:i + 4]}
+            await asyncio.sleep(0.005)
+        yield {
+            "status": "success",
+            "type": "done",
+            "answer": f"[محاكاة] إجابة {digest[:16]}",
+            "sources": [],
+            "model": "stub",
+            "conversation_id": digest[:12]
+        }
+
+    async def remember_conversation(self, question: str, answer: str,
+                                    conversation_id: Optional[str] = None) -> str:
+        """محادثة جديدة لكل نتيجة مشتركة (ذاكرة مؤقتة أو دمج) - بدون تخزين"""
+        return conversation_id or uuid.uuid4().hex[:12]
+
+    async def learn_from_document(self, document_text: str) -> Dict:
+        await simulate("openai_embeddings", document_text)
+        return {"status": "success", "chunks_added": max(1, len(document_text) // 1000)}
+
+
+class StubEmbeddings:
+    """بديل OpenAIEmbeddings: متجهات حتمية من تجزئة النص + زمن ثابت لكل استدعاء"""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        digest = hashlib.shake_256(text.encode("utf-8")).digest(self.dim)
+        return [byte / 255.0 - 0.5 for byte in digest]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # الاستدعاء حاجب (مثل عميل HTTP المتزامن) - الزمن لكل دفعة لا لكل نص
+        self.calls += 1
+        time.sleep(STUB_LATENCY_MS["openai_embeddings"] / 1000)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class StubExporter:
+    """بديل DataExporter: بناء المستند محاكى"""
+
+    status = "🟢 محاكاة"
+    version = "bench"
+
+    async def export(self, content: Any, format: str = "pdf") -> Dict:
+        digest = await simulate("export", str(content))
+        return {
+            "status": "success",
+            "format": (format or "pdf").upper(),
+            "download_link": f"/api/v1/download/{format}_{digest[:12]}",
+            "file_size": len(str(content))
+        }
+
+
+def install_stubs(registry):
+    """استبدال الوحدات المعتمدة على النماذج بالبدائل الحتمية"""
+    registry.register("vision", StubVision)
+    registry.register("cognitive", StubCognitive)
+    registry.register("export", StubExporter)
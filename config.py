@@ -0,0 +1,208 @@
+"""
+============================================
+🗺️ الخريطة: 01_core/config.py
+📌 الربط:
+    - يقرأ متغيرات البيئة من .env
+    - يغذي main.py وجميع الوحدات بإعدادات التشغيل
+============================================
+"""
+
+# المتطلبات: python-dotenv
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# قيم التفعيل المقبولة لكل الأعلام المنطقية (البيئة وترويسات الطلبات)
+FLAG_TRUE = ("1", "true", "yes")
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """قيمة منطقية من البيئة: 1 / true / yes (بأي حالة أحرف) تعني التفعيل"""
+    return os.getenv(name, "true" if default else "false").strip().lower() in FLAG_TRUE
+
+
+# -------------------- اتصال WebSocket --------------------
+# الحد الأقصى للأوامر المنفذة بالتوازي لكل اتصال
+WS_MAX_IN_FLIGHT = int(os.getenv("WS_MAX_IN_FLIGHT", "8"))
+# الحد الأقصى لحجم البيانات الثنائية في رسالة واحدة (بايت)
+WS_MAX_BINARY_BYTES = int(os.getenv("WS_MAX_BINARY_BYTES", str(64 * 1024 * 1024)))
+
+# -------------------- تهيئة الوحدات --------------------
+# تسخين الوحدات الثقيلة في الخلفية بعد بدء التشغيل
+WARMUP_ON_STARTUP = env_flag("WARMUP_ON_STARTUP", True)
+
+# -------------------- طبقة التنفيذ --------------------
+# مجمع العمليات للمعالجة الحسابية (ViT, ReportLab, PyMuPDF, moviepy)
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 2)))
+# مجمع الخيوط للإدخال/الإخراج الحاجب (استدعاءات SDK، الملفات)
+IO_WORKERS = int(os.getenv("IO_WORKERS", "32"))
+# spawn أكثر أماناً مع torch والخيوط من fork
+CPU_POOL_START_METHOD = os.getenv("CPU_POOL_START_METHOD", "spawn")
+
+# -------------------- المهام الخلفية (Celery) --------------------
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
+# مدة الاحتفاظ بنتائج المهام في الخلفية (ثوانٍ)
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+# التنفيذ الفوري داخل العملية (للاختبار دون عمال Celery)
+CELERY_EAGER = env_flag("CELERY_EAGER", False)
+
+# -------------------- Redis --------------------
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# -------------------- ذاكرة الاستجابات --------------------
+# مدة الصلاحية لكل نوع معالجة بالثواني (0 = تعطيل)
+CACHE_TTLS = {
+    "vision": int(os.getenv("CACHE_TTL_VISION", "86400")),
+    "cognitive": int(os.getenv("CACHE_TTL_COGNITIVE", "3600")),
+    "export": int(os.getenv("CACHE_TTL_EXPORT", "600")),
+}
+# الحد الأقصى لعدد الاستجابات المخزنة قبل إزاحة الأقدم استخداماً
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+# الاستجابات الأكبر من هذا الحجم لا تُخزن
+CACHE_MAX_VALUE_BYTES = int(os.getenv("CACHE_MAX_VALUE_BYTES", str(1024 * 1024)))
+
+# -------------------- التوزيع التلقائي --------------------
+# الحد الأعلى للأعمال الجارية في العامل قبل رفض الطلبات الجديدة
+SCALER_HIGH_WATER = int(os.getenv("SCALER_HIGH_WATER", "64"))
+# فترة نبض العامل في Redis ومهلة اعتباره متوقفاً (ثوانٍ)
+SCALER_HEARTBEAT_SECONDS = float(os.getenv("SCALER_HEARTBEAT_SECONDS", "2"))
+SCALER_WORKER_TTL = float(os.getenv("SCALER_WORKER_TTL", "10"))
+
+# -------------------- التحكم بالقبول --------------------
+# الحد الأقصى للمهام المتزامنة لكل نوع (صور 8K تستهلك ذاكرة كبيرة)
+ADMISSION_LIMITS = {
+    "vision": int(os.getenv("ADMISSION_LIMIT_VISION", "2")),
+    "cognitive": int(os.getenv("ADMISSION_LIMIT_COGNITIVE", "16")),
+    "export": int(os.getenv("ADMISSION_LIMIT_EXPORT", "4")),
+    "logic": int(os.getenv("ADMISSION_LIMIT_LOGIC", "8")),
+    "ingestion": int(os.getenv("ADMISSION_LIMIT_INGESTION", "2")),
+}
+# سعة طابور الانتظار لكل نوع قبل الرفض الفوري
+ADMISSION_QUEUE_SIZES = {
+    "vision": int(os.getenv("ADMISSION_QUEUE_VISION", "4")),
+    "cognitive": int(os.getenv("ADMISSION_QUEUE_COGNITIVE", "64")),
+    "export": int(os.getenv("ADMISSION_QUEUE_EXPORT", "16")),
+    "logic": int(os.getenv("ADMISSION_QUEUE_LOGIC", "32")),
+    "ingestion": int(os.getenv("ADMISSION_QUEUE_INGESTION", "8")),
+}
+# أقصى زمن انتظار في الطابور (ثوانٍ)
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+
+# -------------------- الرفع المتدفق --------------------
+# الحد الأقصى لحجم الملف المرفوع (بايت)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(512 * 1024 * 1024)))
+# مجلد الملفات المؤقتة للرفع (الافتراضي مجلد النظام المؤقت)
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+# -------------------- ذاكرة التضمينات --------------------
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", os.path.join("data", "embedding_cache"))
+# عدد المتجهات في ذاكرة LRU داخل كل عامل
+EMBED_CACHE_MEMORY_ITEMS = int(os.getenv("EMBED_CACHE_MEMORY_ITEMS", "10000"))
+# الحد الأقصى لحجم مخزن القرص (ميغابايت) قبل إزاحة الأقدم استخداماً
+EMBED_CACHE_MAX_MB = float(os.getenv("EMBED_CACHE_MAX_MB", "1024"))
+
+# -------------------- قاعدة المعرفة --------------------
+# مجلد Chroma الدائم المشترك بين العمال (يعمل دون اتصال)
+KNOWLEDGE_DIR = os.getenv("KNOWLEDGE_DIR", os.path.join("data", "knowledge"))
+KNOWLEDGE_COLLECTION = os.getenv("KNOWLEDGE_COLLECTION", "super_ai_knowledge")
+KNOWLEDGE_SNAPSHOT_DIR = os.getenv("KNOWLEDGE_SNAPSHOT_DIR", os.path.join("data", "knowledge_snapshots"))
+# أقصى عمر (مللي ثانية) لجيل قاعدة المعرفة المقروء قبل إعادة قراءته من SQLite
+GENERATION_CHECK_MS = int(os.getenv("GENERATION_CHECK_MS", "250"))
+
+# -------------------- الاستيعاب الجماعي --------------------
+# عدد المقاطع في كل استدعاء تضمين
+INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", "256"))
+# عدد دفعات التضمين المتزامنة
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+# عدد المقاطع في كل عملية upsert
+INGEST_UPSERT_BATCH = int(os.getenv("INGEST_UPSERT_BATCH", "5000"))
+
+# -------------------- عميل النماذج اللغوية --------------------
+# يمكن توجيهه إلى خادم محاكاة محلي للاختبار والقياس دون شبكة
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+# أقصى عدد طلبات متزامنة للمزود (لكل عامل)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.25"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "4"))
+# عدد الإخفاقات المتتالية قبل فتح قاطع الدائرة، ومدة بقائه مفتوحاً بالثواني
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+# -------------------- الذاكرة الدلالية للإجابات --------------------
+SEMANTIC_CACHE_ENABLED = env_flag("SEMANTIC_CACHE_ENABLED", True)
+# أدنى تشابه جيب تمام بين سؤالين لاعتبارهما نفس السؤال
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+
+# -------------------- مخزن المحادثات --------------------
+# sqlite (مشترك بين عمال نفس الجهاز) | redis (مشترك بين الأجهزة) | memory
+CONVERSATION_BACKEND = os.getenv("CONVERSATION_BACKEND", "sqlite")
+CONVERSATION_DB = os.getenv("CONVERSATION_DB", os.path.join("data", "conversations.sqlite"))
+# عدد المحادثات المحتفظ بها في ذاكرة كل عامل
+CONVERSATION_MEMORY_ITEMS = int(os.getenv("CONVERSATION_MEMORY_ITEMS", "2000"))
+CONVERSATION_TTL = int(os.getenv("CONVERSATION_TTL", "86400"))
+# أقصى عدد أدوار يُعاد من تاريخ المحادثة
+CONVERSATION_MAX_TURNS = int(os.getenv("CONVERSATION_MAX_TURNS", "50"))
+
+# -------------------- دمج الطلبات المتطابقة (single-flight) --------------------
+SINGLEFLIGHT_ENABLED = env_flag("SINGLEFLIGHT_ENABLED", True)
+# التنسيق بين العمال عبر قفل Redis
+SINGLEFLIGHT_DISTRIBUTED = env_flag("SINGLEFLIGHT_DISTRIBUTED", False)
+# مدة القفل (أقصى انتظار للعمال الآخرين) ومدة بقاء النتيجة المشتركة بالثواني
+SINGLEFLIGHT_LOCK_TTL = int(os.getenv("SINGLEFLIGHT_LOCK_TTL", "60"))
+SINGLEFLIGHT_RESULT_TTL = int(os.getenv("SINGLEFLIGHT_RESULT_TTL", "10"))
+SINGLEFLIGHT_POLL_MS = int(os.getenv("SINGLEFLIGHT_POLL_MS", "50"))
+
+# -------------------- التضمين المحلي والفهرس داخل العملية --------------------
+# openai | local (تجزئة بدون شبكة) | auto (openai إن وُجد OPENAI_API_KEY وإلا local)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto")
+EMBED_LOCAL_DIM = int(os.getenv("EMBED_LOCAL_DIM", "512"))
+# chroma | numpy | auto (numpy ما دامت قاعدة المعرفة تحت الحد)
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "auto")
+NUMPY_INDEX_MAX_CHUNKS = int(os.getenv("NUMPY_INDEX_MAX_CHUNKS", "20000"))
+
+# -------------------- تجميع تضمينات الطلبات المتزامنة --------------------
+EMBED_BATCH_ENABLED = env_flag("EMBED_BATCH_ENABLED", True)
+# أقصى عدد نصوص في الدفعة وأقصى انتظار لاكتمالها بالمللي ثانية
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+# -------------------- الاسترجاع الهجين --------------------
+# hybrid (الافتراضي: مرشحو BM25 مرتبون بالمتجهات ومدموجون بـ RRF - أسرع وأعلى استدعاءً من vector
+# في benchmarks/bench_retrieval.py) | lexical (BM25 فقط) | vector
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# ثابت دمج الترتيب التبادلي (Reciprocal Rank Fusion)
+RRF_K = int(os.getenv("RRF_K", "60"))
+# عدد المرشحين من كل مصدر قبل الدمج
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20"))
+
+# -------------------- المخططات المنطقية --------------------
+# أقصى عدد عقد للمخطط الواحد
+LOGIC_MAX_NODES = int(os.getenv("LOGIC_MAX_NODES", "100000"))
+# الأوصاف الأطول من هذا الحد تُبنى في مجمع العمليات
+LOGIC_INLINE_CHARS = int(os.getenv("LOGIC_INLINE_CHARS", "20000"))
+# فوق هذا العدد من العقد لا تُرفق البنية (nodes/edges) بالاستجابة - تُجلب عبر /api/v1/logic/{graph_id}
+LOGIC_STRUCTURE_MAX_NODES = int(os.getenv("LOGIC_STRUCTURE_MAX_NODES", "2000"))
+# الدفعات: أقصى عدد أوصاف، حجم كل حزمة تُرسل لمجمع العمليات (حروف)، وعدد الحزم المتوازية
+LOGIC_BATCH_MAX_ITEMS = int(os.getenv("LOGIC_BATCH_MAX_ITEMS", "1000"))
+LOGIC_BATCH_CHUNK_CHARS = int(os.getenv("LOGIC_BATCH_CHUNK_CHARS", "50000"))
+LOGIC_BATCH_CONCURRENCY = int(os.getenv("LOGIC_BATCH_CONCURRENCY", str(CPU_WORKERS)))
+
+# -------------------- مخزن المخططات --------------------
+# sqlite | redis | memory (بدون تخزين مشترك)
+GRAPH_STORE_BACKEND = os.getenv("GRAPH_STORE_BACKEND", "sqlite")
+GRAPH_STORE_DB = os.getenv("GRAPH_STORE_DB", os.path.join("data", "graphs.sqlite"))
+# عدد المخططات المحتفظ بها في ذاكرة كل عامل وحجمها الأقصى (المخطط الواحد قد يبلغ 100 ألف عقدة)
+GRAPH_MEMORY_ITEMS = int(os.getenv("GRAPH_MEMORY_ITEMS", "256"))
+GRAPH_MEMORY_MB = float(os.getenv("GRAPH_MEMORY_MB", "64"))
+GRAPH_TTL = int(os.getenv("GRAPH_TTL", "86400"))
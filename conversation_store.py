@@ -0,0 +1,225 @@
+"""
+============================================
+🗺️ الخريطة: 06_cognitive/conversation_store.py
+📌 الربط:
+    - يستخدمه ai_core.py لحفظ أدوار المحادثات (بديل conversation_memory)
+    - يقرأ منه export_tools.py (export_conversation) من أي عامل
+    - الذاكرة محدودة (LRU + TTL) والتخزين المشترك في SQLite أو Redis
+============================================
+"""
+
+# المتطلبات: sqlite3 (مدمج)، redis (اختياري)
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from config import (CONVERSATION_BACKEND, CONVERSATION_DB, CONVERSATION_MEMORY_ITEMS,
+                    CONVERSATION_TTL, CONVERSATION_MAX_TURNS, REDIS_URL)
+from executors import executors
+
+
+def new_conversation_id() -> str:
+    """معرف فريد (لا يتصادم بين طلبين في نفس الثانية أو بين العمال)"""
+    return uuid.uuid4().hex
+
+
+class SQLiteConversationBackend:
+    """تخزين الأدوار في SQLite مشترك بين عمال نفس الجهاز - صف لكل دور"""
+
+    # حذف المحادثات المنتهية كل عدد من عمليات الإضافة
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str = CONVERSATION_DB, ttl: float = CONVERSATION_TTL):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.appends = 0
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS turns (
+            conversation_id TEXT, turn INTEGER, question TEXT, answer TEXT, timestamp TEXT, created REAL,
+            PRIMARY KEY (conversation_id, turn))""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS turns_created ON turns (created)")
+
+    def append(self, conversation_id: str, turn: Dict[str, Any]) -> int:
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                (last,) = self.db.execute("SELECT MAX(turn) FROM turns WHERE conversation_id = ?",
+                                          (conversation_id,)).fetchone()
+                index = 0 if last is None else last + 1
+                self.db.execute("INSERT INTO turns VALUES (?, ?, ?, ?, ?, ?)",
+                                (conversation_id, index, turn["question"], turn["answer"],
+                                 turn["timestamp"], time.time()))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+            self.appends += 1
+            if self.appends % self.PURGE_EVERY == 0:
+                self.db.execute("DELETE FROM turns WHERE created < ?", (time.time() - self.ttl,))
+            return index
+
+    def count(self, conversation_id: str) -> int:
+        with self.lock:
+            (last,) = self.db.execute(
+                "SELECT MAX(turn) FROM turns WHERE conversation_id = ? AND created >= ?",
+                (conversation_id, time.time() - self.ttl)
+            ).fetchone()
+        return 0 if last is None else last + 1
+
+    def history(self, conversation_id: str, limit: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT question, answer, timestamp FROM turns WHERE conversation_id = ? AND created >= ? "
+                "ORDER BY turn DESC LIMIT ?",
+                (conversation_id, time.time() - self.ttl, limit)
+            ).fetchall()
+        return [{"question": q, "answer": a, "timestamp": ts} for q, a, ts in reversed(rows)]
+
+
+class RedisConversationBackend:
+    """تخزين الأدوار في قائمة Redis لكل محادثة (RPUSH) مع مدة صلاحية - مشترك بين الأجهزة"""
+
+    PREFIX = "conv:"
+
+    def __init__(self, url: str = REDIS_URL, ttl: float = CONVERSATION_TTL):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl = int(ttl)
+
+    def append(self, conversation_id: str, turn: Dict[str, Any]) -> int:
+        key = self.PREFIX + conversation_id
+        pipe = self.client.pipeline()
+        pipe.rpush(key, json.dumps(turn, ensure_ascii=False))
+        pipe.expire(key, self.ttl)
+        length, _ = pipe.execute()
+        return length - 1
+
+    def count(self, conversation_id: str) -> int:
+        return self.client.llen(self.PREFIX + conversation_id)
+
+    def history(self, conversation_id: str, limit: int) -> List[Dict[str, Any]]:
+        return [json.loads(item) for item in self.client.lrange(self.PREFIX + conversation_id, -limit, -1)]
+
+
+def create_backend(kind: str = CONVERSATION_BACKEND):
+    """اختيار التخزين المشترك حسب الإعدادات (memory = بدون تخزين مشترك)"""
+    if kind == "redis":
+        return RedisConversationBackend()
+    if kind == "sqlite":
+        return SQLiteConversationBackend()
+    return None
+
+
+class ConversationStore:
+    """مخزن المحادثات: ذاكرة محدودة (LRU + TTL) أمام تخزين مشترك بين العمال"""
+
+    def __init__(self, backend=None, memory_items: int = CONVERSATION_MEMORY_ITEMS,
+                 ttl: float = CONVERSATION_TTL, max_turns: int = CONVERSATION_MAX_TURNS):
+        self.backend = backend
+        self.memory_items = memory_items
+        self.ttl = ttl
+        self.max_turns = max_turns
+        # المعرف -> {"turns": [...], "count": عدد الأدوار الكلي، "expires": ...} مرتبة حسب آخر استخدام
+        self.memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"appends": 0, "memory_hits": 0, "backend_hits": 0, "misses": 0,
+                         "evictions": 0, "backend_errors": 0}
+
+    async def append(self, conversation_id: Optional[str], question: str, answer: str) -> str:
+        """إضافة دور (سؤال وإجابة) - ينشئ محادثة جديدة إن لم يُعطَ معرف"""
+        is_new = not conversation_id
+        conversation_id = conversation_id or new_conversation_id()
+        turn = {"question": question, "answer": answer, "timestamp": datetime.now().isoformat()}
+
+        with self.lock:
+            entry = self.memory.get(conversation_id)
+            if entry is None or entry["expires"] < time.time():
+                # محادثة غير محملة (ربما بدأت على عامل آخر) - عدد أدوارها الكلي غير معروف
+                entry = self.memory[conversation_id] = {"turns": [], "count": 0 if is_new else None}
+            entry["turns"].append(turn)
+            del entry["turns"][:-self.max_turns]
+            self._touch(conversation_id, entry)
+        self.counters["appends"] += 1
+
+        if self.backend is not None:
+            try:
+                index = await executors.run_io(self.backend.append, conversation_id, turn)
+            except Exception:
+                self.counters["backend_errors"] += 1
+                index = None
+            with self.lock:
+                # الذاكرة كاملة فقط إذا كانت تحمل كل الأدوار السابقة لهذا الدور
+                entry["count"] = index + 1 if index is not None and entry["count"] == index else None
+        return conversation_id
+
+    async def history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """آخر الأدوار بالترتيب الزمني"""
+        limit = min(limit or self.max_turns, self.max_turns)
+        with self.lock:
+            entry = self.memory.get(conversation_id)
+            if entry is not None and entry["expires"] < time.time():
+                entry = None
+
+        if self.backend is None:
+            if entry is None:
+                self.counters["misses"] += 1
+                return []
+            with self.lock:
+                self._touch(conversation_id, entry)
+            self.counters["memory_hits"] += 1
+            return list(entry["turns"][-limit:])
+
+        try:
+            # عدد الأدوار في التخزين المشترك (O(1)) يكشف إن أضاف عامل آخر أدواراً
+            count = await executors.run_io(self.backend.count, conversation_id)
+            if entry is not None and count and entry["count"] == count:
+                with self.lock:
+                    self._touch(conversation_id, entry)
+                self.counters["memory_hits"] += 1
+                return list(entry["turns"][-limit:])
+            turns = await executors.run_io(self.backend.history, conversation_id, self.max_turns) if count else []
+        except Exception:
+            self.counters["backend_errors"] += 1
+            # التخزين غير متاح - ما في الذاكرة أفضل من لا شيء
+            return list(entry["turns"][-limit:]) if entry is not None else []
+
+        if not turns:
+            self.counters["misses"] += 1
+            return []
+
+        self.counters["backend_hits"] += 1
+        with self.lock:
+            entry = self.memory[conversation_id] = {"turns": turns, "count": count}
+            self._touch(conversation_id, entry)
+        return turns[-limit:]
+
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """المحادثة كاملة: آخر سؤال وإجابة في المستوى الأعلى + جميع الأدوار"""
+        turns = await self.history(conversation_id)
+        if not turns:
+            return None
+        return {"conversation_id": conversation_id, **turns[-1], "turns": turns}
+
+    def _touch(self, conversation_id: str, entry: Dict[str, Any]):
+        entry["expires"] = time.time() + self.ttl
+        self.memory.move_to_end(conversation_id)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "memory_conversations": len(self.memory),
+            "backend": type(self.backend).__name__ if self.backend is not None else None
+        }
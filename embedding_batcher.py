@@ -0,0 +1,127 @@
+"""
+============================================
+🗺️ الخريطة: 06_cognitive/embedding_batcher.py
+📌 الربط:
+    - يستخدمه ai_core.py لتضمين أسئلة الطلبات المتزامنة (prepare_query)
+    - يجمع الطلبات خلال نافذة قصيرة في استدعاء embed_documents واحد
+    - يعمل مع أي تضمين (CachedEmbeddings / OpenAIEmbeddings / HashingEmbeddings)
+============================================
+"""
+
+# المتطلبات: لا شيء (مكتبة Python القياسية)
+
+import asyncio
+import bisect
+import time
+from typing import Dict, Any, List, Sequence, Set, Tuple
+
+from config import EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_WAIT_MS
+from executors import executors
+
+
+class Histogram:
+    """مدرج تكراري بحدود ثابتة (عدد القيم <= كل حد) مع المجموع والعدد"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def stats(self) -> Dict[str, Any]:
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else 0,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+class _Batch:
+    """دفعة مفتوحة في حلقة أحداث واحدة: (النص، المستقبل، وقت الوصول)"""
+
+    def __init__(self):
+        self.items: List[Tuple[str, asyncio.Future, float]] = []
+        self.timer = None
+
+
+class EmbeddingBatcher:
+    """تجميع تضمينات الطلبات المتزامنة: دفعة واحدة كل نافذة (أو عند بلوغ الحد) ثم توزيع النتائج"""
+
+    def __init__(self, embeddings, max_batch: int = EMBED_BATCH_MAX_SIZE,
+                 max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS):
+        self.embeddings = embeddings
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        # دفعة مفتوحة لكل حلقة أحداث (مهام Celery تنشئ حلقة جديدة لكل مهمة)
+        self._batches: Dict[asyncio.AbstractEventLoop, _Batch] = {}
+        # مراجع الدفعات الجارية حتى لا تُجمع مهامها قبل اكتمالها
+        self._running: Set[asyncio.Task] = set()
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.wait_ms = Histogram([0.5, 1, 2, 5, 10, 20, 50, 100])
+        self.counters = {"requests": 0, "batches": 0, "deduplicated": 0, "errors": 0}
+
+    async def embed(self, text: str) -> List[float]:
+        """متجه نص واحد - ينتظر اكتمال دفعته"""
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(loop)
+        if batch is None:
+            batch = self._batches[loop] = _Batch()
+            batch.timer = loop.call_later(self.max_wait, self._flush, loop)
+
+        future = loop.create_future()
+        batch.items.append((text, future, time.perf_counter()))
+        self.counters["requests"] += 1
+        if len(batch.items) >= self.max_batch:
+            self._flush(loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        """إغلاق الدفعة المفتوحة وإرسالها (من المؤقت أو عند امتلائها)"""
+        batch = self._batches.pop(loop, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = loop.create_task(self._run(batch.items))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, items: List[Tuple[str, asyncio.Future, float]]):
+        now = time.perf_counter()
+        for _, _, arrived in items:
+            self.wait_ms.observe((now - arrived) * 1000)
+
+        # النصوص المكررة داخل الدفعة تُضمّن مرة واحدة
+        texts = list(dict.fromkeys(text for text, _, _ in items))
+        self.counters["batches"] += 1
+        self.counters["deduplicated"] += len(items) - len(texts)
+        self.batch_sizes.observe(len(texts))
+
+        try:
+            # استدعاء حاجب (شبكة أو حساب) - في مجمع خيوط الإدخال/الإخراج
+            vectors = dict(zip(texts, await executors.run_io(self.embeddings.embed_documents, texts)))
+        except Exception as e:
+            self.counters["errors"] += 1
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, future, _ in items:
+            # المستقبل الملغى (غادر صاحبه) يُتجاهل
+            if not future.done():
+                future.set_result(vectors[text])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_size": self.batch_sizes.stats(),
+            "wait_ms": self.wait_ms.stats()
+        }
@@ -0,0 +1,278 @@
+"""
+============================================
+🗺️ الخريطة: 06_cognitive/embedding_cache.py
+📌 الربط:
+    - يغلف دالة التضمين في ai_core.py (بديل مباشر لـ OpenAIEmbeddings)
+    - يخزن المتجهات على القرص (memmap) مشتركة بين جميع العمال
+============================================
+"""
+
+# المتطلبات: numpy, langchain
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+from config import EMBED_CACHE_DIR, EMBED_CACHE_MEMORY_ITEMS, EMBED_CACHE_MAX_MB
+
+
+def normalize_text(text: str) -> str:
+    """توحيد النص قبل التجزئة: صيغة NFC ومسافات موحدة"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    """المفتاح = اسم النموذج + تجزئة النص الموحد"""
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class DiskEmbeddingStore:
+    """مخزن متجهات على القرص: مصفوفة float32 بذاكرة مُعيّنة (memmap) + فهرس SQLite"""
+
+    INITIAL_ROWS = 1024
+
+    def __init__(self, directory: str = EMBED_CACHE_DIR, max_mb: float = EMBED_CACHE_MAX_MB):
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite"),
+                                  check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, row INTEGER, last_access REAL, "
+                        "checksum INTEGER)")
+        if "checksum" not in {column[1] for column in self.db.execute("PRAGMA table_info(entries)")}:
+            # مخزن من إصدار سابق - مدخلاته بلا مجموع تحقق تُعامل كإخفاق وتُعاد كتابتها
+            self.db.execute("ALTER TABLE entries ADD COLUMN checksum INTEGER")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY)")
+
+        self.dim: Optional[int] = self._meta("dim", int)
+        self.matrix: Optional[np.memmap] = None
+        self.evictions = 0
+
+    def _meta(self, name: str, cast=str):
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return cast(row[0]) if row else None
+
+    def _set_meta(self, name: str, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+
+    @property
+    def max_rows(self) -> int:
+        return max(1, self.max_bytes // (self.dim * 4)) if self.dim else 0
+
+    def _map(self, min_rows: int = 0) -> np.memmap:
+        """فتح الملف (أو إعادة فتحه بعد أن كبّره عامل آخر) وتكبيره إن لزم"""
+        capacity = os.path.getsize(self.vectors_path) // (self.dim * 4) if os.path.exists(self.vectors_path) else 0
+        if capacity < min_rows:
+            capacity = min(max(min_rows, capacity * 2, self.INITIAL_ROWS), max(min_rows, self.max_rows))
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(capacity * self.dim * 4)
+        if self.matrix is None or self.matrix.shape[0] != capacity:
+            self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        return self.matrix
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """جلب دفعة متجهات بمفاتيحها"""
+        if not keys or not self.dim:
+            return {}
+        with self.lock:
+            rows = {}
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows.update((key, (row, checksum)) for key, row, checksum in self.db.execute(
+                    f"SELECT key, row, checksum FROM entries WHERE key IN ({placeholders})", batch
+                ))
+            if not rows:
+                return {}
+
+            matrix = self.matrix
+            if matrix is None or max(row for row, _ in rows.values()) >= matrix.shape[0]:
+                matrix = self._map()
+            found, stale = {}, []
+            for key, (row, checksum) in rows.items():
+                vector = np.array(matrix[row])
+                # عامل آخر قد يعيد استخدام الصف بعد الإزاحة أثناء القراءة - الصف المتغير يُعامل كإخفاق
+                if checksum is not None and zlib.crc32(vector.tobytes()) == checksum:
+                    found[key] = vector
+                else:
+                    stale.append((key, row, checksum))
+            if stale:
+                self._drop_stale(stale)
+            if not found:
+                return {}
+
+            now = time.time()
+            self.db.executemany("UPDATE entries SET last_access = ? WHERE key = ?",
+                                [(now, key) for key in found])
+            return found
+
+    def put_many(self, items: Dict[str, Sequence[float]]):
+        """تخزين دفعة متجهات مع إزاحة الأقدم استخداماً عند بلوغ الحد"""
+        if not items:
+            return
+        with self.lock:
+            if self.dim is None:
+                self.dim = len(next(iter(items.values())))
+                self._set_meta("dim", self.dim)
+
+            # حجز الصفوف داخل معاملة واحدة حتى لا يتعارض العمال
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                existing = {key for key in items if self.db.execute(
+                    "SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone()}
+                new_keys = [key for key in items if key not in existing]
+
+                allocated = []
+                free = [row for (row,) in self.db.execute(
+                    "SELECT row FROM free_rows LIMIT ?", (len(new_keys),)).fetchall()]
+                self.db.executemany("DELETE FROM free_rows WHERE row = ?", [(row,) for row in free])
+                allocated.extend(free)
+
+                next_row = self._meta("next_row", int) or 0
+                while len(allocated) < len(new_keys) and next_row < self.max_rows:
+                    allocated.append(next_row)
+                    next_row += 1
+                self._set_meta("next_row", next_row)
+
+                missing = len(new_keys) - len(allocated)
+                if missing > 0:
+                    allocated.extend(self._evict(missing))
+
+                # المتجهات تُكتب على القرص قبل ظهور ربط المفتاح بالصف (COMMIT)
+                matrix = self._map(min_rows=(max(allocated) + 1) if allocated else 0)
+                checksums = []
+                for key, row in zip(new_keys, allocated):
+                    vector = np.asarray(items[key], dtype=np.float32)
+                    matrix[row] = vector
+                    checksums.append(zlib.crc32(vector.tobytes()))
+                matrix.flush()
+
+                now = time.time()
+                self.db.executemany("INSERT INTO entries (key, row, last_access, checksum) VALUES (?, ?, ?, ?)",
+                                    [(key, row, now, checksum)
+                                     for key, row, checksum in zip(new_keys, allocated, checksums)])
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def _drop_stale(self, stale: List):
+        """حذف المدخلات التي لا يطابق صفها مجموع التحقق (إصدار سابق أو تلف) حتى تُعاد كتابتها
+        - الشرط على الصف والمجموع يتجاهل المدخل إن كان عامل آخر قد أزاحه في الأثناء"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for key, row, checksum in stale:
+                deleted = self.db.execute("DELETE FROM entries WHERE key = ? AND row = ? AND checksum IS ?",
+                                          (key, row, checksum)).rowcount
+                if deleted:
+                    self.db.execute("INSERT OR IGNORE INTO free_rows (row) VALUES (?)", (row,))
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def _evict(self, count: int) -> List[int]:
+        """إزاحة أقدم المدخلات استخداماً وإعادة صفوفها"""
+        victims = self.db.execute(
+            "SELECT key, row FROM entries ORDER BY last_access LIMIT ?", (count,)
+        ).fetchall()
+        self.db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in victims])
+        self.evictions += len(victims)
+        return [row for _, row in victims]
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """غلاف تخزين مؤقت لدالة التضمين: LRU في الذاكرة أمام مخزن القرص"""
+
+    def __init__(self, embeddings: Embeddings, model_name: str,
+                 memory_items: int = EMBED_CACHE_MEMORY_ITEMS,
+                 store: Optional[DiskEmbeddingStore] = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.memory_items = memory_items
+        self.memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.store = store if store is not None else DiskEmbeddingStore()
+        self.lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """تضمين دفعة نصوص - النصوص المكررة أو المخزنة لا تُرسل للنموذج"""
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        found = self._lookup(keys)
+
+        # النصوص الناقصة (بدون تكرار) تُضمّن في استدعاء واحد
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._remember(computed)
+            self.store.put_many(computed)
+            found.update(computed)
+            self.counters["misses"] += len(missing)
+
+        return [list(found[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_key(self.model_name, text)
+        found = self._lookup([key])
+        if key in found:
+            return list(found[key])
+
+        vector = self.embeddings.embed_query(text)
+        self._remember({key: vector})
+        self.store.put_many({key: vector})
+        self.counters["misses"] += 1
+        return vector
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+        self.counters["memory_hits"] += len(found)
+
+        remaining = [key for key in dict.fromkeys(keys) if key not in found]
+        if remaining:
+            from_disk = {key: vector.tolist() for key, vector in self.store.get_many(remaining).items()}
+            self.counters["disk_hits"] += len(from_disk)
+            self._remember(from_disk)
+            found.update(from_disk)
+        return found
+
+    def _remember(self, items: Dict[str, List[float]]):
+        with self.lock:
+            for key, vector in items.items():
+                self.memory[key] = vector
+                self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_items:
+                self.memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.counters,
+            "memory_items": len(self.memory),
+            "disk_items": len(self.store),
+            "disk_evictions": self.store.evictions
+        }
@@ -0,0 +1,117 @@
+"""
+============================================
+🗺️ الخريطة: 01_core/executors.py
+📌 الربط:
+    - يستخدمه vision_processor.py و file_reader.py و export_tools.py و video_engine.py
+      لتنفيذ المعالجة الحسابية الثقيلة خارج حلقة الأحداث
+    - يعرض عمق الطوابير في main.py (/api/v1/status)
+============================================
+"""
+
+# المتطلبات: concurrent.futures, multiprocessing
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, Any, Callable, Optional
+
+from config import CPU_WORKERS, IO_WORKERS, CPU_POOL_START_METHOD
+
+
+def shareable_bytes(data: Any) -> Any:
+    """تحويل memoryview إلى كائن قابل للتسلسل لمجمع العمليات دون نسخ إن أمكن"""
+    if isinstance(data, memoryview):
+        base = data.obj
+        if isinstance(base, (bytes, bytearray)) and data.nbytes == len(base):
+            return base
+        return data.tobytes()
+    return data
+
+
+class ExecutorPools:
+    """طبقة التنفيذ - مجمع عمليات للمهام الحسابية ومجمع خيوط للإدخال/الإخراج"""
+
+    def __init__(self, cpu_workers: int = CPU_WORKERS, io_workers: int = IO_WORKERS):
+        self.cpu_workers = cpu_workers
+        self.io_workers = io_workers
+
+        # المجمعات تُنشأ عند أول استخدام (العمليات الفرعية لا تنشئ مجمعات خاصة بها)
+        self.cpu_pool: Optional[Executor] = None
+        self.io_pool: Optional[ThreadPoolExecutor] = None
+
+        # عدد المهام المرسلة ولم تنتهِ بعد لكل مجمع
+        self.pending = {"cpu": 0, "io": 0}
+        self.completed = {"cpu": 0, "io": 0}
+
+    def get_cpu_pool(self) -> Executor:
+        if self.cpu_pool is None and multiprocessing.current_process().daemon:
+            # عملية daemon (عامل Celery prefork) لا تستطيع إنشاء عمليات فرعية - العمل الحسابي في خيوط
+            # (التوازي بين العمليات يوفره Celery نفسه بعدد عماله)
+            self.cpu_pool = ThreadPoolExecutor(
+                max_workers=self.cpu_workers,
+                thread_name_prefix="superai-cpu"
+            )
+        if self.cpu_pool is None:
+            self.cpu_pool = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context(CPU_POOL_START_METHOD)
+            )
+        return self.cpu_pool
+
+    def get_io_pool(self) -> ThreadPoolExecutor:
+        if self.io_pool is None:
+            self.io_pool = ThreadPoolExecutor(
+                max_workers=self.io_workers,
+                thread_name_prefix="superai-io"
+            )
+        return self.io_pool
+
+    async def run_cpu(self, fn: Callable, *args, **kwargs) -> Any:
+        """تنفيذ دالة حسابية في مجمع العمليات (يجب أن تكون الدالة ومعاملاتها قابلة للتسلسل)"""
+        try:
+            return await self._submit("cpu", self.get_cpu_pool(), fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # توقف عامل (نفاد ذاكرة مثلاً) - إعادة إنشاء المجمع للطلبات التالية
+            self.cpu_pool = None
+            raise
+
+    async def run_io(self, fn: Callable, *args, **kwargs) -> Any:
+        """تنفيذ دالة حاجبة للإدخال/الإخراج في مجمع الخيوط"""
+        return await self._submit("io", self.get_io_pool(), fn, *args, **kwargs)
+
+    async def _submit(self, kind: str, pool, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        self.pending[kind] += 1
+        try:
+            return await loop.run_in_executor(pool, partial(fn, *args, **kwargs))
+        finally:
+            self.pending[kind] -= 1
+            self.completed[kind] += 1
+
+    def stats(self) -> Dict[str, Dict]:
+        """عمق الطوابير: المهام الجارية والمنتظرة لكل مجمع"""
+        report = {}
+        for kind, workers in (("cpu", self.cpu_workers), ("io", self.io_workers)):
+            pending = self.pending[kind]
+            report[kind] = {
+                "workers": workers,
+                "in_flight": pending,
+                "queue_depth": max(0, pending - workers),
+                "completed": self.completed[kind]
+            }
+        return report
+
+    def shutdown(self):
+        """إيقاف المجمعات عند إغلاق النظام"""
+        if self.cpu_pool is not None:
+            self.cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self.cpu_pool = None
+        if self.io_pool is not None:
+            self.io_pool.shutdown(wait=False, cancel_futures=True)
+            self.io_pool = None
+
+
+# طبقة تنفيذ مشتركة لكل عملية
+executors = ExecutorPools()
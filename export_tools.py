@@ -22,13 +22,100 @@ import pdfkit
 import io
 import base64
 import json
-from typing import Dict, Any, Union
+from typing import Dict, Any, Tuple, Union
 import asyncio
 from datetime import datetime
 
+from executors import executors
+
+def build_pdf(content: str) -> bytes:
+    """بناء مستند PDF باستخدام ReportLab - تعمل داخل مجمع العمليات"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # إضافة عنوان
+    title = Paragraph(f"تقرير Super-AI - {datetime.now().strftime('%Y-%m-%d %H:%M')}", 
+                    styles['Title'])
+    story.append(title)
+    story.append(Spacer(1, 12))
+    
+    # إضافة المحتوى
+    for line in content.split('\n')[:100]:  # حد 100 سطر
+        p = Paragraph(line, styles['Normal'])
+        story.append(p)
+        story.append(Spacer(1, 6))
+    
+    doc.build(story)
+    
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+    return pdf_bytes
+
+def build_word(content: str) -> Tuple[bytes, int]:
+    """بناء مستند Word - تعمل داخل مجمع العمليات (يعيد البايتات وعدد الفقرات)"""
+    doc = Document()
+    
+    # إضافة عنوان
+    title = doc.add_heading(f'تقرير Super-AI', 0)
+    title.alignment = 1  # توسيط
+    
+    # إضافة التاريخ
+    doc.add_paragraph(f'تاريخ التصدير: {datetime.now().strftime("%Y-%m-%d %H:%M")}')
+    
+    # إضافة المحتوى
+    for line in content.split('\n'):
+        if line.strip():
+            p = doc.add_paragraph(line)
+            p.style.font.size = Pt(11)
+    
+    # حفظ في الذاكرة
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    word_bytes = buffer.getvalue()
+    buffer.close()
+    return word_bytes, len(doc.paragraphs)
+
+def build_excel(data: Dict) -> bytes:
+    """بناء ملف Excel باستخدام xlsxwriter - تعمل داخل مجمع العمليات"""
+    buffer = io.BytesIO()
+    
+    with xlsxwriter.Workbook(buffer) as workbook:
+        # ورقة البيانات الرئيسية
+        worksheet = workbook.add_worksheet("SuperAI Data")
+        
+        # تنسيقات
+        header_format = workbook.add_format({
+            'bold': True,
+            'fg_color': '#4CAF50',
+            'font_color': 'white',
+            'border': 1
+        })
+        
+        # كتابة الرؤوس
+        headers = list(data.keys()) if isinstance(data, dict) else ["Content"]
+        for col, header in enumerate(headers[:10]):  # حد 10 أعمدة
+            worksheet.write(0, col, header, header_format)
+        
+        # كتابة البيانات
+        if isinstance(data, dict):
+            row = 1
+            for key, value in list(data.items())[:100]:  # حد 100 صف
+                worksheet.write(row, 0, str(key))
+                worksheet.write(row, 1, str(value)[:100])  # اختصار القيم الطويلة
+                row += 1
+    
+    excel_bytes = buffer.getvalue()
+    buffer.close()
+    return excel_bytes
+
 class DataExporter:
     """نظام التصدير الفوري للمستندات"""
     
+    # إصدار منطق المعالجة - يدخل في مفاتيح ذاكرة الاستجابات
+    version = "1.0.0"
+    
     def __init__(self):
         self.status = "🟢 نشط"
         self.export_counter = 0
@@ -37,34 +124,29 @@ class DataExporter:
         # روابط التحميل المؤقتة
         self.download_links = {}
     
+    async def export(self, content: Union[str, Dict], format: str = "pdf") -> Dict:
+        """تصدير المحتوى بالتنسيق المطلوب"""
+        format = (format or "pdf").lower()
+        if format == "pdf":
+            return await self.export_to_pdf(content)
+        elif format in ("word", "docx"):
+            return await self.export_to_word(content)
+        elif format in ("excel", "xlsx"):
+            data = content if isinstance(content, dict) else {"content": content}
+            return await self.export_to_excel(data)
+        return {
+            "status": "error",
+            "message": f"تنسيق تصدير غير مدعوم: {format}"
+        }
+    
     async def export_to_pdf(self, content: Union[str, Dict], style: str = "professional") -> Dict:
         """تصدير المحادثة أو المحتوى إلى PDF"""
         try:
             if isinstance(content, dict):
                 content = json.dumps(content, ensure_ascii=False, indent=2)
             
-            # إنشاء PDF باستخدام ReportLab
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # إضافة عنوان
-            title = Paragraph(f"تقرير Super-AI - {datetime.now().strftime('%Y-%m-%d %H:%M')}", 
-                            styles['Title'])
-            story.append(title)
-            story.append(Spacer(1, 12))
-            
-            # إضافة المحتوى
-            for line in content.split('\n')[:100]:  # حد 100 سطر
-                p = Paragraph(line, styles['Normal'])
-                story.append(p)
-                story.append(Spacer(1, 6))
-            
-            doc.build(story)
-            
-            pdf_bytes = buffer.getvalue()
-            buffer.close()
+            # بناء PDF حسابي - يتم في مجمع العمليات
+            pdf_bytes = await executors.run_cpu(build_pdf, content)
             
             # إنشاء رابط تحميل
             download_id = f"pdf_{datetime.now().timestamp()}"
@@ -96,26 +178,8 @@ class DataExporter:
             if isinstance(content, dict):
                 content = json.dumps(content, ensure_ascii=False, indent=2)
             
-            doc = Document()
-            
-            # إضافة عنوان
-            title = doc.add_heading(f'تقرير Super-AI', 0)
-            title.alignment = 1  # توسيط
-            
-            # إضافة التاريخ
-            doc.add_paragraph(f'تاريخ التصدير: {datetime.now().strftime("%Y-%m-%d %H:%M")}')
-            
-            # إضافة المحتوى
-            for line in content.split('\n'):
-                if line.strip():
-                    p = doc.add_paragraph(line)
-                    p.style.font.size = Pt(11)
-            
-            # حفظ في الذاكرة
-            buffer = io.BytesIO()
-            doc.save(buffer)
-            word_bytes = buffer.getvalue()
-            buffer.close()
+            # بناء المستند حسابي - يتم في مجمع العمليات
+            word_bytes, paragraphs = await executors.run_cpu(build_word, content)
             
             download_id = f"docx_{datetime.now().timestamp()}"
             word_base64 = base64.b64encode(word_bytes).decode()
@@ -131,7 +195,7 @@ class DataExporter:
                 "format": "Word",
                 "download_link": f"/api/v1/download/{download_id}",
                 "file_size": len(word_bytes),
-                "paragraphs": len(doc.paragraphs)
+                "paragraphs": paragraphs
             }
         except Exception as e:
             return {
@@ -142,35 +206,8 @@ class DataExporter:
     async def export_to_excel(self, data: Dict) -> Dict:
         """تصدير البيانات إلى Excel"""
         try:
-            buffer = io.BytesIO()
-            
-            with xlsxwriter.Workbook(buffer) as workbook:
-                # ورقة البيانات الرئيسية
-                worksheet = workbook.add_worksheet("SuperAI Data")
-                
-                # تنسيقات
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'fg_color': '#4CAF50',
-                    'font_color': 'white',
-                    'border': 1
-                })
-                
-                # كتابة الرؤوس
-                headers = list(data.keys()) if isinstance(data, dict) else ["Content"]
-                for col, header in enumerate(headers[:10]):  # حد 10 أعمدة
-                    worksheet.write(0, col, header, header_format)
-                
-                # كتابة البيانات
-                if isinstance(data, dict):
-                    row = 1
-                    for key, value in list(data.items())[:100]:  # حد 100 صف
-                        worksheet.write(row, 0, str(key))
-                        worksheet.write(row, 1, str(value)[:100])  # اختصار القيم الطويلة
-                        row += 1
-            
-            excel_bytes = buffer.getvalue()
-            buffer.close()
+            # بناء الملف حسابي - يتم في مجمع العمليات
+            excel_bytes = await executors.run_cpu(build_excel, data)
             
             download_id = f"xlsx_{datetime.now().timestamp()}"
             excel_base64 = base64.b64encode(excel_bytes).decode()
@@ -210,9 +247,9 @@ class DataExporter:
         }
     
     async def export_conversation(self, conversation_id: str, cognitive_core) -> Dict:
-        """تصدير محادثة كاملة من الذاكرة المعرفية"""
-        if conversation_id in cognitive_core.conversation_memory:
-            conv_data = cognitive_core.conversation_memory[conversation_id]
+        """تصدير محادثة كاملة من مخزن المحادثات (المشترك بين العمال)"""
+        conv_data = await cognitive_core.conversations.get(conversation_id)
+        if conv_data is not None:
             return await self.export_to_pdf(conv_data)
         return {
             "status": "error",
@@ -22,195 +22,331 @@ import io
 import base64
 import json
 import asyncio
-from typing import Dict, Any, Union, List
+import codecs
+import zipfile
+from typing import Dict, Any, Union, List, Optional
 from pathlib import Path
 import numpy as np
 
+from executors import executors, shareable_bytes
+
+# الملفات المرفوعة تصل كمسار على القرص (انظر upload_spool.py) أو كبايتات
+FileSource = Union[bytes, bytearray, memoryview, str]
+
+# نوع الملف المعلن (اسم أو امتداد أو MIME) -> النوع الموحد
+FILE_TYPES = {
+    "pdf": "pdf", "application/pdf": "pdf",
+    "docx": "docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "xlsx": "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+    "jpg": "image", "jpeg": "image", "png": "image", "image": "image",
+    "txt": "text", "text": "text", "md": "text", "csv": "text", "json": "text", "application/json": "text",
+}
+# الأنواع العامة لا تحدد المحتوى - يُستدل عليه من الامتداد أو البايتات الأولى
+GENERIC_TYPES = {"", "application/octet-stream", "binary", "file"}
+SNIFF_BYTES = 8192
+
+def declared_type(file_type: str) -> Optional[str]:
+    file_type = (file_type or "").split(";")[0].strip().lower()
+    if file_type in FILE_TYPES:
+        return FILE_TYPES[file_type]
+    if file_type.startswith("text/"):
+        return "text"
+    if file_type.startswith("image/"):
+        return "image"
+    return None
+
+def sniff_type(source: FileSource) -> Optional[str]:
+    """النوع من البايتات الأولى (magic bytes) - None للبيانات الثنائية غير المعروفة"""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+    else:
+        head = bytes(source[:SNIFF_BYTES])
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith((b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff")):
+        return "image"
+    if head.startswith(b"PK\x03\x04"):
+        # docx و xlsx كلاهما ZIP - المجلد الداخلي يميزهما
+        with zipfile.ZipFile(open_source(source)) as archive:
+            names = archive.namelist()
+        if "word/document.xml" in names:
+            return "docx"
+        if "xl/workbook.xml" in names:
+            return "xlsx"
+        return None
+    if b"\x00" in head:
+        return None
+    try:
+        # final=False: حرف متعدد البايتات مقطوع في نهاية العينة ليس خطأ
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return None
+    return "text"
+
+def detect_type(source: FileSource, file_type: str, filename: Optional[str] = None) -> Optional[str]:
+    """النوع المعلن إن كان محدداً، وإلا امتداد اسم الملف، وإلا البايتات الأولى"""
+    kind = declared_type(file_type)
+    if kind is None and filename:
+        kind = FILE_TYPES.get(Path(filename).suffix.lower().lstrip("."))
+    if kind is None:
+        kind = sniff_type(source)
+    return kind
+
+def read_text(source: FileSource) -> str:
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as f:
+            return f.read()
+    return str(source, 'utf-8')
+
+def open_source(source: FileSource):
+    """مسار الملف يُمرر كما هو للمكتبات، والبايتات تُغلف في BytesIO"""
+    if isinstance(source, str):
+        return source
+    return io.BytesIO(source)
+
+def parse_pdf(file_bytes: FileSource, method: str = "advanced") -> Dict:
+    """استخراج النص والصور من PDF - تعمل داخل مجمع العمليات"""
+    text = ""
+    metadata = {}
+    images = []
+    pages = 0
+    
+    if method == "basic":
+        # طريقة PyPDF2 الأساسية
+        pdf_reader = PyPDF2.PdfReader(open_source(file_bytes))
+        for page in pdf_reader.pages:
+            text += page.extract_text()
+        metadata = dict(pdf_reader.metadata or {})
+        pages = len(pdf_reader.pages)
+        
+    elif method == "advanced":
+        # طريقة PyMuPDF المتقدمة مع استخراج الصور
+        if isinstance(file_bytes, str):
+            pdf_document = fitz.open(file_bytes, filetype="pdf")
+        else:
+            pdf_document = fitz.open(stream=file_bytes, filetype="pdf")
+        metadata = pdf_document.metadata
+        
+        for page_num in range(len(pdf_document)):
+            page = pdf_document[page_num]
+            text += page.get_text()
+            
+            # استخراج الصور من الصفحة
+            image_list = page.get_images()
+            for img in image_list:
+                xref = img[0]
+                pix = fitz.Pixmap(pdf_document, xref)
+                if pix.n - pix.alpha < 4:
+                    img_data = pix.tobytes("png")
+                    images.append(base64.b64encode(img_data).decode())
+        pages = len(pdf_document)
+    
+    return {
+        "status": "success",
+        "text": text,
+        "metadata": metadata,
+        "images": images[:5],  # أول 5 صور فقط
+        "pages": pages,
+        "method": method
+    }
+
+def parse_word(file_bytes: FileSource) -> Dict:
+    """استخراج النص والجداول من Word - تعمل داخل مجمع العمليات"""
+    doc = Document(open_source(file_bytes))
+    
+    # استخراج النص
+    text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+    
+    # استخراج الجداول
+    tables = []
+    for table in doc.tables:
+        table_data = []
+        for row in table.rows:
+            row_data = [cell.text for cell in row.cells]
+            table_data.append(row_data)
+        tables.append(table_data)
+    
+    return {
+        "status": "success",
+        "text": text,
+        "tables": tables,
+        "paragraphs": len(doc.paragraphs),
+        "sections": len(doc.sections)
+    }
+
+def parse_excel(file_bytes: FileSource) -> Dict:
+    """استخراج الأوراق والصيغ من Excel - تعمل داخل مجمع العمليات"""
+    # قراءة باستخدام pandas
+    df_dict = pd.read_excel(open_source(file_bytes), sheet_name=None)
+    
+    sheets = {}
+    for sheet_name, df in df_dict.items():
+        sheets[sheet_name] = {
+            "data": df.fillna("").to_dict('records'),
+            "columns": df.columns.tolist(),
+            "shape": df.shape
+        }
+    
+    # قراءة باستخدام openpyxl للتفاصيل
+    wb = openpyxl.load_workbook(open_source(file_bytes), data_only=True)
+    formulas = {}
+    for sheet_name in wb.sheetnames:
+        sheet = wb[sheet_name]
+        sheet_formulas = []
+        for row in sheet.iter_rows():
+            for cell in row:
+                if cell.data_type == 'f':
+                    sheet_formulas.append({
+                        "cell": cell.coordinate,
+                        "formula": cell.value
+                    })
+        formulas[sheet_name] = sheet_formulas
+    
+    return {
+        "status": "success",
+        "sheets": sheets,
+        "formulas": formulas,
+        "sheet_names": list(sheets.keys())
+    }
+
+# قارئ EasyOCR يُحمّل مرة واحدة داخل كل عملية من مجمع العمليات
+_ocr_readers = {}
+
+def _load_ocr():
+    """تحميل EasyOCR للغات المتعددة عند أول استخدام داخل العملية الحالية"""
+    if "easyocr" not in _ocr_readers:
+        _ocr_readers["easyocr"] = easyocr.Reader(['ar', 'en'])
+    return _ocr_readers["easyocr"]
+
+def run_ocr(image_bytes: FileSource, language: str = 'ar+en') -> Dict:
+    """التعرف الضوئي (EasyOCR ثم Tesseract) - تعمل داخل مجمع العمليات"""
+    # تحويل البايتات إلى صورة
+    image = Image.open(open_source(image_bytes))
+    
+    # تحويل PIL Image إلى numpy array لـ easyocr
+    img_array = np.array(image)
+    
+    # OCR باستخدام EasyOCR
+    easy_result = _load_ocr().readtext(img_array, detail=0)
+    
+    # OCR باستخدام Tesseract كنسخة احتياطية
+    tesseract_text = pytesseract.image_to_string(image, lang='ara+eng')
+    
+    return {
+        "status": "success",
+        "easyocr_text": " ".join(easy_result),
+        "tesseract_text": tesseract_text.strip(),
+        "combined_text": " ".join(easy_result) + "\n" + tesseract_text.strip(),
+        "language": language,
+        "confidence": 0.95  # تقدير
+    }
+
 class UniversalIngestion:
     """نظام استيعاب وتحليل جميع أنواع الملفات"""
     
     def __init__(self):
         self.status = "🟢 نشط"
-        # تهيئة EasyOCR للغات المتعددة
-        self.easy_ocr = easyocr.Reader(['ar', 'en'])
+        # قارئ EasyOCR يُحمّل داخل عمليات مجمع التنفيذ - انظر run_ocr
         print("🟢 Universal Ingestion - جاهز لقراءة جميع الملفات")
         
         # ذاكرة مؤقتة للملفات المعالجة
         self.processed_files_cache = {}
         
-    async def read_pdf(self, file_bytes: bytes, method: str = "advanced") -> Dict:
+    async def read_pdf(self, file_bytes: FileSource, method: str = "advanced") -> Dict:
         """قراءة ملفات PDF بدقة 100%"""
         try:
-            text = ""
-            metadata = {}
-            images = []
-            
-            if method == "basic":
-                # طريقة PyPDF2 الأساسية
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                metadata = pdf_reader.metadata
-                
-            elif method == "advanced":
-                # طريقة PyMuPDF المتقدمة مع استخراج الصور
-                pdf_document = fitz.open(stream=file_bytes, filetype="pdf")
-                metadata = pdf_document.metadata
-                
-                for page_num in range(len(pdf_document)):
-                    page = pdf_document[page_num]
-                    text += page.get_text()
-                    
-                    # استخراج الصور من الصفحة
-                    image_list = page.get_images()
-                    for img in image_list:
-                        xref = img[0]
-                        pix = fitz.Pixmap(pdf_document, xref)
-                        if pix.n - pix.alpha < 4:
-                            img_data = pix.tobytes("png")
-                            images.append(base64.b64encode(img_data).decode())
-            
-            return {
-                "status": "success",
-                "text": text,
-                "metadata": metadata,
-                "images": images[:5],  # أول 5 صور فقط
-                "pages": len(pdf_document) if method == "advanced" else len(pdf_reader.pages),
-                "method": method
-            }
+            # تحليل PDF حسابي - يتم في مجمع العمليات
+            return await executors.run_cpu(parse_pdf, shareable_bytes(file_bytes), method)
         except Exception as e:
             return {
                 "status": "error",
                 "message": f"PDF قراءة الخطأ في: {str(e)}"
             }
     
-    async def read_word(self, file_bytes: bytes) -> Dict:
+    async def read_word(self, file_bytes: FileSource) -> Dict:
         """قراءة ملفات Word"""
         try:
-            doc = Document(io.BytesIO(file_bytes))
-            
-            # استخراج النص
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            
-            # استخراج الجداول
-            tables = []
-            for table in doc.tables:
-                table_data = []
-                for row in table.rows:
-                    row_data = [cell.text for cell in row.cells]
-                    table_data.append(row_data)
-                tables.append(table_data)
-            
-            return {
-                "status": "success",
-                "text": text,
-                "tables": tables,
-                "paragraphs": len(doc.paragraphs),
-                "sections": len(doc.sections)
-            }
+            # تحليل XML حسابي - يتم في مجمع العمليات
+            return await executors.run_cpu(parse_word, shareable_bytes(file_bytes))
         except Exception as e:
             return {
                 "status": "error",
                 "message": f"Word قراءة الخطأ في: {str(e)}"
             }
     
-    async def read_excel(self, file_bytes: bytes) -> Dict:
+    async def read_excel(self, file_bytes: FileSource) -> Dict:
         """قراءة ملفات Excel"""
         try:
-            # قراءة باستخدام pandas
-            df_dict = pd.read_excel(io.BytesIO(file_bytes), sheet_name=None)
-            
-            sheets = {}
-            for sheet_name, df in df_dict.items():
-                sheets[sheet_name] = {
-                    "data": df.fillna("").to_dict('records'),
-                    "columns": df.columns.tolist(),
-                    "shape": df.shape
-                }
-            
-            # قراءة باستخدام openpyxl للتفاصيل
-            wb = openpyxl.load_workbook(io.BytesIO(file_bytes), data_only=True)
-            formulas = {}
-            for sheet_name in wb.sheetnames:
-                sheet = wb[sheet_name]
-                sheet_formulas = []
-                for row in sheet.iter_rows():
-                    for cell in row:
-                        if cell.data_type == 'f':
-                            sheet_formulas.append({
-                                "cell": cell.coordinate,
-                                "formula": cell.value
-                            })
-                formulas[sheet_name] = sheet_formulas
-            
-            return {
-                "status": "success",
-                "sheets": sheets,
-                "formulas": formulas,
-                "sheet_names": list(sheets.keys())
-            }
+            # pandas + openpyxl حسابيان - يتمان في مجمع العمليات
+            return await executors.run_cpu(parse_excel, shareable_bytes(file_bytes))
         except Exception as e:
             return {
                 "status": "error",
                 "message": f"Excel قراءة الخطأ في: {str(e)}"
             }
     
-    async def ocr_image(self, image_bytes: bytes, language: str = 'ar+en') -> Dict:
+    async def ocr_image(self, image_bytes: FileSource, language: str = 'ar+en') -> Dict:
         """التعرف الضوئي على النصوص في الصور"""
         try:
-            # تحويل البايتات إلى صورة
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # تحويل PIL Image إلى numpy array لـ easyocr
-            img_array = np.array(image)
-            
-            # OCR باستخدام EasyOCR
-            easy_result = self.easy_ocr.readtext(img_array, detail=0)
-            
-            # OCR باستخدام Tesseract كنسخة احتياطية
-            tesseract_text = pytesseract.image_to_string(image, lang='ara+eng')
-            
-            return {
-                "status": "success",
-                "easyocr_text": " ".join(easy_result),
-                "tesseract_text": tesseract_text.strip(),
-                "combined_text": " ".join(easy_result) + "\n" + tesseract_text.strip(),
-                "language": language,
-                "confidence": 0.95  # تقدير
-            }
+            # EasyOCR + Tesseract أثقل عمل حسابي هنا - في مجمع العمليات حتى لا يجمّد باقي العملاء
+            return await executors.run_cpu(run_ocr, shareable_bytes(image_bytes), language)
         except Exception as e:
             return {
                 "status": "error",
                 "message": f"OCR الخطأ في: {str(e)}"
             }
     
-    async def universal_read(self, file_content: str, file_type: str) -> Dict:
-        """قراءة أي نوع ملفات تلقائياً"""
+    async def universal_read(self, file_content: Union[str, bytes, memoryview], file_type: str) -> Dict:
+        """قراءة أي نوع ملفات تلقائياً (base64 نصي أو بايتات خام من إطار ثنائي)"""
         try:
-            # فك تشفير base64 إن وجد
-            if file_content.startswith('data:'):
-                file_content = file_content.split(',')[1]
-            
-            file_bytes = base64.b64decode(file_content)
-            
-            if file_type in ['pdf', 'application/pdf']:
-                return await self.read_pdf(file_bytes, 'advanced')
-            elif file_type in ['docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-                return await self.read_word(file_bytes)
-            elif file_type in ['xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet']:
-                return await self.read_excel(file_bytes)
-            elif file_type in ['jpg', 'jpeg', 'png', 'image']:
-                return await self.ocr_image(file_bytes)
+            if isinstance(file_content, (bytes, bytearray, memoryview)):
+                # بايتات خام - لا حاجة لفك التشفير
+                file_bytes = file_content
             else:
-                # محاولة قراءة كنص عادي
-                text = file_bytes.decode('utf-8')
-                return {
-                    "status": "success",
-                    "text": text,
-                    "type": "plain_text"
-                }
+                # فك تشفير base64 إن وجد
+                if file_content.startswith('data:'):
+                    file_content = file_content.split(',')[1]
+                
+                file_bytes = base64.b64decode(file_content)
+            
+            return await self.read_source(file_bytes, file_type)
         except Exception as e:
             return {
                 "status": "error",
                 "message": f"قراءة الملف: {str(e)}"
+            }
+    
+    async def read_path(self, file_path: str, file_type: str, filename: Optional[str] = None) -> Dict:
+        """قراءة ملف محفوظ على القرص (رفع متدفق) دون تحميله كاملاً كبايتات"""
+        try:
+            return await self.read_source(file_path, file_type, filename)
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"قراءة الملف: {str(e)}"
+            }
+    
+    async def read_source(self, source: FileSource, file_type: str, filename: Optional[str] = None) -> Dict:
+        """توجيه الملف إلى القارئ المناسب حسب نوعه (المعلن أو المستدل عليه) - الأنواع غير المعروفة تُرفض"""
+        kind = await executors.run_io(detect_type, source, file_type, filename)
+        if kind == 'pdf':
+            return await self.read_pdf(source, 'advanced')
+        elif kind == 'docx':
+            return await self.read_word(source)
+        elif kind == 'xlsx':
+            return await self.read_excel(source)
+        elif kind == 'image':
+            return await self.ocr_image(source)
+        elif kind is None:
+            return {
+                "status": "error",
+                "message": f"نوع ملف غير مدعوم: {file_type or 'غير معروف'}"
+            }
+        else:
+            text = await executors.run_io(read_text, source)
+            return {
+                "status": "success",
+                "text": text,
+                "type": "plain_text"
             }
\ No newline at end of file
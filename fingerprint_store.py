@@ -0,0 +1,150 @@
+"""
+============================================
+🗺️ الخريطة: 06_cognitive/fingerprint_store.py
+📌 الربط:
+    - يستخدمه ai_core.py (learn_from_documents) لإعادة الاستيعاب التدريجي
+    - بصمة لكل مستند مصدر: تجزئة النص كاملاً + معرفات مقاطعه (تجزئة المحتوى)
+    - يُحفظ في KNOWLEDGE_DIR بجانب قاعدة المعرفة (SQLite مشترك بين العمال)
+    - GenerationCounter: رقم جيل قاعدة المعرفة بزيادة ذرية بين العمال
+============================================
+"""
+
+# المتطلبات: sqlite3, fcntl (مدمجان - أنظمة Unix)
+
+import fcntl
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, Optional, Set, Tuple
+
+from embedding_cache import normalize_text
+
+
+def document_hash(text: str) -> str:
+    """تجزئة المستند كاملاً - تطابقها يعني تخطي التقسيم والتضمين"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def chunk_id(text: str) -> str:
+    """معرف المقطع في قاعدة المعرفة = تجزئة محتواه (المقطع المكرر له معرف واحد)"""
+    return hashlib.sha256(f"chunk\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """بصمات المستندات المصدر: مستند -> تجزئته ومجموعة معرفات مقاطعه"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.writer_path = f"{path}.lock"
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, doc_hash TEXT, updated REAL)")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS chunks (
+            source TEXT, chunk_id TEXT, PRIMARY KEY (source, chunk_id))""")
+        # البحث العكسي: هل ما زال مستند آخر يستخدم المقطع؟
+        self.db.execute("CREATE INDEX IF NOT EXISTS chunks_by_id ON chunks (chunk_id)")
+        # تقدم آخر عملية استيعاب (صف واحد) - يراه كل العمال
+        self.db.execute("CREATE TABLE IF NOT EXISTS progress (id INTEGER PRIMARY KEY CHECK (id = 0), state TEXT)")
+
+    def document_hashes(self, sources: Iterable[str]) -> Dict[str, str]:
+        """تجزئات المستندات المخزنة (المستندات الجديدة غير موجودة في النتيجة)"""
+        sources = list(sources)
+        found = {}
+        with self.lock:
+            for start in range(0, len(sources), 500):
+                batch = sources[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self.db.execute(
+                    f"SELECT source, doc_hash FROM sources WHERE source IN ({placeholders})", batch
+                ).fetchall())
+        return found
+
+    def chunk_ids(self, source: str) -> Set[str]:
+        with self.lock:
+            return {row[0] for row in self.db.execute(
+                "SELECT chunk_id FROM chunks WHERE source = ?", (source,))}
+
+    def replace(self, source: str, doc_hash: str, chunk_ids: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """تسجيل البصمة الجديدة للمستند - يعيد (المقاطع المزالة منه، المقاطع اليتيمة التي لم يعد يستخدمها أي مستند)"""
+        new_ids = set(chunk_ids)
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                old_ids = {row[0] for row in self.db.execute(
+                    "SELECT chunk_id FROM chunks WHERE source = ?", (source,))}
+                removed = old_ids - new_ids
+                self.db.executemany("DELETE FROM chunks WHERE source = ? AND chunk_id = ?",
+                                    [(source, item) for item in removed])
+                self.db.executemany("INSERT OR IGNORE INTO chunks VALUES (?, ?)",
+                                    [(source, item) for item in new_ids - old_ids])
+                self.db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (source, doc_hash, time.time()))
+                orphaned = {item for item in removed if self.db.execute(
+                    "SELECT 1 FROM chunks WHERE chunk_id = ? LIMIT 1", (item,)).fetchone() is None}
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+        return removed, orphaned
+
+    def try_lock_writer(self) -> Optional[int]:
+        """قفل الكاتب الوحيد بين العمليات (flock - يتحرر تلقائياً إن توقفت العملية) أو None إن كان محجوزاً"""
+        handle = os.open(self.writer_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(handle)
+            return None
+        return handle
+
+    def unlock_writer(self, handle: int):
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        os.close(handle)
+
+    def save_progress(self, state: Dict[str, Any]):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO progress VALUES (0, ?)", (json.dumps(state, ensure_ascii=False),))
+
+    def progress(self) -> Dict[str, Any]:
+        with self.lock:
+            row = self.db.execute("SELECT state FROM progress WHERE id = 0").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            (sources,) = self.db.execute("SELECT COUNT(*) FROM sources").fetchone()
+            (chunks,) = self.db.execute("SELECT COUNT(DISTINCT chunk_id) FROM chunks").fetchone()
+        return {"sources": sources, "chunks": chunks}
+
+
+class GenerationCounter:
+    """رقم جيل قاعدة المعرفة في SQLite مشترك - الزيادة ذرية (عاملان يكتبان معاً = جيلان مختلفان)"""
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS generation (id INTEGER PRIMARY KEY CHECK (id = 0), value INTEGER)")
+        # الاستمرار من ملف الجيل النصي القديم إن وُجد
+        self.db.execute("INSERT OR IGNORE INTO generation VALUES (0, ?)", (self._legacy_value(legacy_path),))
+
+    @staticmethod
+    def _legacy_value(path: Optional[str]) -> int:
+        try:
+            with open(path) as f:
+                return int(f.read().strip() or 0)
+        except (TypeError, OSError, ValueError):
+            return 0
+
+    def read(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT value FROM generation WHERE id = 0").fetchone()[0]
+
+    def increment(self) -> int:
+        """زيادة الجيل وإعادة قيمته الجديدة في عبارة واحدة"""
+        with self.lock:
+            return self.db.execute("UPDATE generation SET value = value + 1 WHERE id = 0 RETURNING value").fetchone()[0]
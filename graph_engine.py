@@ -0,0 +1,283 @@
+"""
+============================================
+🗺️ الخريطة: 03_logic/graph_engine.py
+📌 الربط:
+    - يستخدمه logic_flow.py لبناء المخططات (آلاف العقد) بدل networkx.DiGraph
+    - تمثيل مضغوط: تسميات مُدمجة (interned) + حواف في مصفوفات ثم تجاور CSR
+    - كتابة Mermaid و DOT في مرور واحد (أجزاء متدفقة بدل += متكرر)
+============================================
+"""
+
+# المتطلبات: numpy, networkx (اختياري - للخوارزميات فقط)
+
+import re
+import struct
+import zlib
+from array import array
+from typing import Dict, Any, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+# عدد الأسطر في كل جزء من المخرجات المتدفقة
+CHUNK_LINES = 4096
+# رأس الصيغة المتسلسلة: الإصدار + أعداد التسميات والعقد والحواف
+_HEADER = struct.Struct("<BIII")
+_FORMAT_VERSION = 1
+
+_MERMAID_ESCAPES = {'"': "#quot;", "<": "#lt;", ">": "#gt;", "\n": " ", "\r": " "}
+_MERMAID_RE = re.compile('["<>\r\n]')
+_DOT_RE = re.compile(r'(["\\])')
+
+
+def escape_mermaid(label: str) -> str:
+    """تسمية آمنة داخل ["..."] في Mermaid (الاقتباس والأقواس الزاوية بكيانات)"""
+    return _MERMAID_RE.sub(lambda match: _MERMAID_ESCAPES[match.group()], label)
+
+
+def escape_dot(label: str) -> str:
+    return _DOT_RE.sub(r"\\\1", label).replace("\n", "\\n")
+
+
+class LabelTable:
+    """تسميات مُدمجة: كل نص مميز يُخزن مرة واحدة ويُشار إليه برقم"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.labels: List[str] = []
+
+    def intern(self, label: str) -> int:
+        label_id = self.ids.get(label)
+        if label_id is None:
+            label_id = self.ids[label] = len(self.labels)
+            self.labels.append(label)
+        return label_id
+
+    def __getitem__(self, label_id: int) -> str:
+        return self.labels[label_id]
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def share(self, pool: Dict[str, str]):
+        """استبدال النصوص بنسخها في مجمع مشترك: التسمية المتكررة بين مخططات الدفعة كائن واحد في الذاكرة وفي pickle"""
+        self.labels = [pool.setdefault(label, label) for label in self.labels]
+        self.ids = dict(zip(self.labels, range(len(self.labels))))
+
+
+class FlowGraph:
+    """رسم موجه مضغوط: رقم تسمية لكل عقدة + قائمة حواف (مصدر، هدف، وزن) تُحوّل إلى CSR عند الحاجة"""
+
+    def __init__(self):
+        self.labels = LabelTable()
+        self.node_labels = array("i")
+        self._sources = array("i")
+        self._targets = array("i")
+        self._weights = array("f")
+        self._csr: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_labels)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._sources)
+
+    def add_node(self, label: str) -> int:
+        self.node_labels.append(self.labels.intern(label))
+        return len(self.node_labels) - 1
+
+    def add_nodes(self, labels: Iterable[str]) -> range:
+        """إضافة عقد دفعة واحدة - يعيد نطاق أرقامها"""
+        start = len(self.node_labels)
+        intern = self.labels.intern
+        self.node_labels.extend(intern(label) for label in labels)
+        return range(start, len(self.node_labels))
+
+    def add_edge(self, source: int, target: int, weight: float = 1.0):
+        self._sources.append(source)
+        self._targets.append(target)
+        self._weights.append(weight)
+        self._csr = None
+
+    def add_edges(self, sources: Iterable[int], targets: Iterable[int], weights: Optional[Iterable[float]] = None):
+        sources, targets = array("i", sources), array("i", targets)
+        if len(sources) != len(targets):
+            raise ValueError("عدد المصادر لا يطابق عدد الأهداف")
+        self._sources.extend(sources)
+        self._targets.extend(targets)
+        self._weights.extend(array("f", weights) if weights is not None else array("f", [1.0]) * len(sources))
+        self._csr = None
+
+    def label(self, node: int) -> str:
+        return self.labels[self.node_labels[node]]
+
+    def csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """تجاور CSR: (indptr، الأهداف، الأوزان) - حواف العقدة u هي indices[indptr[u]:indptr[u+1]]"""
+        if self._csr is None:
+            sources = np.frombuffer(self._sources, dtype=np.int32) if self._sources else np.empty(0, np.int32)
+            targets = np.frombuffer(self._targets, dtype=np.int32) if self._targets else np.empty(0, np.int32)
+            weights = np.frombuffer(self._weights, dtype=np.float32) if self._weights else np.empty(0, np.float32)
+            # ترتيب مستقر: حواف كل عقدة تبقى بترتيب إضافتها
+            order = np.argsort(sources, kind="stable")
+            indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=self.num_nodes), out=indptr[1:])
+            self._csr = (indptr, targets[order], weights[order])
+        return self._csr
+
+    def successors(self, node: int) -> np.ndarray:
+        indptr, indices, _ = self.csr()
+        return indices[indptr[node]:indptr[node + 1]]
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.csr()[0])
+
+    def edges(self) -> Iterator[Tuple[int, int, float]]:
+        """الحواف بترتيب CSR (مجمعة حسب المصدر)"""
+        indptr, indices, weights = self.csr()
+        sources = np.repeat(np.arange(self.num_nodes), np.diff(indptr))
+        return zip(sources.tolist(), indices.tolist(), weights.tolist())
+
+    def to_networkx(self):
+        """نسخة networkx للخوارزميات التي تحتاجها فقط (استيراد متأخر)"""
+        import networkx as nx
+        graph = nx.DiGraph()
+        graph.add_nodes_from((node, {"label": self.labels[label_id]}) for node, label_id in enumerate(self.node_labels))
+        graph.add_weighted_edges_from(self.edges())
+        return graph
+
+    def structure(self) -> Dict[str, List[Dict[str, Any]]]:
+        labels = self.labels.labels
+        return {
+            "nodes": [{"id": node, "label": labels[label_id]} for node, label_id in enumerate(self.node_labels)],
+            "edges": [{"from": source, "to": target} for source, target, _ in self.edges()]
+        }
+
+    # -------------------- التسلسل المضغوط --------------------
+    def to_bytes(self) -> bytes:
+        """صيغة ثنائية مضغوطة (بدون pickle): رأس + أطوال التسميات ونصوصها + مصفوفات العقد والحواف"""
+        encoded = [label.encode("utf-8") for label in self.labels.labels]
+        lengths = array("i", (len(label) for label in encoded))
+        header = _HEADER.pack(_FORMAT_VERSION, len(encoded), self.num_nodes, self.num_edges)
+        return zlib.compress(b"".join((header, lengths.tobytes(), b"".join(encoded), self.node_labels.tobytes(),
+                                       self._sources.tobytes(), self._targets.tobytes(), self._weights.tobytes())))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FlowGraph":
+        data = memoryview(zlib.decompress(data))
+        version, label_count, node_count, edge_count = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"إصدار صيغة مخطط غير مدعوم: {version}")
+        offset = _HEADER.size
+
+        def take(typecode: str, count: int) -> array:
+            nonlocal offset
+            values = array(typecode)
+            values.frombytes(data[offset:offset + count * values.itemsize])
+            offset += count * values.itemsize
+            return values
+
+        graph = cls()
+        lengths = take("i", label_count)
+        for length in lengths:
+            graph.labels.intern(str(data[offset:offset + length], "utf-8"))
+            offset += length
+        graph.node_labels = take("i", node_count)
+        graph._sources = take("i", edge_count)
+        graph._targets = take("i", edge_count)
+        graph._weights = take("f", edge_count)
+        return graph
+
+    def stats(self) -> Dict[str, Any]:
+        indptr, indices, weights = self.csr()
+        return {
+            "nodes": self.num_nodes,
+            "edges": self.num_edges,
+            "labels": len(self.labels),
+            "bytes": (self.node_labels.itemsize * len(self.node_labels) + indptr.nbytes + indices.nbytes
+                      + weights.nbytes)
+        }
+
+
+# -------------------- الكتابة المتدفقة --------------------
+def _chunks(lines: Iterator[str], chunk_lines: int) -> Iterator[str]:
+    """تجميع الأسطر في أجزاء بـ join واحد لكل جزء"""
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_lines:
+            yield "".join(buffer)
+            buffer.clear()
+    if buffer:
+        yield "".join(buffer)
+
+
+def _escaped(graph: FlowGraph, escape, cache: Optional[Dict[str, str]]) -> List[str]:
+    """تسميات المخطط مُهرّبة - cache مشترك بين مخططات دفعة يهرّب كل تسمية مرة واحدة للدفعة كلها"""
+    if cache is None:
+        return [escape(label) for label in graph.labels.labels]
+    escaped = []
+    for label in graph.labels.labels:
+        value = cache.get(label)
+        if value is None:
+            value = cache[label] = escape(label)
+        escaped.append(value)
+    return escaped
+
+
+def iter_mermaid(graph: FlowGraph, direction: str = "TD", prefix: str = "N", weights: bool = False,
+                 header: Iterable[str] = (), chunk_lines: int = CHUNK_LINES,
+                 escape_cache: Optional[Dict[str, str]] = None) -> Iterator[str]:
+    """Mermaid على أجزاء في مرور واحد (كل تسمية مميزة تُهرّب مرة واحدة)"""
+    labels = _escaped(graph, escape_mermaid, escape_cache)
+
+    def lines():
+        yield f"graph {direction}\n"
+        for line in header:
+            yield f"    {line}\n"
+        for node, label_id in enumerate(graph.node_labels):
+            yield f'    {prefix}{node}["{labels[label_id]}"]\n'
+        for source, target, weight in graph.edges():
+            if weights:
+                yield f"    {prefix}{source} -->|{weight:.3f}| {prefix}{target}\n"
+            else:
+                yield f"    {prefix}{source} --> {prefix}{target}\n"
+
+    return _chunks(lines(), chunk_lines)
+
+
+def iter_dot(graph: FlowGraph, name: str = "G", rankdir: str = "TB", weights: bool = False,
+             chunk_lines: int = CHUNK_LINES, escape_cache: Optional[Dict[str, str]] = None) -> Iterator[str]:
+    """DOT (Graphviz) على أجزاء في مرور واحد"""
+    labels = _escaped(graph, escape_dot, escape_cache)
+
+    def lines():
+        yield f'digraph "{escape_dot(name)}" {{\n    rankdir={rankdir};\n'
+        for node, label_id in enumerate(graph.node_labels):
+            yield f'    n{node} [label="{labels[label_id]}"];\n'
+        for source, target, weight in graph.edges():
+            if weights:
+                yield f'    n{source} -> n{target} [label="{weight:.3f}"];\n'
+            else:
+                yield f"    n{source} -> n{target};\n"
+        yield "}\n"
+
+    return _chunks(lines(), chunk_lines)
+
+
+def write_mermaid(graph: FlowGraph, out: TextIO, **options):
+    for chunk in iter_mermaid(graph, **options):
+        out.write(chunk)
+
+
+def write_dot(graph: FlowGraph, out: TextIO, **options):
+    for chunk in iter_dot(graph, **options):
+        out.write(chunk)
+
+
+def to_mermaid(graph: FlowGraph, **options) -> str:
+    return "".join(iter_mermaid(graph, **options))
+
+
+def to_dot(graph: FlowGraph, **options) -> str:
+    return "".join(iter_dot(graph, **options))
@@ -0,0 +1,203 @@
+"""
+============================================
+🗺️ الخريطة: 03_logic/graph_store.py
+📌 الربط:
+    - يستخدمه logic_flow.py لحفظ المخططات المولدة (بديل القاموس graphs)
+    - export_json يعيد تحميل المخطط من التخزين المشترك على أي عامل
+    - الذاكرة محدودة بالعدد والحجم (LRU + TTL من وقت الإنشاء) والتخزين المشترك في SQLite أو Redis بصيغة مضغوطة
+============================================
+"""
+
+# المتطلبات: sqlite3 (مدمج)، redis (اختياري)
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from config import (GRAPH_STORE_BACKEND, GRAPH_STORE_DB, GRAPH_MEMORY_ITEMS, GRAPH_MEMORY_MB, GRAPH_TTL,
+                    REDIS_URL)
+from executors import executors
+from graph_engine import FlowGraph
+
+
+def new_graph_id() -> str:
+    """معرف فريد بين العمال (الطابع الزمني وحده يتصادم)"""
+    return f"flow_{uuid.uuid4().hex}"
+
+
+class SQLiteGraphBackend:
+    """تخزين المخططات في SQLite مشترك بين عمال نفس الجهاز - صف لكل مخطط"""
+
+    # حذف المخططات المنتهية كل عدد من عمليات الحفظ
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str = GRAPH_STORE_DB, ttl: float = GRAPH_TTL):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.puts = 0
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS graphs (graph_id TEXT PRIMARY KEY, meta TEXT, graph BLOB, created REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS graphs_created ON graphs (created)")
+
+    def put(self, graph_id: str, meta: str, graph: bytes, created: float):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO graphs VALUES (?, ?, ?, ?)", (graph_id, meta, graph, created))
+            self.puts += 1
+            if self.puts % self.PURGE_EVERY == 0:
+                self.db.execute("DELETE FROM graphs WHERE created < ?", (time.time() - self.ttl,))
+
+    def get(self, graph_id: str) -> Optional[Tuple[str, bytes, float]]:
+        with self.lock:
+            return self.db.execute("SELECT meta, graph, created FROM graphs WHERE graph_id = ? AND created >= ?",
+                                   (graph_id, time.time() - self.ttl)).fetchone()
+
+
+class RedisGraphBackend:
+    """تخزين المخططات في Redis (حقلان لكل مخطط) مع مدة صلاحية - مشترك بين الأجهزة"""
+
+    PREFIX = "graph:"
+
+    def __init__(self, url: str = REDIS_URL, ttl: float = GRAPH_TTL):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+
+    def put(self, graph_id: str, meta: str, graph: bytes, created: float):
+        key = self.PREFIX + graph_id
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping={"meta": meta, "graph": graph, "created": repr(created)})
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def get(self, graph_id: str) -> Optional[Tuple[str, bytes, float]]:
+        meta, graph, created = self.client.hmget(self.PREFIX + graph_id, "meta", "graph", "created")
+        if meta is None or graph is None:
+            return None
+        return meta.decode("utf-8"), graph, float(created) if created is not None else time.time()
+
+
+def create_backend(kind: str = GRAPH_STORE_BACKEND):
+    """اختيار التخزين المشترك حسب الإعدادات (memory = بدون تخزين مشترك)"""
+    if kind == "redis":
+        return RedisGraphBackend()
+    if kind == "sqlite":
+        return SQLiteGraphBackend()
+    return None
+
+
+def record_bytes(graph: FlowGraph, meta: Dict[str, Any]) -> int:
+    """حجم المخطط في الذاكرة تقريباً: المصفوفات + نصوص التسميات والوصف"""
+    return (graph.stats()["bytes"] + sum(len(label) for label in graph.labels.labels)
+            + len(str(meta.get("description", ""))))
+
+
+class GraphStore:
+    """مخزن المخططات: ذاكرة محدودة بالعدد والحجم (LRU + TTL) أمام تخزين مشترك بين العمال"""
+
+    def __init__(self, backend=None, memory_items: int = GRAPH_MEMORY_ITEMS,
+                 memory_mb: float = GRAPH_MEMORY_MB, ttl: float = GRAPH_TTL):
+        self.backend = backend
+        self.memory_items = memory_items
+        self.memory_bytes = int(memory_mb * 1024 * 1024)
+        self.ttl = ttl
+        # المعرف -> {"graph": FlowGraph, "description": ..., "format": ..., "created": ..., "expires": ..., "bytes": ...}
+        self.memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.used_bytes = 0
+        self.lock = threading.Lock()
+        self.counters = {"puts": 0, "memory_hits": 0, "backend_hits": 0, "misses": 0,
+                         "evictions": 0, "backend_errors": 0}
+
+    async def put(self, graph: FlowGraph, **meta) -> str:
+        """حفظ مخطط جديد (الذاكرة ثم التخزين المشترك) - يعيد معرفه"""
+        graph_id = new_graph_id()
+        created = time.time()
+        record = {"graph": graph, **meta}
+        # CSR والحجم والتسلسل والضغط والكتابة كلها خارج حلقة الأحداث
+        written = await executors.run_io(self._write, graph_id, record, meta, created)
+        if not written:
+            self.counters["backend_errors"] += 1
+        self._remember(graph_id, record, created)
+        self.counters["puts"] += 1
+        return graph_id
+
+    def _write(self, graph_id: str, record: Dict[str, Any], meta: Dict[str, Any], created: float) -> bool:
+        """حجم المخطط في الذاكرة ثم الكتابة في التخزين المشترك - False عند فشل الكتابة فقط"""
+        graph = record["graph"]
+        record["bytes"] = record_bytes(graph, record)
+        if self.backend is None:
+            return True
+        try:
+            self.backend.put(graph_id, json.dumps(meta, ensure_ascii=False), graph.to_bytes(), created)
+        except Exception:
+            return False
+        return True
+
+    async def get(self, graph_id: str) -> Optional[Dict[str, Any]]:
+        """المخطط وبياناته: من الذاكرة، أو إعادة بنائه من التخزين المشترك عند أول طلب على هذا العامل"""
+        with self.lock:
+            record = self.memory.get(graph_id)
+            if record is not None and record["expires"] >= time.time():
+                # ترتيب LRU فقط - الصلاحية تبقى من وقت الإنشاء كما في التخزين المشترك
+                self.memory.move_to_end(graph_id)
+                self.counters["memory_hits"] += 1
+                return record
+
+        if self.backend is None:
+            self.counters["misses"] += 1
+            return None
+        try:
+            record = await executors.run_io(self._read, graph_id)
+        except Exception:
+            self.counters["backend_errors"] += 1
+            return None
+        if record is None:
+            self.counters["misses"] += 1
+            return None
+
+        self.counters["backend_hits"] += 1
+        record, created = record
+        return self._remember(graph_id, record, created)
+
+    def _read(self, graph_id: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        stored = self.backend.get(graph_id)
+        if stored is None:
+            return None
+        meta, graph, created = stored
+        graph = FlowGraph.from_bytes(graph)
+        record = {"graph": graph, **json.loads(meta)}
+        # CSR يُحسب هنا (خارج حلقة الأحداث) مع الحجم
+        record["bytes"] = record_bytes(graph, record)
+        return record, created
+
+    def _remember(self, graph_id: str, record: Dict[str, Any], created: float) -> Dict[str, Any]:
+        """إضافة للذاكرة بصلاحية من وقت الإنشاء، ثم الإخراج الأقدم استخداماً حتى العودة تحت الحدين
+        (record["bytes"] محسوب مسبقاً في _write أو _read داخل مجمع الخيوط)"""
+        record["expires"] = created + self.ttl
+        with self.lock:
+            previous = self.memory.pop(graph_id, None)
+            if previous is not None:
+                self.used_bytes -= previous["bytes"]
+            self.memory[graph_id] = record
+            self.used_bytes += record["bytes"]
+            # المخطط الأحدث يبقى حتى لو تجاوز الحد وحده
+            while len(self.memory) > 1 and (len(self.memory) > self.memory_items
+                                            or self.used_bytes > self.memory_bytes):
+                _, evicted = self.memory.popitem(last=False)
+                self.used_bytes -= evicted["bytes"]
+                self.counters["evictions"] += 1
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "memory_graphs": len(self.memory),
+            "memory_mb": round(self.used_bytes / 1024 / 1024, 2),
+            "backend": type(self.backend).__name__ if self.backend is not None else None
+        }
@@ -0,0 +1,245 @@
+"""
+============================================
+🗺️ الخريطة: 06_cognitive/hybrid_retriever.py
+📌 الربط:
+    - يستخدمه ai_core.py للاسترجاع من قاعدة المعرفة (BM25 + المتجهات)
+    - يُغذى من learn_from_documents ويُحفظ بجانب قاعدة المعرفة (KNOWLEDGE_DIR)
+============================================
+"""
+
+# المتطلبات: numpy
+
+import math
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import BM25_K1, BM25_B, RRF_K
+
+# التشكيل (الفتحة .. السكون، الشدة، المدة، الألف الخنجرية) والتطويل
+_DIACRITICS_RE = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_ARABIC_CHARS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه",
+})
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# سوابق تُزال إن بقي بعدها جذر كافٍ (تجذيع خفيف)
+_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+_STOPWORDS = frozenset({
+    "في", "من", "علي", "الي", "عن", "مع", "هو", "هي", "ما", "ماذا", "كيف", "هل", "او", "ان",
+    "the", "a", "an", "of", "to", "in", "is", "are", "and", "or", "what", "how", "for", "on",
+})
+
+
+def normalize_arabic(text: str) -> str:
+    """توحيد النص العربي: إزالة التشكيل والتطويل وتوحيد الألف والياء والتاء المربوطة"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return _DIACRITICS_RE.sub("", text).translate(_ARABIC_CHARS)
+
+
+def tokenize(text: str) -> List[str]:
+    """كلمات موحدة بعد حذف الكلمات الشائعة وسوابق التعريف"""
+    tokens = []
+    for word in _TOKEN_RE.findall(normalize_arabic(text)):
+        for prefix in _PREFIXES:
+            if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+                word = word[len(prefix):]
+                break
+        if word not in _STOPWORDS:
+            tokens.append(word)
+    return tokens
+
+
+class BM25Index:
+    """فهرس معكوس محدث تدريجياً مع ترتيب BM25"""
+
+    # ضغط المواضع عندما تتجاوز الفارغة هذه النسبة من الفهرس
+    COMPACT_FRACTION = 0.25
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        # المصطلح -> {رقم المستند: التكرار}
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        # المستند المحذوف يبقى موضعه فارغاً (None) حتى لا تتغير مواضع الباقي
+        self.doc_ids: List[Optional[str]] = []
+        self.documents: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.positions: Dict[str, int] = {}
+        self.total_length = 0
+        self.generation = 0
+        self.lock = threading.Lock()
+        # مصفوفات NumPy محسوبة مسبقاً لكل مصطلح (تُبطل عند الإضافة)
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lengths: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def add(self, ids: Sequence[str], documents: Sequence[str]):
+        """إضافة مستندات (المعرف الموجود يُتجاهل - الإضافة فقط)"""
+        tokenized = [(doc_id, document, Counter(tokenize(document))) for doc_id, document in zip(ids, documents)]
+        with self.lock:
+            for doc_id, document, counts in tokenized:
+                if doc_id in self.positions:
+                    continue
+                position = len(self.doc_ids)
+                self.positions[doc_id] = position
+                self.doc_ids.append(doc_id)
+                self.documents.append(document)
+                length = sum(counts.values())
+                self.doc_lengths.append(length)
+                self.total_length += length
+                for term, frequency in counts.items():
+                    self.postings[term][position] = frequency
+                    self._arrays.pop(term, None)
+            self._lengths = None
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """حذف مستندات من القوائم المعكوسة - يعيد عدد المحذوف"""
+        removed = 0
+        with self.lock:
+            for doc_id in ids:
+                position = self.positions.pop(doc_id, None)
+                if position is None:
+                    continue
+                for term in set(tokenize(self.documents[position])):
+                    posting = self.postings.get(term)
+                    if posting is not None:
+                        posting.pop(position, None)
+                        if not posting:
+                            del self.postings[term]
+                    self._arrays.pop(term, None)
+                self.total_length -= self.doc_lengths[position]
+                self.doc_lengths[position] = 0
+                self.documents[position] = ""
+                self.doc_ids[position] = None
+                removed += 1
+            if removed:
+                self._lengths = None
+                if len(self.doc_ids) - len(self.positions) > self.COMPACT_FRACTION * len(self.doc_ids):
+                    self._compact()
+        return removed
+
+    def _compact(self):
+        """إزالة المواضع الفارغة وإعادة ترقيم القوائم المعكوسة (المصفوفات وطول البحث تتناسب مع الأحياء فقط)"""
+        kept = [position for position, doc_id in enumerate(self.doc_ids) if doc_id is not None]
+        renumber = {old: new for new, old in enumerate(kept)}
+        self.postings = defaultdict(dict, {
+            term: {renumber[position]: frequency for position, frequency in posting.items()}
+            for term, posting in self.postings.items()
+        })
+        self.doc_ids = [self.doc_ids[position] for position in kept]
+        self.documents = [self.documents[position] for position in kept]
+        self.doc_lengths = [self.doc_lengths[position] for position in kept]
+        self.positions = {doc_id: position for position, doc_id in enumerate(self.doc_ids)}
+        self._arrays.clear()
+        self._lengths = None
+
+    def document(self, doc_id: str) -> Optional[str]:
+        position = self.positions.get(doc_id)
+        return self.documents[position] if position is not None else None
+
+    def _term_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            posting = self.postings.get(term)
+            if not posting:
+                return None
+            arrays = self._arrays[term] = (np.fromiter(posting.keys(), dtype=np.int64, count=len(posting)),
+                                           np.fromiter(posting.values(), dtype=np.float32, count=len(posting)))
+        return arrays
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[str, float]]:
+        """أعلى k مستند: (المعرف، درجة BM25) - يمر فقط على قوائم مصطلحات الاستعلام (عمليات NumPy)"""
+        terms = set(tokenize(query))
+        with self.lock:
+            total = len(self.positions)
+            if not total or not terms:
+                return []
+            if self._lengths is None:
+                lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+                self._lengths = self.k1 * (1 - self.b + self.b * lengths / max(self.total_length / total, 1e-9))
+            norms = self._lengths
+
+            scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+            for term in terms:
+                arrays = self._term_arrays(term)
+                if arrays is None:
+                    continue
+                positions, frequencies = arrays
+                idf = math.log(1 + (total - len(positions) + 0.5) / (len(positions) + 0.5))
+                scores[positions] += idf * frequencies * (self.k1 + 1) / (frequencies + norms[positions])
+
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            best = candidates[np.argsort(-scores[candidates])]
+            return [(self.doc_ids[position], float(scores[position])) for position in best]
+
+    # -------------------- الحفظ بجانب قاعدة المعرفة --------------------
+    def save(self, path: str, generation: int):
+        """حفظ الفهرس مع رقم جيل قاعدة المعرفة (كتابة ذرية)"""
+        with self.lock:
+            state = {
+                "generation": generation,
+                "postings": dict(self.postings),
+                "doc_ids": self.doc_ids,
+                "documents": self.documents,
+                "doc_lengths": self.doc_lengths,
+                "total_length": self.total_length,
+            }
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str, generation: int) -> Optional["BM25Index"]:
+        """تحميل الفهرس المحفوظ إن كان من نفس الجيل وإلا None"""
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if state.get("generation") != generation:
+            return None
+        index = cls()
+        index.postings = defaultdict(dict, state["postings"])
+        index.doc_ids = state["doc_ids"]
+        index.documents = state["documents"]
+        index.doc_lengths = state["doc_lengths"]
+        index.total_length = state["total_length"]
+        index.positions = {doc_id: position for position, doc_id in enumerate(index.doc_ids)
+                           if doc_id is not None}
+        index.generation = generation
+        return index
+
+    @classmethod
+    def from_collection(cls, collection, page_size: int = 5000) -> "BM25Index":
+        """بناء الفهرس من نصوص مجموعة Chroma على صفحات"""
+        index = cls()
+        total = collection.count()
+        for offset in range(0, total, page_size):
+            page = collection.get(limit=page_size, offset=offset, include=["documents"])
+            index.add(page["ids"], page["documents"])
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        return {"documents": len(self.positions), "terms": len(self.postings),
+                "empty_slots": len(self.doc_ids) - len(self.positions)}
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """دمج عدة ترتيبات: درجة المستند = Σ 1 / (k + الترتيب)"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
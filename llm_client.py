@@ -0,0 +1,243 @@
+"""
+============================================
+🗺️ الخريطة: 06_cognitive/llm_client.py
+📌 الربط:
+    - يستخدمه ai_core.py لاستدعاء Gemini دون حجب حلقة الأحداث
+    - يمكن توجيهه إلى خادم محاكاة محلي (benchmarks/llm_stub_server.py) عبر GEMINI_BASE_URL
+============================================
+"""
+
+# المتطلبات: httpx
+
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Any, AsyncIterator, Optional
+
+import httpx
+
+from config import (GEMINI_BASE_URL, GEMINI_MODEL, LLM_MAX_CONCURRENCY, LLM_TIMEOUT,
+                    LLM_CONNECT_TIMEOUT, LLM_RETRIES, LLM_BACKOFF_BASE, LLM_BACKOFF_MAX,
+                    LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET)
+
+
+class LLMUnavailable(Exception):
+    """فشل استدعاء المزود بعد إعادة المحاولة أو أن قاطع الدائرة مفتوح"""
+
+
+class CircuitBreaker:
+    """قاطع دائرة: يفتح بعد عدد من الإخفاقات المتتالية ثم يسمح بمحاولة تجريبية بعد المهلة"""
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, reset_after: float = LLM_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """هل يُسمح بالطلب؟ في حالة half_open يمر طلب تجريبي واحد فقط"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_running = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """إنهاء المحاولة التجريبية دون نتيجة (إلغاء أو خطأ من العميل) - يسمح بتجربة جديدة"""
+        self.trial_running = False
+
+
+class GeminiClient:
+    """عميل Gemini REST غير حاجب: اتصالات مجمعة، حد تزامن، مهلات، إعادة محاولة وقاطع دائرة"""
+
+    # أخطاء مؤقتة تستحق إعادة المحاولة
+    RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+    def __init__(self, api_key: str, model: str = GEMINI_MODEL, base_url: str = GEMINI_BASE_URL,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, retries: int = LLM_RETRIES):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.breaker = CircuitBreaker()
+        self.counters = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0,
+                         "client_errors": 0}
+
+        # عميل وحد تزامن لكل حلقة أحداث (مهام Celery تنشئ حلقة جديدة لكل مهمة)
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._limiters: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+    def _session(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # إزالة عملاء الحلقات المغلقة
+            for stale in [stale for stale in self._clients if stale.is_closed()]:
+                self._clients.pop(stale, None)
+                self._limiters.pop(stale, None)
+            client = self._clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency)
+            )
+            self._limiters[loop] = asyncio.Semaphore(self.max_concurrency)
+        return client, self._limiters[loop]
+
+    async def generate(self, prompt: str) -> str:
+        """توليد نص من Gemini"""
+        if not self.breaker.allow():
+            self.counters["rejected"] += 1
+            raise LLMUnavailable("قاطع الدائرة مفتوح - Gemini غير متاح مؤقتاً")
+        # هل هذا الطلب هو المحاولة التجريبية؟ (يجب تحريرها مهما كانت طريقة الخروج)
+        trial = self.breaker.trial_running
+        settled = False
+
+        client, limiter = self._session()
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        path = f"/v1beta/models/{self.model}:generateContent"
+        last_error: Optional[Exception] = None
+
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    self.counters["retries"] += 1
+                    delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** (attempt - 1))
+                    # full jitter - لتفادي موجات إعادة المحاولة المتزامنة
+                    await asyncio.sleep(random.uniform(0, delay))
+                try:
+                    async with limiter:
+                        self.counters["requests"] += 1
+                        response = await client.post(path, params={"key": self.api_key}, json=payload)
+                    if response.status_code in self.RETRY_STATUS:
+                        last_error = LLMUnavailable(f"Gemini HTTP {response.status_code}")
+                        continue
+                    response.raise_for_status()
+                    text = self._extract_text(response.json())
+                    self.breaker.record_success()
+                    settled = True
+                    return text
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    last_error = e
+                except (httpx.HTTPStatusError, ValueError, KeyError, IndexError) as e:
+                    # أخطاء غير مؤقتة (طلب خاطئ، مفتاح غير صالح، رد غير متوقع)
+                    last_error = e
+                    break
+
+            self.counters["failures"] += 1
+            settled = self._record_failure(last_error)
+            raise LLMUnavailable(f"فشل استدعاء Gemini: {last_error}")
+        finally:
+            # إلغاء المهمة (CancelledError) أو أي خروج آخر دون نتيجة
+            if trial and not settled:
+                self.breaker.release()
+
+    def _record_failure(self, error: Optional[Exception]) -> bool:
+        """أخطاء العميل 4xx (طلب خاطئ أو مفتاح غير صالح) لا تعني تعطل المزود - لا تُحسب على القاطع"""
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code < 500:
+            self.counters["client_errors"] += 1
+            return False
+        self.breaker.record_failure()
+        return True
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """توليد متدفق (SSE) - يعيد أجزاء النص فور وصولها"""
+        if not self.breaker.allow():
+            self.counters["rejected"] += 1
+            raise LLMUnavailable("قاطع الدائرة مفتوح - Gemini غير متاح مؤقتاً")
+        trial = self.breaker.trial_running
+        settled = False
+
+        client, limiter = self._session()
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        path = f"/v1beta/models/{self.model}:streamGenerateContent"
+        last_error: Optional[Exception] = None
+        started = False
+
+        try:
+            for attempt in range(self.retries + 1):
+                # إعادة المحاولة ممكنة فقط قبل إرسال أول جزء للعميل
+                if attempt:
+                    self.counters["retries"] += 1
+                    delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** (attempt - 1))
+                    await asyncio.sleep(random.uniform(0, delay))
+                try:
+                    async with limiter:
+                        self.counters["requests"] += 1
+                        async with client.stream("POST", path, params={"key": self.api_key, "alt": "sse"},
+                                                 json=payload) as response:
+                            if response.status_code in self.RETRY_STATUS:
+                                last_error = LLMUnavailable(f"Gemini HTTP {response.status_code}")
+                                continue
+                            response.raise_for_status()
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                text = self._extract_text(json.loads(line[5:]))
+                                if text:
+                                    started = True
+                                    yield text
+                    self.breaker.record_success()
+                    settled = True
+                    return
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    last_error = e
+                    if started:
+                        break
+                except (httpx.HTTPStatusError, ValueError, KeyError, IndexError) as e:
+                    last_error = e
+                    break
+
+            self.counters["failures"] += 1
+            settled = self._record_failure(last_error)
+            raise LLMUnavailable(f"فشل استدعاء Gemini: {last_error}")
+        finally:
+            # المستهلك توقف (GeneratorExit) أو أُلغيت المهمة قبل نتيجة
+            if trial and not settled:
+                self.breaker.release()
+
+    @staticmethod
+    def _extract_text(body: Dict[str, Any]) -> str:
+        parts = body["candidates"][0]["content"]["parts"]
+        return "".join(part.get("text", "") for part in parts)
+
+    async def aclose(self):
+        """إغلاق عميل الحلقة الحالية"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        self._limiters.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "base_url": self.base_url,
+            "max_concurrency": self.max_concurrency,
+            "breaker": self.breaker.state,
+            **self.counters
+        }
@@ -0,0 +1,212 @@
+"""
+============================================
+🗺️ الخريطة: 09_deployment/load_balancer.py
+📌 الربط:
+    - يستقبل من main.py (تسجيل الاتصالات وتوزيع الحمل)
+    - يشارك حالة جميع عمال uvicorn عبر Redis
+============================================
+"""
+
+# المتطلبات: redis
+
+import asyncio
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+from config import SCALER_HIGH_WATER, SCALER_HEARTBEAT_SECONDS, SCALER_WORKER_TTL
+
+
+# إزالة عامل: حذف حقوله وطرح اتصالاته من المجموع في خطوة ذرية واحدة
+# KEYS: الاتصالات، المجموع، النبض، الحمل - ARGV: معرف العامل
+_REAP_SCRIPT = """
+local count = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+redis.call('HDEL', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+if count ~= 0 then
+    redis.call('DECRBY', KEYS[2], count)
+end
+return count
+"""
+
+# تصحيح حقل العامل إلى عدده المطلق مع نقل الفرق إلى المجموع ذرياً (تحديثات فاتت Redis أثناء انقطاعه)
+# KEYS: الاتصالات، المجموع - ARGV: معرف العامل، العدد المطلق
+_RECONCILE_SCRIPT = """
+local count = tonumber(ARGV[2])
+local delta = count - tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+redis.call('HSET', KEYS[1], ARGV[1], count)
+if delta ~= 0 then
+    redis.call('INCRBY', KEYS[2], delta)
+end
+return delta
+"""
+
+
+class AutoScaler:
+    """نظام التوزيع التلقائي - سجل الاتصالات والحمل لكل عامل مع بديل محلي في الذاكرة"""
+
+    # عدد اتصالات كل عامل (حقل لكل عامل) + المجموع المحفوظ لكل العمال (قراءة O(1))
+    CONNECTIONS_KEY = "scaler:connections"
+    TOTAL_KEY = "scaler:connections_total"
+    LOAD_KEY = "scaler:load"
+    HEARTBEAT_KEY = "scaler:heartbeat"
+
+    def __init__(self, client=None, high_water: int = SCALER_HIGH_WATER):
+        self.status = "🟢 نشط"
+        self.client = client
+        self.high_water = high_water
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        # السجل المحلي لهذا العامل: اتصال لكل مقبس (نفس client_id قد يفتح عدة مقابس)
+        self.connections: Dict[str, Any] = {}
+        self.in_flight = 0
+        self.shed_count = 0
+
+        self.heartbeat_task: Optional[asyncio.Task] = None
+        if client is not None:
+            self._reap_script = client.register_script(_REAP_SCRIPT)
+            self._reconcile_script = client.register_script(_RECONCILE_SCRIPT)
+        print(f"🟢 Auto-Scaler - العامل {self.worker_id} جاهز")
+
+    # -------------------- دورة الحياة --------------------
+    async def start(self):
+        """بدء نبض العامل في Redis"""
+        if self.client is not None and self.heartbeat_task is None:
+            self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        """إزالة مساهمة هذا العامل من العدادات المشتركة عند الإيقاف"""
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+        await self._reap(self.worker_id)
+
+    async def _heartbeat_loop(self):
+        while True:
+            try:
+                pipe = self.client.pipeline()
+                pipe.hset(self.HEARTBEAT_KEY, self.worker_id, time.time())
+                pipe.hset(self.LOAD_KEY, self.worker_id, self.in_flight)
+                await pipe.execute()
+                # العدد المطلق يصحح أي زيادة أو نقص فاته Redis أثناء انقطاعه (والمجموع معه)
+                await self._reconcile_script(keys=[self.CONNECTIONS_KEY, self.TOTAL_KEY],
+                                             args=[self.worker_id, len(self.connections)])
+                await self._reap_stale()
+                self.status = "🟢 نشط"
+            except Exception:
+                self.status = "🟡 وضع محلي (Redis غير متاح)"
+            await asyncio.sleep(SCALER_HEARTBEAT_SECONDS)
+
+    async def _reap_stale(self):
+        """تنظيف عدادات العمال المتوقفين دون إيقاف نظيف"""
+        heartbeats = await self.client.hgetall(self.HEARTBEAT_KEY)
+        deadline = time.time() - SCALER_WORKER_TTL
+        for worker_id, seen in heartbeats.items():
+            if worker_id != self.worker_id and float(seen) < deadline:
+                await self._reap(worker_id)
+
+    async def _reap(self, worker_id: str):
+        if self.client is None:
+            return
+        try:
+            await self._reap_script(keys=[self.CONNECTIONS_KEY, self.TOTAL_KEY, self.HEARTBEAT_KEY, self.LOAD_KEY],
+                                    args=[worker_id])
+        except Exception:
+            pass
+
+    # -------------------- الاتصالات --------------------
+    @staticmethod
+    def connection_key(client_id: str, websocket=None) -> str:
+        """مفتاح لكل مقبس: إعادة الاتصال بنفس client_id قبل إغلاق القديم اتصالان منفصلان"""
+        return f"{client_id}:{id(websocket)}"
+
+    async def register_connection(self, client_id: str, websocket=None):
+        """تسجيل اتصال WebSocket جديد"""
+        key = self.connection_key(client_id, websocket)
+        if key not in self.connections:
+            self.connections[key] = websocket
+            await self._publish_connections(1)
+
+    async def unregister_connection(self, client_id: str, websocket=None):
+        """إلغاء تسجيل اتصال منتهٍ (المقبس نفسه فقط)"""
+        key = self.connection_key(client_id, websocket)
+        if key in self.connections:
+            del self.connections[key]
+            await self._publish_connections(-1)
+
+    async def _publish_connections(self, delta: int):
+        """حقل العامل والمجموع يتغيران معاً في معاملة واحدة (MULTI/EXEC)"""
+        if self.client is None:
+            return
+        try:
+            pipe = self.client.pipeline()
+            pipe.hincrby(self.CONNECTIONS_KEY, self.worker_id, delta)
+            pipe.incrby(self.TOTAL_KEY, delta)
+            pipe.hset(self.HEARTBEAT_KEY, self.worker_id, time.time())
+            await pipe.execute()
+        except Exception:
+            self.status = "🟡 وضع محلي (Redis غير متاح)"
+
+    async def get_active_connections(self) -> int:
+        """عدد المستخدمين المتصلين عبر جميع العمال - قراءة المجموع المحفوظ (O(1))"""
+        if self.client is not None:
+            try:
+                return int(await self.client.get(self.TOTAL_KEY) or 0)
+            except Exception:
+                pass
+        return len(self.connections)
+
+    # -------------------- توزيع الحمل --------------------
+    async def distribute_load(self) -> Dict[str, Any]:
+        """تلميح التوجيه: العامل الأقل حملاً، وهل يجب رفض الطلب (تجاوز الحد الأعلى)"""
+        shed = self.in_flight >= self.high_water
+        if shed:
+            self.shed_count += 1
+
+        least_loaded = self.worker_id
+        if self.client is not None:
+            try:
+                loads = await self.client.hgetall(self.LOAD_KEY)
+                loads[self.worker_id] = self.in_flight
+                least_loaded = min(loads, key=lambda worker: int(loads[worker]))
+            except Exception:
+                pass
+
+        return {
+            "worker": self.worker_id,
+            "least_loaded": least_loaded,
+            "in_flight": self.in_flight,
+            "high_water": self.high_water,
+            "shed": shed
+        }
+
+    @asynccontextmanager
+    async def track_work(self):
+        """احتساب عمل جارٍ على هذا العامل طوال مدة الطلب"""
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    async def load_report(self) -> Dict[str, Any]:
+        """الحمل الحالي لكل عامل"""
+        report = {
+            "worker": self.worker_id,
+            "local_connections": len(self.connections),
+            "in_flight": self.in_flight,
+            "high_water": self.high_water,
+            "shed": self.shed_count
+        }
+        if self.client is not None:
+            try:
+                report["workers"] = {
+                    worker: {"in_flight": int(load)}
+                    for worker, load in (await self.client.hgetall(self.LOAD_KEY)).items()
+                }
+            except Exception:
+                pass
+        return report
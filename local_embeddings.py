@@ -0,0 +1,173 @@
+"""
+============================================
+🗺️ الخريطة: 06_cognitive/local_embeddings.py
+📌 الربط:
+    - بديل محلي (بدون شبكة) لـ OpenAIEmbeddings في ai_core.py
+    - فهرس متجهات داخل العملية (مصفوفة NumPy float32) لقواعد المعرفة الصغيرة
+============================================
+"""
+
+# المتطلبات: numpy, langchain
+
+import re
+import threading
+import unicodedata
+import zlib
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+from config import EMBED_LOCAL_DIM
+
+# كلمات عربية ولاتينية وأرقام
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddings(Embeddings):
+    """تضمين محلي بالتجزئة (feature hashing): كلمات + مقاطع حروف ثلاثية بإشارة ±1، مطبّع L2"""
+
+    def __init__(self, dim: int = EMBED_LOCAL_DIM, char_ngrams: int = 3):
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+        self.model_name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(unicodedata.normalize("NFKC", text).lower())
+        features = words[:]
+        n = self.char_ngrams
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+        return features
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            digest = zlib.crc32(feature.encode("utf-8"))
+            # أعلى بت للإشارة والباقي للموضع - الإشارة تقلل انحياز التصادمات
+            vector[digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        # تخفيف أثر التكرار (log) ثم التطبيع
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+
+class NumpyVectorIndex:
+    """فهرس بحث شامل داخل العملية: مصفوفة float32 متصلة + ضرب مصفوفات على دفعات لأعلى k"""
+
+    INITIAL_ROWS = 1024
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.matrix = np.empty((0, dim or 0), dtype=np.float32)
+        self.size = 0
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        # المعرف -> رقم صفه (لتقييم مرشحين محددين دون مسح المصفوفة)
+        self.rows: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], documents: Sequence[str]):
+        """إضافة متجهات (تُطبّع لتصبح جيب التمام = ضرب داخلي)"""
+        if not len(ids):
+            return
+        block = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        block = block / np.where(norms == 0, 1, norms)
+
+        with self.lock:
+            if self.dim is None or self.size == 0:
+                self.dim = block.shape[1]
+            elif block.shape[1] != self.dim:
+                raise ValueError(f"بُعد المتجه {block.shape[1]} لا يطابق الفهرس ({self.dim})")
+
+            needed = self.size + len(block)
+            if needed > self.matrix.shape[0] or self.matrix.shape[1] != self.dim:
+                # نمو مضاعف (تكلفة إضافة ثابتة في المتوسط) مع بقاء المصفوفة متصلة
+                capacity = max(needed, 2 * self.matrix.shape[0], self.INITIAL_ROWS)
+                grown = np.empty((capacity, self.dim), dtype=np.float32)
+                if self.size:
+                    grown[:self.size] = self.matrix[:self.size]
+                self.matrix = grown
+            self.matrix[self.size:needed] = block
+            self.rows.update(zip(ids, range(self.size, needed)))
+            self.size = needed
+            self.ids.extend(ids)
+            self.documents.extend(documents)
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """حذف متجهات بمعرفاتها (ضغط المصفوفة في مكانها) - يعيد عدد المحذوف"""
+        targets = set(ids)
+        with self.lock:
+            keep = [i for i, doc_id in enumerate(self.ids) if doc_id not in targets]
+            removed = self.size - len(keep)
+            if removed:
+                self.matrix[:len(keep)] = self.matrix[keep]
+                self.size = len(keep)
+                self.ids = [self.ids[i] for i in keep]
+                self.documents = [self.documents[i] for i in keep]
+                self.rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        return removed
+
+    def search(self, queries: Sequence[Sequence[float]], k: int = 3) -> List[List[Tuple[str, str, float]]]:
+        """أعلى k لكل استعلام في الدفعة: (المعرف، النص، التشابه)"""
+        with self.lock:
+            if self.size == 0:
+                return [[] for _ in queries]
+            matrix = self.matrix[:self.size]
+            ids, documents = self.ids, self.documents
+
+        block = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        block = block / np.where(norms == 0, 1, norms)
+
+        scores = block @ matrix.T
+        k = min(k, scores.shape[1])
+        # argpartition: O(n) لاختيار أعلى k ثم ترتيبها فقط
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-row[candidates])]
+            results.append([(ids[i], documents[i], float(row[i])) for i in ordered])
+        return results
+
+    def search_within(self, query: Sequence[float], ids: Iterable[str]) -> List[Tuple[str, str, float]]:
+        """ترتيب مرشحين محددين (من BM25 مثلاً) بالتشابه مع الاستعلام - O(المرشحين) بدل مسح الفهرس كله"""
+        with self.lock:
+            rows = [self.rows[doc_id] for doc_id in ids if doc_id in self.rows]
+            if not rows:
+                return []
+            block = self.matrix[rows]
+            ids, documents = self.ids, self.documents
+
+        vector = np.asarray(query, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        scores = block @ (vector / norm if norm else vector)
+        return [(ids[rows[i]], documents[rows[i]], float(scores[i])) for i in np.argsort(-scores)]
+
+    @classmethod
+    def from_collection(cls, collection, page_size: int = 5000) -> "NumpyVectorIndex":
+        """تحميل كل متجهات مجموعة Chroma على صفحات"""
+        index = cls()
+        total = collection.count()
+        for offset in range(0, total, page_size):
+            page = collection.get(limit=page_size, offset=offset, include=["embeddings", "documents"])
+            index.add(page["ids"], page["embeddings"], page["documents"])
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": self.size,
+            "dim": self.dim,
+            "matrix_mb": round(self.matrix.nbytes / 1024 / 1024, 2)
+        }
@@ -4,96 +4,222 @@
 📌 الربط:
     - يستقبل من vision_processor.py (الصور المحللة)
     - يرسل إلى video_engine.py (مخططات فيديو)
+    - يحفظ المخططات في graph_store.py (مشترك بين العمال)
 ============================================
 """
 
-# المتطلبات: networkx, mermaid-py, json
+# المتطلبات: numpy, networkx (اختياري), json
 
-import networkx as nx
 import json
-from typing import Dict, Any, List
+import re
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 import asyncio
 from datetime import datetime
 
+from config import (LOGIC_MAX_NODES, LOGIC_INLINE_CHARS, LOGIC_STRUCTURE_MAX_NODES, LOGIC_BATCH_CHUNK_CHARS,
+                    LOGIC_BATCH_CONCURRENCY)
+from executors import executors
+from graph_engine import FlowGraph, to_mermaid, to_dot
+from graph_store import GraphStore, create_backend
+
+# فاصل الخطوات في أسطر التدفق: "أ -> ب -> ج"
+_ARROW_RE = re.compile(r"\s*(?:->|→|=>)\s*")
+
+def build_flow(description: str, max_nodes: int = LOGIC_MAX_NODES) -> Tuple[FlowGraph, bool]:
+    """وصف نصي -> مخطط: أسطر الأسهم تعرّف حوافاً بين خطوات مسماة، وإلا تسلسل الكلمات - يعيد (المخطط، هل اقتُطع)"""
+    graph = FlowGraph()
+    flow_lines = [line for line in description.splitlines() if _ARROW_RE.search(line)]
+    if not flow_lines:
+        words = description.split()
+        nodes = graph.add_nodes(words[:max_nodes])
+        graph.add_edges(nodes[:-1], nodes[1:], [0.5] * max(len(nodes) - 1, 0))
+        return graph, len(words) > max_nodes
+    
+    # الخطوة نفسها في عدة أسطر عقدة واحدة
+    nodes: Dict[str, int] = {}
+    truncated = False
+    for line in flow_lines:
+        previous = None
+        for step in filter(None, (step.strip() for step in _ARROW_RE.split(line))):
+            node = nodes.get(step)
+            if node is None:
+                if graph.num_nodes >= max_nodes:
+                    truncated = True
+                    break
+                node = nodes[step] = graph.add_node(step)
+            if previous is not None:
+                graph.add_edge(previous, node, 0.5)
+            previous = node
+    return graph, truncated
+
+def render_flow(description: str, diagram_format: str = "mermaid", label_pool: Optional[Dict[str, str]] = None,
+                escape_cache: Optional[Dict[str, str]] = None) -> Tuple[FlowGraph, str, bool]:
+    """بناء المخطط وكتابته في مرور واحد - تعمل داخل مجمع العمليات للأوصاف الكبيرة"""
+    graph, truncated = build_flow(description)
+    if label_pool is not None:
+        graph.labels.share(label_pool)
+    render = to_dot if diagram_format == "dot" else to_mermaid
+    return graph, render(graph, escape_cache=escape_cache), truncated
+
+def render_flows(descriptions: List[str], diagram_format: str = "mermaid") -> List[Tuple]:
+    """عدة مخططات في استدعاء واحد لمجمع العمليات - خطأ أحد الأوصاف لا يُفشل الباقي
+
+    الخطوات المشتركة بين الأوصاف تتشارك نص تسميتها (كائن واحد يُنقل من المجمع مرة واحدة) وتُهرّب مرة واحدة
+    """
+    label_pool: Dict[str, str] = {}
+    escape_cache: Dict[str, str] = {}
+    results = []
+    for description in descriptions:
+        try:
+            results.append((*render_flow(description, diagram_format, label_pool, escape_cache), None))
+        except Exception as e:
+            results.append((None, None, False, str(e)))
+    return results
+
 class LogicSchematics:
     """مولد المخططات المنهجية والهياكل المنطقية"""
     
     def __init__(self):
         self.status = "🟢 نشط"
-        self.graphs = {}
+        # مخزن المخططات (محدود في الذاكرة ومشترك بين العمال)
+        self.graphs = GraphStore(create_backend())
         print("🟢 Logic Schematics - جاهز لتوليد المخططات")
     
-    async def generate(self, description: str) -> Dict:
-        """توليد مخطط منطقي من وصف نصي"""
+    async def generate(self, description: str, diagram_format: str = "mermaid") -> Dict:
+        """توليد مخطط منطقي من وصف نصي (Mermaid أو DOT) - حتى LOGIC_MAX_NODES عقدة"""
         try:
-            # إنشاء رسم بياني جديد
-            G = nx.DiGraph()
+            if diagram_format not in ("mermaid", "dot"):
+                raise ValueError(f"صيغة غير مدعومة: {diagram_format}")
+            # الأوصاف الكبيرة تُبنى في مجمع العمليات حتى لا تحجب حلقة الأحداث
+            if len(description) > LOGIC_INLINE_CHARS:
+                graph, code, truncated = await executors.run_cpu(render_flow, description, diagram_format)
+            else:
+                graph, code, truncated = render_flow(description, diagram_format)
             
-            # تحليل الوصف وتوليد العقد
-            words = description.split()
-            for i, word in enumerate(words[:10]):  # حد أقصى 10 عقد
-                G.add_node(i, label=word, type="concept")
-            
-            # ربط العقد
-            for i in range(len(G.nodes) - 1):
-                G.add_edge(i, i + 1, weight=0.5)
-            
-            # تحويل إلى صيغة Mermaid
-            mermaid_code = "graph TD\n"
-            for node in G.nodes(data=True):
-                mermaid_code += f"    N{node[0]}[{node[1]['label']}]\n"
-            for edge in G.edges():
-                mermaid_code += f"    N{edge[0]} --> N{edge[1]}\n"
-            
-            # حفظ المخطط
-            graph_id = f"flow_{datetime.now().timestamp()}"
-            self.graphs[graph_id] = {
-                "graph": G,
-                "mermaid": mermaid_code,
-                "description": description
-            }
-            
-            return {
-                "status": "success",
-                "graph_id": graph_id,
-                "mermaid": mermaid_code,
-                "nodes": len(G.nodes),
-                "edges": len(G.edges),
-                "structure": {
-                    "nodes": [{"id": n, "label": d["label"]} for n, d in G.nodes(data=True)],
-                    "edges": [{"from": e[0], "to": e[1]} for e in G.edges()]
-                }
-            }
+            # حفظ المخطط (النص المولد لا يُحفظ - يُعاد توليده من المخطط عند الحاجة)
+            return await self.store_result(graph, code, truncated, description, diagram_format)
         except Exception as e:
             return {
                 "status": "error",
                 "message": str(e)
             }
     
+    async def store_result(self, graph: FlowGraph, code: str, truncated: bool, description: str,
+                           diagram_format: str) -> Dict:
+        graph_id = await self.graphs.put(graph, description=description, format=diagram_format,
+                                         created=datetime.now().isoformat())
+        result = {
+            "status": "success",
+            "graph_id": graph_id,
+            diagram_format: code,
+            "nodes": graph.num_nodes,
+            "edges": graph.num_edges,
+            "truncated": truncated
+        }
+        # بناء قوائم العقد والحواف للمخططات الكبيرة يحجب حلقة الأحداث - تبقى متاحة عبر export_json
+        if graph.num_nodes <= LOGIC_STRUCTURE_MAX_NODES:
+            result["structure"] = graph.structure()
+        else:
+            result["structure_omitted"] = True
+        return result
+    
+    async def generate_batch(self, descriptions: List[Any], diagram_format: str = "mermaid") -> AsyncIterator[Dict]:
+        """توليد دفعة مخططات بالتوازي: إطار item لكل وصف فور اكتماله (بأي ترتيب) ثم إطار done
+
+        المشترك بين الأوصاف: الوصف المكرر يُبنى مرة واحدة، والخطوات المتكررة بين الأوصاف المختلفة تتشارك
+        تسمياتها المُدمجة عبر الدفعة كلها (في المجمع لكل حزمة، ثم في المخزن لكل الحزم). المخطط الفرعي لا يُشارك
+        كعقد: كل مخطط يبقى مستقلاً في graph_store ويُصدَّر وحده
+        """
+        started = time.perf_counter()
+        if diagram_format not in ("mermaid", "dot"):
+            yield {"type": "done", "status": "error", "message": f"صيغة غير مدعومة: {diagram_format}"}
+            return
+        
+        # الأوصاف المتطابقة تُبنى مرة واحدة وتتشارك المخطط نفسه
+        groups: Dict[str, List[int]] = {}
+        errors = 0
+        for index, description in enumerate(descriptions):
+            if not isinstance(description, str) or not description.strip():
+                errors += 1
+                yield {"type": "item", "index": index, "status": "error", "message": "الوصف يجب أن يكون نصاً غير فارغ"}
+                continue
+            groups.setdefault(description, []).append(index)
+        
+        # حزم بحجم محدود: استدعاء واحد لمجمع العمليات لكل حزمة بدل استدعاء لكل وصف
+        chunks, current, size = [], [], 0
+        for description in groups:
+            current.append(description)
+            size += len(description)
+            if size >= LOGIC_BATCH_CHUNK_CHARS:
+                chunks.append(current)
+                current, size = [], 0
+        if current:
+            chunks.append(current)
+        
+        limiter = asyncio.Semaphore(LOGIC_BATCH_CONCURRENCY)
+        # تسميات الحزم القادمة من عمليات مختلفة تُوحَّد هنا قبل الحفظ في الذاكرة
+        label_pool: Dict[str, str] = {}
+        
+        async def render(chunk: List[str]) -> Tuple[List[str], List[Tuple]]:
+            try:
+                # دفعة صغيرة كلها في حزمة واحدة - أسرع داخل العملية من الانتقال إلى المجمع
+                if len(chunks) == 1 and sum(map(len, chunk)) <= LOGIC_INLINE_CHARS:
+                    return chunk, render_flows(chunk, diagram_format)
+                async with limiter:
+                    return chunk, await executors.run_cpu(render_flows, chunk, diagram_format)
+            except Exception as e:
+                # فشل الحزمة كاملة (توقف عامل مثلاً) - خطأ لكل وصف فيها فقط
+                return chunk, [(None, None, False, str(e))] * len(chunk)
+        
+        pending = [asyncio.ensure_future(render(chunk)) for chunk in chunks]
+        try:
+            for finished in asyncio.as_completed(pending):
+                chunk, rendered = await finished
+                for description, (graph, code, truncated, error) in zip(chunk, rendered):
+                    indexes = groups[description]
+                    if error is None:
+                        try:
+                            graph.labels.share(label_pool)
+                            result = await self.store_result(graph, code, truncated, description, diagram_format)
+                        except Exception as e:
+                            # فشل حفظ مخطط واحد - خطأ لأوصافه فقط وتكمل الدفعة
+                            error = str(e)
+                    if error is not None:
+                        errors += len(indexes)
+                        result = {"status": "error", "message": error}
+                    for index in indexes:
+                        yield {"type": "item", "index": index, **result}
+        finally:
+            # انقطاع العميل يغلق المولد - لا داعي لإكمال الحزم المتبقية
+            for task in pending:
+                task.cancel()
+        
+        yield {
+            "type": "done",
+            "status": "success",
+            "items": len(descriptions),
+            "unique": len(groups),
+            "shared_labels": len(label_pool),
+            "errors": errors,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+    
     async def generate_from_image(self, image_analysis: Dict) -> Dict:
         """توليد مخطط منطقي من تحليل صورة"""
         try:
             # استخراج خصائص الصورة
-            features = image_analysis.get("analysis", {}).get("features", [])
-            
-            # إنشاء مخطط بناءً على خصائص الصورة
-            G = nx.DiGraph()
-            
-            # إضافة عقد للخصائص
-            for i, feature in enumerate(features[:5]):
-                G.add_node(i, label=f"Feature_{i}", value=feature)
+            features = image_analysis.get("analysis", {}).get("features", [])[:5]
             
-            # ربط الخصائص
-            for i in range(len(G.nodes) - 1):
-                G.add_edge(i, i + 1, weight=abs(features[i] - features[i + 1]))
+            # إنشاء مخطط بناءً على خصائص الصورة - عقدة لكل خاصية مربوطة بالتالية
+            graph = FlowGraph()
+            nodes = graph.add_nodes(f"Feature_{i}: {feature:.3f}" for i, feature in enumerate(features))
+            graph.add_edges(nodes[:-1], nodes[1:],
+                            [abs(features[i] - features[i + 1]) for i in range(len(nodes) - 1)])
             
             # توليد Mermaid
-            mermaid_code = "graph LR\n"
-            mermaid_code += "    style default fill:#f9f,stroke:#333,stroke-width:2px\n"
-            for node in G.nodes(data=True):
-                mermaid_code += f"    F{node[0]}[{node[1]['label']}: {node[1]['value']:.3f}]\n"
-            for edge in G.edges():
-                mermaid_code += f"    F{edge[0]} -->|{G[edge[0]][edge[1]]['weight']:.3f}| F{edge[1]}\n"
+            mermaid_code = to_mermaid(graph, direction="LR", prefix="F", weights=True,
+                                      header=["style default fill:#f9f,stroke:#333,stroke-width:2px"])
             
             return {
                 "status": "success",
@@ -109,22 +235,23 @@ class LogicSchematics:
     
     async def export_json(self, graph_id: str) -> Dict:
         """تصدير المخطط بصيغة JSON"""
-        if graph_id not in self.graphs:
+        graph_data = await self.graphs.get(graph_id)
+        if graph_data is None:
             return {"status": "error", "message": "Graph not found"}
         
-        graph_data = self.graphs[graph_id]
-        G = graph_data["graph"]
+        graph = graph_data["graph"]
         
         return {
             "status": "success",
             "graph_id": graph_id,
             "format": "json",
             "data": {
-                "nodes": [{"id": n, "data": d} for n, d in G.nodes(data=True)],
-                "edges": [{"source": e[0], "target": e[1], "data": G[e[0]][e[1]]} for e in G.edges()],
+                "nodes": [{"id": n, "data": {"label": graph.label(n), "type": "concept"}}
+                          for n in range(graph.num_nodes)],
+                "edges": [{"source": u, "target": v, "data": {"weight": w}} for u, v, w in graph.edges()],
                 "metadata": {
-                    "created": graph_id.split("_")[1],
+                    "created": graph_data["created"],
                     "description": graph_data["description"]
                 }
             }
-        }
\ No newline at end of file
+        }
@@ -10,23 +10,38 @@
 
 # المتطلبات: fastapi, uvicorn, websockets, redis, celery
 
-from fastapi import FastAPI, WebSocket, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 import uvicorn
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
 import json
 from datetime import datetime
-import redis
-from celery import Celery
+import redis.asyncio as redis
 from contextlib import asynccontextmanager
 
+from config import WARMUP_ON_STARTUP, REDIS_URL, SINGLEFLIGHT_ENABLED, LOGIC_BATCH_MAX_ITEMS, FLAG_TRUE
+from admission import AdmissionController, AdmissionRejected
+from executors import executors
+from registry import SubsystemUnavailable, create_registry
+from response_cache import ResponseCache
+from singleflight import SingleFlight
+from upload_spool import spool_request, UploadTooLarge
+from tasks import celery_app, process_job, run_task, describe_job, fetch_job_result, TASK_TYPES
+from ws_session import CommandSession
+
 # تهيئة Redis للتخزين المؤقت Zero-Latency
-redis_client = redis.Redis(host='localhost', port=6379, decode_responses=True)
+redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+response_cache = ResponseCache(redis_client)
+
+# حدود التزامن لكل نوع مهمة
+admission = AdmissionController()
 
-# تهيئة Celery للمهام الخلفية
-celery_app = Celery('super_ai', broker='redis://localhost:6379/0')
+# دمج الطلبات المتطابقة الجارية (قبل وجود أي نتيجة في الذاكرة المؤقتة)
+singleflight = SingleFlight(redis_client)
+COALESCED_TASK_TYPES = ("vision", "cognitive")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -34,8 +49,16 @@ async def lifespan(app: FastAPI):
     print("🟢 Super-AI Core Engine بدأ التشغيل...")
     print("🔵 وضع السيادة المعرفية المطلقة - نشط")
     print("⚡ Zero-Latency Cache - متصل")
+    
+    # تسخين الوحدات الثقيلة في الخلفية دون تأخير استقبال الطلبات
+    warmup_task = asyncio.create_task(registry.warm_up()) if WARMUP_ON_STARTUP else None
+    await scaler.start()
     yield
     print("🔴 إيقاف النظام...")
+    if warmup_task:
+        warmup_task.cancel()
+    await scaler.stop()
+    executors.shutdown()
 
 # تهيئة التطبيق الرئيسي
 app = FastAPI(
@@ -54,24 +77,27 @@ app.add_middleware(
 )
 
 # -------------------- تحميل الوحدات --------------------
-from ..02_vision.vision_processor import VisionNexus
-from ..03_logic.logic_flow import LogicSchematics
-from ..04_video.video_engine import VideoSynthesis
-from ..05_ingestion.file_reader import UniversalIngestion
-from ..06_cognitive.ai_core import CognitiveCore
-from ..07_export.export_tools import DataExporter
-from ..08_gateway.api_handler import InfiniteGateway
-from ..09_deployment.load_balancer import AutoScaler
-
-# تهيئة الكيانات
-vision = VisionNexus()
-logic = LogicSchematics()
-video = VideoSynthesis()
-ingestion = UniversalIngestion()
-cognitive = CognitiveCore()
-exporter = DataExporter()
-gateway = InfiniteGateway()
-scaler = AutoScaler()
+# الوحدات الثقيلة (torch, transformers, diffusers, easyocr, moviepy, langchain)
+# تُستورد وتُبنى عند أول استخدام أو أثناء التسخين الخلفي
+from load_balancer import AutoScaler
+
+registry = create_registry()
+
+scaler = AutoScaler(redis_client)
+
+@app.exception_handler(SubsystemUnavailable)
+async def subsystem_unavailable_handler(request: Request, exc: SubsystemUnavailable):
+    """الوحدة غير جاهزة - خطأ مؤقت"""
+    return JSONResponse({"status": "error", "message": str(exc)}, status_code=503)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """تجاوز حد التزامن - رفض سريع مع مهلة إعادة المحاولة"""
+    return JSONResponse(
+        {"status": "error", "code": "overloaded", "message": str(exc), "retry_after": exc.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 # -------------------- نقاط النهاية API --------------------
 @app.get("/")
@@ -85,67 +111,407 @@ async def root():
         "timestamp": datetime.now().isoformat()
     }
 
+# نوع المهمة لكل أمر WebSocket (لحدود التزامن)
+COMMAND_TASK_TYPES = {
+    "process_image": "vision",
+    "generate_logic": "logic",
+    "generate_logic_batch": "logic",
+    "cognitive_query": "cognitive",
+    "export_document": "export",
+    "read_file": "ingestion",
+}
+
+async def execute_command(data: Dict[str, Any]):
+    """تنفيذ أمر WebSocket واحد"""
+    if data.get("command") == "cognitive_query" and data.get("stream"):
+        return stream_query(data.get("question"), data.get("context"), data.get("conversation_id"))
+    if data.get("command") == "generate_logic_batch":
+        return stream_logic_batch(data.get("descriptions"), data.get("format", "mermaid"))
+    task_type = COMMAND_TASK_TYPES.get(data.get("command"))
+    fresh = False
+    
+    async def execute():
+        nonlocal fresh
+        fresh = True
+        async with admission.admit(task_type):
+            return await run_command(data)
+    
+    try:
+        async with scaler.track_work():
+            flight_key = await command_flight_key(task_type, data)
+            if flight_key:
+                result = await singleflight.do(flight_key, execute)
+                if not fresh and task_type == "cognitive":
+                    result = await claim_conversation(data.get("question"), result)
+                return result
+            return await execute()
+    except AdmissionRejected as e:
+        return {"status": "error", "code": "overloaded", "message": str(e), "retry_after": e.retry_after}
+
+async def claim_conversation(question: Optional[str], result: Any) -> Any:
+    """نتيجة مشتركة (ذاكرة مؤقتة أو دمج) - محادثة جديدة لصاحب الطلب بدل معرف المنفذ الأول"""
+    if not isinstance(result, dict) or result.get("status") != "success" or "answer" not in result:
+        return result
+    cognitive = await registry.get("cognitive")
+    conversation_id = await cognitive.remember_conversation(question, result["answer"], None)
+    return {**result, "conversation_id": conversation_id}
+
+async def command_flight_key(task_type: Optional[str], data: Dict[str, Any]) -> Optional[str]:
+    """مفتاح الدمج لأمر WebSocket (بنفس حقول طلبات HTTP المكافئة)"""
+    if data.get("command") == "process_image":
+        body = {"data": data.get("image")}
+    elif data.get("command") == "cognitive_query":
+        body = {"query": data.get("question"), "context": data.get("context"),
+                "conversation_id": data.get("conversation_id")}
+    else:
+        return None
+    return await flight_key(task_type, body)
+
+async def cache_version(subsystem) -> str:
+    """إصدار الوحدة في مفاتيح الذاكرة المؤقتة (cache_version إن وُجد: يتغير مع بياناتها كجيل قاعدة المعرفة)
+    sync_generation يحدّث الجيل المخزن خارج حلقة الأحداث قبل قراءته"""
+    sync_generation = getattr(subsystem, "sync_generation", None)
+    if sync_generation is not None:
+        await sync_generation()
+    return str(getattr(subsystem, "cache_version", None) or getattr(subsystem, "version", "0"))
+
+async def flight_key(task_type: str, body: Dict[str, Any]) -> Optional[str]:
+    """مفتاح الدمج = تجزئة الحمولة الموحدة + إصدار الوحدة (None = لا دمج)"""
+    if not SINGLEFLIGHT_ENABLED or task_type not in COALESCED_TASK_TYPES or body.get("conversation_id"):
+        return None
+    subsystem = await registry.get(task_type)
+    return response_cache.make_key(task_type, body, await cache_version(subsystem))
+
+async def run_command(data: Dict[str, Any]) -> Optional[Dict]:
+    command = data.get("command")
+    
+    if command == "process_image":
+        vision = await registry.get("vision")
+        return await vision.process(data.get("image"))
+        
+    elif command == "generate_logic":
+        logic = await registry.get("logic")
+        return await logic.generate(data.get("description"), data.get("format", "mermaid"))
+        
+    elif command == "cognitive_query":
+        cognitive = await registry.get("cognitive")
+        return await cognitive.query(data.get("question"), data.get("context"), data.get("conversation_id"))
+        
+    elif command == "export_document":
+        exporter = await registry.get("export")
+        return await exporter.export(data.get("content"), data.get("format"))
+        
+    elif command == "read_file":
+        ingestion = await registry.get("ingestion")
+        return await ingestion.universal_read(data.get("file"), data.get("file_type"))
+    
+    return None
+
+async def stream_query(question: str, context: Optional[str] = None,
+                       conversation_id: Optional[str] = None) -> AsyncIterator[Dict]:
+    """استعلام معرفي متدفق - حد التزامن محجوز طوال مدة التدفق"""
+    try:
+        async with scaler.track_work(), admission.admit("cognitive"):
+            cognitive = await registry.get("cognitive")
+            frames = cognitive.query_stream(question, context, conversation_id)
+            try:
+                async for frame in frames:
+                    yield frame
+            finally:
+                # انقطاع العميل يغلق المولد - نغلق تدفق Gemini معه
+                await frames.aclose()
+    except AdmissionRejected as e:
+        yield {"status": "error", "code": "overloaded", "message": str(e), "retry_after": e.retry_after}
+
+async def stream_logic_batch(descriptions: Any, diagram_format: str = "mermaid") -> AsyncIterator[Dict]:
+    """دفعة مخططات متدفقة - حد التزامن محجوز طوال مدة الدفعة"""
+    if not isinstance(descriptions, list) or not descriptions:
+        yield {"type": "done", "status": "error", "message": "descriptions يجب أن تكون قائمة غير فارغة"}
+        return
+    if len(descriptions) > LOGIC_BATCH_MAX_ITEMS:
+        yield {"type": "done", "status": "error",
+               "message": f"الحد الأقصى {LOGIC_BATCH_MAX_ITEMS} وصف في الدفعة الواحدة"}
+        return
+    try:
+        async with scaler.track_work(), admission.admit("logic"):
+            logic = await registry.get("logic")
+            frames = logic.generate_batch(descriptions, diagram_format)
+            try:
+                async for frame in frames:
+                    yield frame
+            finally:
+                await frames.aclose()
+    except AdmissionRejected as e:
+        yield {"status": "error", "code": "overloaded", "message": str(e), "retry_after": e.retry_after}
+
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
-    """اتصال WebSocket للمعالجة اللحظية"""
+    """اتصال WebSocket للمعالجة اللحظية - الأوامر الموسومة بـ request_id تنفذ بالتوازي"""
     await websocket.accept()
     await scaler.register_connection(client_id, websocket)
     
+    session = CommandSession(websocket, execute_command)
     try:
-        while True:
-            data = await websocket.receive_json()
-            command = data.get("command")
-            
-            if command == "process_image":
-                result = await vision.process(data.get("image"))
-                await websocket.send_json(result)
-                
-            elif command == "generate_logic":
-                result = await logic.generate(data.get("description"))
-                await websocket.send_json(result)
-                
-            elif command == "cognitive_query":
-                result = await cognitive.query(data.get("question"))
-                await websocket.send_json(result)
-                
-            elif command == "export_document":
-                result = await exporter.export(data.get("content"), data.get("format"))
-                await websocket.send_json(result)
-                
-    except:
-        await scaler.unregister_connection(client_id)
+        await session.run()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await scaler.unregister_connection(client_id, websocket)
 
 @app.post("/api/v1/process")
 async def process_request(request: Request):
-    """معالجة الطلبات المتزامنة"""
+    """معالجة الطلبات المتزامنة (mode=async يحولها إلى مهمة خلفية)"""
     body = await request.json()
     task_type = body.get("type")
     
-    # توزيع الحمل التلقائي
-    await scaler.distribute_load()
+    if request.query_params.get("mode") == "async":
+        return await submit_job(task_type, body)
+    
+    # توزيع الحمل التلقائي: رفض سريع عند تجاوز الحد الأعلى للعامل
+    hint = await scaler.distribute_load()
+    route_headers = {"X-Route-Hint": hint["least_loaded"]}
+    if hint["shed"]:
+        return JSONResponse(
+            {"error": "العامل مشغول - أعد المحاولة", "route_hint": hint["least_loaded"]},
+            status_code=503,
+            headers={**route_headers, "Retry-After": "1"}
+        )
+    
+    async with scaler.track_work():
+        response = await process_task(request, task_type, body)
+    response.headers.update(route_headers)
+    return response
+
+async def process_task(request: Request, task_type: str, body: Dict[str, Any]) -> JSONResponse:
+    """تنفيذ المهمة عبر ذاكرة الاستجابات"""
+    # ذاكرة الاستجابات: المفتاح من نوع المهمة + الحمولة الموحدة + إصدار الوحدة
+    cache_key = None
+    bypassed = cache_bypassed(request)
+    # متابعة محادثة قائمة تضيف دوراً جديداً - لا تُخدم من الذاكرة المؤقتة
+    if (response_cache.accepts(task_type) and not bypassed
+            and not body.get("conversation_id")):
+        subsystem = await registry.get(task_type)
+        cache_key = response_cache.make_key(task_type, body, await cache_version(subsystem))
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            if task_type == "cognitive":
+                cached = jsonable_encoder(await claim_conversation(body.get("query"), cached))
+            return JSONResponse(cached, headers={"X-Cache": "HIT"})
+    
+    fresh = False
     
-    if task_type == "vision":
-        return await vision.process(body.get("data"))
-    elif task_type == "cognitive":
-        return await cognitive.query(body.get("query"))
-    elif task_type == "export":
-        return await exporter.export(body.get("content"), body.get("format"))
+    async def execute():
+        nonlocal fresh
+        fresh = True
+        async with admission.admit(task_type):
+            return await run_task(registry, task_type, body)
     
-    return JSONResponse({"error": "نوع معالجة غير معروف"}, status_code=400)
+    # الطلبات المتطابقة الجارية تنتظر تنفيذاً واحداً - إلا مع تجاوز الذاكرة المؤقتة (تنفيذ فعلي لكل طلب)
+    key = None
+    if SINGLEFLIGHT_ENABLED and task_type in COALESCED_TASK_TYPES and not bypassed:
+        key = cache_key or await flight_key(task_type, body)
+    result = await singleflight.do(key, execute) if key else await execute()
+    if result is None:
+        return JSONResponse({"error": "نوع معالجة غير معروف"}, status_code=400)
+    if not fresh and task_type == "cognitive":
+        result = await claim_conversation(body.get("query"), result)
+    
+    # الإجابات المتدهورة لا تُخزن، ومعرف المحادثة يخص صاحب الطلب وحده
+    if cache_key and result.get("status") == "success" and not result.get("degraded"):
+        await response_cache.set(task_type, cache_key, jsonable_encoder(
+            {name: value for name, value in result.items() if name != "conversation_id"}))
+    return JSONResponse(jsonable_encoder(result), headers={"X-Cache": "MISS" if cache_key else "BYPASS"})
+
+def cache_bypassed(request: Request) -> bool:
+    """تجاوز الذاكرة المؤقتة ودمج الطلبات عبر Cache-Control: no-cache أو X-Cache-Bypass: 1"""
+    cache_control = request.headers.get("cache-control", "").lower()
+    return ("no-cache" in cache_control or "no-store" in cache_control
+            or request.headers.get("x-cache-bypass", "").strip().lower() in FLAG_TRUE)
+
+@app.api_route("/api/v1/cognitive/stream", methods=["GET", "POST"])
+async def cognitive_stream(request: Request):
+    """استعلام معرفي متدفق عبر Server-Sent Events (أحداث token ثم done)"""
+    if request.method == "POST":
+        body = await request.json()
+    else:
+        body = dict(request.query_params)
+    question = body.get("query") or body.get("question")
+    if not question:
+        return JSONResponse({"status": "error", "message": "query مطلوب"}, status_code=400)
+
+    async def events():
+        async for frame in stream_query(question, body.get("context"), body.get("conversation_id")):
+            event = frame.get("type") or ("error" if frame.get("status") == "error" else "done")
+            yield f"event: {event}\ndata: {json.dumps(jsonable_encoder(frame), ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/v1/conversations/{conversation_id}")
+async def conversation_history(conversation_id: str, limit: Optional[int] = None):
+    """تاريخ المحادثة (آخر الأدوار) من أي عامل"""
+    cognitive = await registry.get("cognitive")
+    turns = await cognitive.conversations.history(conversation_id, limit)
+    if not turns:
+        return JSONResponse({"status": "error", "message": "المحادثة غير موجودة"}, status_code=404)
+    return {"status": "success", "conversation_id": conversation_id, "turns": turns}
+
+@app.post("/api/v1/conversations/{conversation_id}/export")
+async def conversation_export(conversation_id: str):
+    """تصدير المحادثة إلى PDF"""
+    cognitive = await registry.get("cognitive")
+    exporter = await registry.get("export")
+    return await exporter.export_conversation(conversation_id, cognitive)
+
+@app.post("/api/v1/logic/batch")
+async def logic_batch(request: Request):
+    """توليد دفعة مخططات - النتائج تتدفق سطراً JSON لكل مخطط فور اكتماله (NDJSON) ثم سطر done"""
+    body = await request.json()
+    descriptions = body.get("descriptions")
+    if not isinstance(descriptions, list) or not descriptions:
+        return JSONResponse({"status": "error", "message": "descriptions يجب أن تكون قائمة غير فارغة"},
+                            status_code=400)
+    if len(descriptions) > LOGIC_BATCH_MAX_ITEMS:
+        return JSONResponse({"status": "error", "message": f"الحد الأقصى {LOGIC_BATCH_MAX_ITEMS} وصف"},
+                            status_code=413)
+
+    async def lines():
+        async for frame in stream_logic_batch(descriptions, body.get("format", "mermaid")):
+            yield json.dumps(jsonable_encoder(frame), ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/v1/logic/{graph_id}")
+async def logic_export(graph_id: str):
+    """تصدير مخطط منطقي بصيغة JSON من أي عامل"""
+    logic = await registry.get("logic")
+    result = await logic.export_json(graph_id)
+    if result["status"] != "success":
+        return JSONResponse(result, status_code=404)
+    return result
+
+@app.get("/api/v1/cache/stats")
+async def cache_stats():
+    """عدادات الإصابة والإخفاق لذاكرة الاستجابات (والذاكرة الدلالية إن كانت الوحدة المعرفية جاهزة)"""
+    report = await response_cache.stats()
+    cognitive = registry.instances.get("cognitive")
+    semantic_cache = getattr(cognitive, "semantic_cache", None)
+    if semantic_cache is not None:
+        report = {**report, "semantic": semantic_cache.stats()}
+    return report
+
+@app.post("/api/v1/ingest")
+async def ingest_upload(request: Request):
+    """رفع ملف متدفق (multipart أو جسم خام/chunked) يُحفظ على القرص ثم يُقرأ من مساره"""
+    # القبول قبل استلام الجسم: عند الضغط يُرفض الرفع دون كتابته على القرص (429 عبر معالج AdmissionRejected)
+    async with scaler.track_work(), admission.admit("ingestion"):
+        try:
+            upload = await spool_request(request.stream(), request.headers.get("content-type", ""))
+        except UploadTooLarge as e:
+            return JSONResponse({"status": "error", "message": str(e)}, status_code=413)
+        
+        try:
+            file_type = (request.query_params.get("file_type")
+                         or upload.fields.get("file_type")
+                         or upload.content_type
+                         or "")
+            ingestion = await registry.get("ingestion")
+            result = await ingestion.read_path(upload.path, file_type, upload.filename)
+            return {**result, "upload": upload.report()}
+        finally:
+            await executors.run_io(upload.cleanup)
+
+@app.post("/api/v1/knowledge/bulk")
+async def knowledge_bulk(request: Request):
+    """استيعاب جماعي لعدة مستندات دفعة واحدة - sources (اختياري) تحدّث المستندات السابقة بنفس المصدر تدريجياً"""
+    body = await request.json()
+    documents = body.get("documents") or []
+    if not isinstance(documents, list) or not all(isinstance(doc, str) for doc in documents):
+        return JSONResponse({"status": "error", "message": "documents يجب أن تكون قائمة نصوص"}, status_code=400)
+    sources = body.get("sources")
+    if sources is not None and (not isinstance(sources, list) or len(sources) != len(documents)
+                                or not all(source is None or isinstance(source, str) for source in sources)):
+        return JSONResponse({"status": "error", "message": "sources يجب أن تكون قائمة بطول documents"},
+                            status_code=400)
+
+    cognitive = await registry.get("cognitive")
+    async with scaler.track_work():
+        return await cognitive.learn_from_documents(documents, sources=sources)
+
+@app.get("/api/v1/knowledge/bulk/progress")
+async def knowledge_bulk_progress():
+    """تقدم آخر عملية استيعاب جماعي"""
+    cognitive = await registry.get("cognitive")
+    return await cognitive.ingestion_progress()
+
+@app.post("/api/v1/knowledge/snapshot")
+async def knowledge_snapshot():
+    """لقطة من قاعدة المعرفة الدائمة"""
+    cognitive = await registry.get("cognitive")
+    return await cognitive.snapshot_knowledge_base()
+
+@app.post("/api/v1/knowledge/compact")
+async def knowledge_compact():
+    """ضغط قاعدة المعرفة الدائمة"""
+    cognitive = await registry.get("cognitive")
+    return await cognitive.compact_knowledge_base()
+
+# -------------------- المهام الخلفية (Celery) --------------------
+async def submit_job(task_type: str, body: Dict[str, Any]) -> JSONResponse:
+    """إرسال مهمة إلى عمال Celery وإرجاع معرفها فوراً"""
+    if task_type not in TASK_TYPES:
+        return JSONResponse({"error": "نوع معالجة غير معروف"}, status_code=400)
+    
+    # الإرسال إلى الوسيط حاجب (وفي وضع eager ينفذ المهمة) - خارج حلقة الأحداث
+    job = await executors.run_io(process_job.apply_async, args=(task_type, body))
+    return JSONResponse({
+        "status": "accepted",
+        "job_id": job.id,
+        "status_url": f"/api/v1/jobs/{job.id}",
+        "result_url": f"/api/v1/jobs/{job.id}/result"
+    }, status_code=202)
+
+@app.post("/api/v1/jobs")
+async def create_job(request: Request):
+    """إرسال مهمة معالجة خلفية"""
+    body = await request.json()
+    return await submit_job(body.get("type"), body)
+
+@app.get("/api/v1/jobs/{job_id}")
+async def job_status(job_id: str):
+    """حالة المهمة ونسبة التقدم"""
+    return await executors.run_io(describe_job, job_id)
+
+@app.get("/api/v1/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """نتيجة المهمة - 202 إذا لم تكتمل بعد"""
+    result = await executors.run_io(fetch_job_result, job_id)
+    if result["state"] == "SUCCESS":
+        return result
+    if result["state"] == "FAILURE":
+        return JSONResponse(result, status_code=500)
+    return JSONResponse(result, status_code=202)
+
+def embedding_batcher_stats() -> Optional[Dict]:
+    """مدرجا حجم الدفعة وزمن الانتظار لمجمّع التضمين (إن كانت الوحدة المعرفية جاهزة)"""
+    batcher = getattr(registry.instances.get("cognitive"), "embedding_batcher", None)
+    return batcher.stats() if batcher is not None else None
 
 @app.get("/api/v1/status")
 async def system_status():
     """حالة النظام الكاملة"""
+    subsystems = registry.status()
     return {
         "core": "🟢",
-        "vision": vision.status,
-        "logic": logic.status,
-        "video": video.status,
-        "ingestion": ingestion.status,
-        "cognitive": cognitive.status,
-        "export": exporter.status,
-        "gateway": gateway.status,
+        **{name: info.get("status", info["state"]) for name, info in subsystems.items()},
         "scaler": scaler.status,
+        "load": await scaler.load_report(),
+        "subsystems": subsystems,
+        "executors": executors.stats(),
+        "admission": admission.stats(),
+        "singleflight": singleflight.stats(),
+        "embedding_batcher": embedding_batcher_stats(),
         "active_users": await scaler.get_active_connections()
     }
 
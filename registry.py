@@ -0,0 +1,115 @@
+"""
+============================================
+🗺️ الخريطة: 01_core/registry.py
+📌 الربط:
+    - يستخدمه main.py للوصول إلى جميع الوحدات
+    - يستورد الوحدات الثقيلة (vision, cognitive, video...) عند أول استخدام فقط
+============================================
+"""
+
+# المتطلبات: asyncio, importlib
+
+import asyncio
+import importlib
+import time
+from typing import Dict, Any, Callable, Iterable, Optional
+
+
+class SubsystemUnavailable(RuntimeError):
+    """تعذر تهيئة الوحدة المطلوبة"""
+
+
+def lazy_class(module_name: str, class_name: str) -> Callable[[], Any]:
+    """مصنع يؤجل استيراد الوحدة وبناء الكائن حتى أول طلب"""
+    def factory():
+        module = importlib.import_module(module_name)
+        return getattr(module, class_name)()
+    return factory
+
+
+class SubsystemRegistry:
+    """سجل الوحدات الكسول - كل وحدة تُبنى عند أول استخدام أو أثناء التسخين"""
+
+    COLD = "cold"
+    WARMING = "warming"
+    READY = "ready"
+    ERROR = "error"
+
+    def __init__(self):
+        self.factories: Dict[str, Callable[[], Any]] = {}
+        self.instances: Dict[str, Any] = {}
+        self.states: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self.load_times: Dict[str, float] = {}
+        self.locks: Dict[str, asyncio.Lock] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """تسجيل وحدة مع مصنعها (يستبدل أي تسجيل سابق)"""
+        self.factories[name] = factory
+        self.instances.pop(name, None)
+        self.errors.pop(name, None)
+        self.states[name] = self.COLD
+        self.locks[name] = asyncio.Lock()
+
+    async def get(self, name: str) -> Any:
+        """إرجاع الوحدة وبناؤها في خيط منفصل إن لم تكن جاهزة"""
+        instance = self.instances.get(name)
+        if instance is not None:
+            return instance
+
+        if name not in self.factories:
+            raise SubsystemUnavailable(f"وحدة غير مسجلة: {name}")
+
+        async with self.locks[name]:
+            if name in self.instances:
+                return self.instances[name]
+
+            self.states[name] = self.WARMING
+            started = time.perf_counter()
+            try:
+                # البناء ثقيل (تحميل نماذج) - لا نحجب حلقة الأحداث
+                instance = await asyncio.to_thread(self.factories[name])
+            except Exception as e:
+                self.states[name] = self.ERROR
+                self.errors[name] = str(e)
+                raise SubsystemUnavailable(f"فشل تهيئة {name}: {e}") from e
+
+            self.instances[name] = instance
+            self.states[name] = self.READY
+            self.errors.pop(name, None)
+            self.load_times[name] = round(time.perf_counter() - started, 3)
+            return instance
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None):
+        """تسخين الوحدات في الخلفية بعد بدء التشغيل"""
+        for name in list(names or self.factories):
+            try:
+                await self.get(name)
+            except SubsystemUnavailable as e:
+                print(f"⚠️ تحذير التسخين: {e}")
+
+    def status(self) -> Dict[str, Dict]:
+        """حالة كل وحدة: cold / warming / ready / error"""
+        report = {}
+        for name, state in self.states.items():
+            entry = {"state": state}
+            if state == self.READY:
+                entry["status"] = getattr(self.instances[name], "status", "🟢")
+                entry["load_seconds"] = self.load_times.get(name)
+            elif state == self.ERROR:
+                entry["error"] = self.errors.get(name)
+            report[name] = entry
+        return report
+
+
+def create_registry() -> SubsystemRegistry:
+    """السجل الافتراضي لوحدات النظام - مشترك بين main.py وعمال Celery"""
+    registry = SubsystemRegistry()
+    registry.register("vision", lazy_class("vision_processor", "VisionNexus"))
+    registry.register("logic", lazy_class("logic_flow", "LogicSchematics"))
+    registry.register("video", lazy_class("video_engine", "VideoSynthesis"))
+    registry.register("ingestion", lazy_class("file_reader", "UniversalIngestion"))
+    registry.register("cognitive", lazy_class("ai_core", "CognitiveCore"))
+    registry.register("export", lazy_class("export_tools", "DataExporter"))
+    registry.register("gateway", lazy_class("github_integrator", "InfiniteGateway"))
+    return registry
@@ -0,0 +1,140 @@
+"""
+============================================
+🗺️ الخريطة: 01_core/response_cache.py
+📌 الربط:
+    - يستخدمه main.py أمام vision.process و cognitive.query و exporter.export
+    - يخزن الاستجابات في Redis (Zero-Latency cache) مشتركة بين جميع العمال
+============================================
+"""
+
+# المتطلبات: redis
+
+import hashlib
+import json
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from config import CACHE_TTLS, CACHE_MAX_ENTRIES, CACHE_MAX_VALUE_BYTES
+
+# الحقول التي تحدد نتيجة كل نوع معالجة (باقي الجسم لا يدخل في المفتاح)
+CACHE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "vision": ("data",),
+    "cognitive": ("query", "context"),
+    "export": ("content", "format"),
+}
+
+
+def normalize_payload(task_type: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """توحيد الحمولة حتى تعطي الطلبات المتكافئة نفس المفتاح"""
+    payload = {}
+    for field in CACHE_FIELDS.get(task_type, ()):
+        value = body.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+            if field == "query":
+                value = " ".join(value.split())
+            elif field == "format":
+                value = value.lower()
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            # البايتات الخام (إطارات WebSocket الثنائية) تُمثَّل بتجزئتها
+            value = "sha256:" + hashlib.sha256(value).hexdigest()
+        payload[field] = value
+    return payload
+
+
+class ResponseCache:
+    """ذاكرة استجابات معنونة بالمحتوى في Redis مع مدة صلاحية لكل نوع وإزاحة LRU"""
+
+    PREFIX = "cache:resp:"
+    INDEX_KEY = "cache:resp:index"
+    HITS_KEY = "cache:resp:hits"
+    MISSES_KEY = "cache:resp:misses"
+
+    def __init__(self, client, ttls: Dict[str, int] = CACHE_TTLS,
+                 max_entries: int = CACHE_MAX_ENTRIES,
+                 max_value_bytes: int = CACHE_MAX_VALUE_BYTES):
+        self.client = client
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.max_value_bytes = max_value_bytes
+
+        # عدادات محلية (تبقى متاحة إذا تعذر الوصول إلى Redis)
+        self.local = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    def accepts(self, task_type: str) -> bool:
+        return task_type in CACHE_FIELDS and self.ttls.get(task_type, 0) > 0
+
+    def make_key(self, task_type: str, body: Dict[str, Any], version: str) -> str:
+        """المفتاح = تجزئة (نوع المهمة + الحمولة الموحدة + إصدار الوحدة)"""
+        payload = json.dumps(normalize_payload(task_type, body), sort_keys=True,
+                             ensure_ascii=False, separators=(",", ":"), default=str)
+        digest = hashlib.sha256(f"{task_type}|{version}|{payload}".encode("utf-8")).hexdigest()
+        return f"{task_type}:{digest}"
+
+    async def get(self, key: str) -> Optional[Dict]:
+        try:
+            raw = await self.client.get(self.PREFIX + key)
+            pipe = self.client.pipeline()
+            if raw is None:
+                pipe.incr(self.MISSES_KEY)
+            else:
+                # تحديث ترتيب الاستخدام للإزاحة LRU
+                pipe.zadd(self.INDEX_KEY, {key: time.time()})
+                pipe.incr(self.HITS_KEY)
+            await pipe.execute()
+        except Exception:
+            self.local["errors"] += 1
+            self.local["misses"] += 1
+            return None
+
+        if raw is None:
+            self.local["misses"] += 1
+            return None
+        self.local["hits"] += 1
+        return json.loads(raw)
+
+    async def set(self, task_type: str, key: str, value: Dict) -> bool:
+        raw = json.dumps(value, ensure_ascii=False, default=str)
+        if len(raw.encode("utf-8")) > self.max_value_bytes:
+            return False
+
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(self.PREFIX + key, raw, ex=self.ttls[task_type])
+            pipe.zadd(self.INDEX_KEY, {key: time.time()})
+            pipe.zcard(self.INDEX_KEY)
+            size = (await pipe.execute())[-1]
+
+            # إزاحة الأقدم استخداماً عند تجاوز الحد
+            overflow = size - self.max_entries
+            if overflow > 0:
+                evicted = await self.client.zpopmin(self.INDEX_KEY, overflow)
+                if evicted:
+                    await self.client.delete(*[self.PREFIX + member for member, _ in evicted])
+                    self.local["evictions"] += len(evicted)
+        except Exception:
+            self.local["errors"] += 1
+            return False
+
+        self.local["stores"] += 1
+        return True
+
+    async def stats(self) -> Dict[str, Any]:
+        """عدادات الإصابة والإخفاق (المشتركة بين العمال + المحلية)"""
+        report = {"local": dict(self.local), "max_entries": self.max_entries, "ttls": self.ttls}
+        try:
+            pipe = self.client.pipeline()
+            pipe.get(self.HITS_KEY)
+            pipe.get(self.MISSES_KEY)
+            pipe.zcard(self.INDEX_KEY)
+            hits, misses, entries = await pipe.execute()
+            hits, misses = int(hits or 0), int(misses or 0)
+            report.update({
+                "hits": hits,
+                "misses": misses,
+                "entries": entries,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0
+            })
+        except Exception as e:
+            report["error"] = str(e)
+        return report
@@ -0,0 +1,174 @@
+"""
+============================================
+🗺️ الخريطة: 06_cognitive/semantic_cache.py
+📌 الربط:
+    - يستخدمه ai_core.py قبل البحث في قاعدة المعرفة واستدعاء Gemini
+    - يُبطل عند تغير جيل قاعدة المعرفة (learn_from_document من أي عامل)
+============================================
+"""
+
+# المتطلبات: numpy
+
+import hashlib
+import threading
+import time
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from config import SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL, SEMANTIC_CACHE_MAX_ENTRIES
+
+
+def context_hash(context: Optional[str]) -> str:
+    """نطاق الذاكرة: نفس السؤال بسياق مختلف قد يستحق إجابة مختلفة"""
+    normalized = " ".join((context or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class _Scope:
+    """متجهات الأسئلة (مطبّعة) لسياق واحد مع إجاباتها وأوقات انتهائها"""
+
+    INITIAL_ROWS = 64
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.matrix = np.empty((self.INITIAL_ROWS, dim), dtype=np.float32)
+        self.expiry = np.empty(self.INITIAL_ROWS, dtype=np.float64)
+        self.entries: List[Dict[str, Any]] = []
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.matrix[:len(self.entries)]
+
+    @property
+    def expires(self) -> np.ndarray:
+        return self.expiry[:len(self.entries)]
+
+    def append(self, vector: np.ndarray, entry: Dict[str, Any]):
+        size = len(self.entries)
+        if size == self.matrix.shape[0]:
+            # نمو مضاعف (تكلفة إضافة ثابتة في المتوسط) بدل vstack لكل إدخال
+            grown = np.empty((2 * size, self.dim), dtype=np.float32)
+            grown[:size] = self.matrix
+            self.matrix = grown
+            self.expiry = np.concatenate([self.expiry, np.empty(size, dtype=np.float64)])
+        self.matrix[size] = vector
+        self.expiry[size] = entry["expires"]
+        self.entries.append(entry)
+
+    def keep(self, mask: np.ndarray):
+        kept = int(mask.sum())
+        self.matrix[:kept] = self.vectors[mask]
+        self.expiry[:kept] = self.expires[mask]
+        self.entries = [entry for entry, flag in zip(self.entries, mask) if flag]
+
+
+class SemanticCache:
+    """ذاكرة إجابات دلالية: سؤال قريب (تشابه جيب التمام ≥ العتبة) بنفس السياق يعيد الإجابة المخزنة"""
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl: float = SEMANTIC_CACHE_TTL,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.scopes: Dict[str, _Scope] = {}
+        self.generation: Optional[int] = None
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "evictions": 0}
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> Optional[np.ndarray]:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else None
+
+    def _sync_generation(self, generation: int):
+        """تغير جيل قاعدة المعرفة يبطل كل الإجابات المخزنة"""
+        if self.generation != generation:
+            if self.scopes:
+                self.counters["invalidations"] += 1
+            self.scopes.clear()
+            self.generation = generation
+
+    def lookup(self, vector: Sequence[float], context: Optional[str], generation: int) -> Optional[Dict]:
+        """أقرب سؤال مخزن فوق العتبة، أو None"""
+        query = self._normalize(vector)
+        with self.lock:
+            self._sync_generation(generation)
+            scope = self.scopes.get(context_hash(context))
+            if query is None or scope is None or not scope.entries or scope.dim != query.shape[0]:
+                self.counters["misses"] += 1
+                return None
+
+            scores = scope.vectors @ query
+            # الإدخالات المنتهية لا تحجب أقرب إدخال صالح
+            scores[scope.expires < time.time()] = -np.inf
+            best = int(np.argmax(scores))
+            entry = scope.entries[best]
+            if scores[best] < self.threshold:
+                self.counters["misses"] += 1
+                return None
+
+            self.counters["hits"] += 1
+            return {**entry["result"], "similarity": round(float(scores[best]), 4),
+                    "matched_question": entry["question"]}
+
+    def store(self, vector: Sequence[float], context: Optional[str], generation: int,
+              question: str, result: Dict[str, Any]):
+        """تخزين إجابة سؤال جديد"""
+        normalized = self._normalize(vector)
+        if normalized is None:
+            return
+        with self.lock:
+            self._sync_generation(generation)
+            key = context_hash(context)
+            scope = self.scopes.get(key)
+            if scope is None or scope.dim != normalized.shape[0]:
+                scope = self.scopes[key] = _Scope(normalized.shape[0])
+            scope.append(normalized, {
+                "question": question,
+                "result": result,
+                "expires": time.time() + self.ttl
+            })
+            self.counters["stores"] += 1
+            if len(self) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """حذف المنتهية صلاحيتها ثم الأقدم حتى العودة تحت الحد"""
+        now = time.time()
+        for scope in self.scopes.values():
+            before = len(scope.entries)
+            scope.keep(scope.expires >= now)
+            self.counters["evictions"] += before - len(scope.entries)
+
+        overflow = len(self) - self.max_entries
+        if overflow > 0:
+            oldest = np.sort(np.concatenate([scope.expires for scope in self.scopes.values()]))
+            cutoff = oldest[overflow - 1]
+            for scope in self.scopes.values():
+                before = len(scope.entries)
+                scope.keep(scope.expires > cutoff)
+                self.counters["evictions"] += before - len(scope.entries)
+
+        for key in [key for key, scope in self.scopes.items() if not scope.entries]:
+            del self.scopes[key]
+
+    def invalidate(self):
+        """إبطال يدوي لكل الإجابات"""
+        with self.lock:
+            self.scopes.clear()
+            self.counters["invalidations"] += 1
+
+    def __len__(self) -> int:
+        return sum(len(scope.entries) for scope in self.scopes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "entries": len(self),
+            "scopes": len(self.scopes),
+            "threshold": self.threshold,
+            "generation": self.generation
+        }
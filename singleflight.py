@@ -0,0 +1,130 @@
+"""
+============================================
+🗺️ الخريطة: 01_core/singleflight.py
+📌 الربط:
+    - يستخدمه main.py أمام vision.process و cognitive.query (HTTP و WebSocket)
+    - الطلبات المتطابقة المتزامنة تنتظر تنفيذاً واحداً بدل تكرار الحساب
+    - تنسيق اختياري بين العمال عبر قفل Redis
+============================================
+"""
+
+# المتطلبات: redis (اختياري)
+
+import asyncio
+import json
+import time
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+from config import (SINGLEFLIGHT_DISTRIBUTED, SINGLEFLIGHT_LOCK_TTL, SINGLEFLIGHT_RESULT_TTL,
+                    SINGLEFLIGHT_POLL_MS)
+
+
+class _Flight:
+    """تنفيذ جارٍ واحد مع عدد المنتظرين عليه"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """دمج الطلبات المتطابقة الجارية - المنتظرون يتشاركون نتيجة تنفيذ واحد"""
+
+    LOCK_PREFIX = "sf:lock:"
+    RESULT_PREFIX = "sf:result:"
+
+    def __init__(self, client=None, distributed: bool = SINGLEFLIGHT_DISTRIBUTED,
+                 lock_ttl: int = SINGLEFLIGHT_LOCK_TTL, result_ttl: int = SINGLEFLIGHT_RESULT_TTL):
+        self.client = client if distributed else None
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.flights: Dict[str, _Flight] = {}
+        self.counters = {"leaders": 0, "coalesced_local": 0, "coalesced_remote": 0,
+                         "remote_timeouts": 0, "errors": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """تنفيذ fn مرة واحدة لكل مفتاح جارٍ - الطلبات المكررة تنتظر النتيجة نفسها"""
+        flight = self.flights.get(key)
+        if flight is None:
+            self.counters["leaders"] += 1
+            flight = self.flights[key] = _Flight(asyncio.create_task(self._lead(key, fn)))
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+        else:
+            self.counters["coalesced_local"] += 1
+
+        flight.waiters += 1
+        try:
+            # shield: إلغاء أحد المنتظرين لا يلغي التنفيذ المشترك
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # آخر منتظر غادر - لا داعي لإكمال التنفيذ
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+        return dict(result) if isinstance(result, dict) else result
+
+    def _finish(self, key: str, flight: _Flight):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+        if not flight.task.cancelled() and flight.task.exception() is not None:
+            self.counters["errors"] += 1
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.client is None:
+            return await fn()
+
+        # التنسيق بين العمال: من يحجز القفل ينفذ والباقون ينتظرون نتيجته في Redis
+        lock_key, result_key = self.LOCK_PREFIX + key, self.RESULT_PREFIX + key
+        try:
+            acquired = await self.client.set(lock_key, "1", nx=True, ex=self.lock_ttl)
+        except Exception:
+            return await fn()
+
+        if not acquired:
+            remote = await self._wait_remote(lock_key, result_key)
+            if remote is not None:
+                self.counters["coalesced_remote"] += 1
+                return remote
+            return await fn()
+
+        try:
+            result = await fn()
+            if isinstance(result, dict) and result.get("status") != "error":
+                try:
+                    await self.client.set(result_key, json.dumps(result, ensure_ascii=False, default=str),
+                                          ex=self.result_ttl)
+                except Exception:
+                    pass
+            return result
+        finally:
+            try:
+                await self.client.delete(lock_key)
+            except Exception:
+                pass
+
+    async def _wait_remote(self, lock_key: str, result_key: str) -> Optional[Dict]:
+        """انتظار نتيجة العامل المنفذ حتى يُحرر القفل أو تنتهي المهلة"""
+        deadline = time.monotonic() + self.lock_ttl
+        try:
+            while time.monotonic() < deadline:
+                raw = await self.client.get(result_key)
+                if raw is not None:
+                    return json.loads(raw)
+                if not await self.client.exists(lock_key):
+                    # تحرر القفل دون نتيجة (خطأ لدى المنفذ) - ننفذ بأنفسنا
+                    raw = await self.client.get(result_key)
+                    return json.loads(raw) if raw is not None else None
+                await asyncio.sleep(SINGLEFLIGHT_POLL_MS / 1000)
+        except Exception:
+            return None
+        self.counters["remote_timeouts"] += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "in_flight": len(self.flights),
+            "distributed": self.client is not None
+        }
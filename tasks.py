@@ -0,0 +1,132 @@
+"""
+============================================
+🗺️ الخريطة: 01_core/tasks.py
+📌 الربط:
+    - يستقبل المهام من main.py (/api/v1/jobs)
+    - ينفذها في عمال Celery عبر vision_processor.py و ai_core.py و export_tools.py
+    - يخزن النتائج في Redis (result backend) مع مدة صلاحية
+============================================
+"""
+
+# المتطلبات: celery, redis
+# تشغيل العامل: celery -A tasks worker --loglevel=info
+
+import asyncio
+import threading
+from typing import Dict, Any, Optional, Tuple
+from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND, JOB_RESULT_TTL, CELERY_EAGER
+from executors import executors
+from registry import SubsystemRegistry, create_registry
+
+# تهيئة Celery للمهام الخلفية
+celery_app = Celery('super_ai', broker=CELERY_BROKER_URL, backend=CELERY_RESULT_BACKEND)
+celery_app.conf.update(
+    result_expires=JOB_RESULT_TTL,
+    task_track_started=True,
+    task_always_eager=CELERY_EAGER,
+    task_store_eager_result=True,
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"]
+)
+
+# أنواع المعالجة المدعومة في /api/v1/process و /api/v1/jobs
+TASK_TYPES = ("vision", "cognitive", "export")
+
+# سجل الوحدات داخل عامل Celery (يُبنى عند أول مهمة) وحلقة الأحداث الدائمة التي تعمل عليها وحداته
+_worker_registry: Optional[SubsystemRegistry] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_lock = threading.Lock()
+
+
+def worker_context() -> Tuple[asyncio.AbstractEventLoop, SubsystemRegistry]:
+    """حلقة أحداث واحدة لكل عملية عامل (في خيط خاص) + سجل الوحدات المرتبط بها
+
+    asyncio.run لكل مهمة ينشئ حلقة جديدة بينما تبقى الوحدات المخزنة (عملاء httpx، مجمّع التضمينات،
+    الأقفال) مرتبطة بالحلقة الأولى المغلقة - الحلقة الدائمة تبقيها صالحة بين المهام
+    """
+    global _worker_loop, _worker_registry
+    with _worker_lock:
+        if _worker_loop is None:
+            _worker_loop = asyncio.new_event_loop()
+            threading.Thread(target=_worker_loop.run_forever, name="superai-worker-loop", daemon=True).start()
+        if _worker_registry is None:
+            _worker_registry = create_registry()
+        return _worker_loop, _worker_registry
+
+
+@worker_process_init.connect
+def init_worker_process(**_):
+    """تهيئة عملية عامل Celery: الحلقة الدائمة قبل أول مهمة"""
+    worker_context()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**_):
+    if _worker_loop is not None:
+        _worker_loop.call_soon_threadsafe(_worker_loop.stop)
+    executors.shutdown()
+
+
+async def run_task(registry: SubsystemRegistry, task_type: str, body: Dict[str, Any]) -> Optional[Dict]:
+    """تنفيذ مهمة معالجة واحدة - None إذا كان النوع غير معروف"""
+    if task_type == "vision":
+        vision = await registry.get("vision")
+        return await vision.process(body.get("data"))
+    elif task_type == "cognitive":
+        cognitive = await registry.get("cognitive")
+        return await cognitive.query(body.get("query"), body.get("context"), body.get("conversation_id"))
+    elif task_type == "export":
+        exporter = await registry.get("export")
+        return await exporter.export(body.get("content"), body.get("format"))
+    return None
+
+
+@celery_app.task(bind=True, name="super_ai.process")
+def process_job(self, task_type: str, body: Dict[str, Any]) -> Dict:
+    """مهمة Celery: تنفيذ طلب معالجة خارج خادم الويب مع تقارير التقدم"""
+    if task_type not in TASK_TYPES:
+        return {"status": "error", "message": "نوع معالجة غير معروف"}
+    loop, registry = worker_context()
+    # self.request محلي للخيط - معرف المهمة يُمرر صراحة إلى خيط الحلقة
+    task_id = self.request.id
+
+    async def execute():
+        self.update_state(task_id=task_id, state="PROGRESS", meta={"stage": "loading", "progress": 0.1})
+        await registry.get(task_type)
+        self.update_state(task_id=task_id, state="PROGRESS", meta={"stage": "processing", "progress": 0.5})
+        return await run_task(registry, task_type, body)
+
+    # المهمة تنتظر على الحلقة الدائمة (العمل الحسابي داخلها يذهب إلى خيوط - انظر executors.get_cpu_pool)
+    return asyncio.run_coroutine_threadsafe(execute(), loop).result()
+
+
+def describe_job(job_id: str) -> Dict:
+    """حالة المهمة وتقدمها من result backend"""
+    job = celery_app.AsyncResult(job_id)
+    state = job.state
+    info = job.info if isinstance(job.info, dict) else {}
+
+    report = {"job_id": job_id, "state": state}
+    if state == "PROGRESS":
+        report.update(info)
+    elif state == "SUCCESS":
+        report["progress"] = 1.0
+    elif state == "FAILURE":
+        report["error"] = str(job.info)
+    else:
+        report["progress"] = 0.0
+    return report
+
+
+def fetch_job_result(job_id: str) -> Dict:
+    """نتيجة المهمة إن اكتملت"""
+    job = celery_app.AsyncResult(job_id)
+    if job.state == "SUCCESS":
+        return {"job_id": job_id, "state": "SUCCESS", "result": job.result}
+    if job.state == "FAILURE":
+        return {"job_id": job_id, "state": "FAILURE", "error": str(job.info)}
+    return {"job_id": job_id, "state": job.state}
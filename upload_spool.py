@@ -0,0 +1,156 @@
+"""
+============================================
+🗺️ الخريطة: 05_ingestion/upload_spool.py
+📌 الربط:
+    - يستقبل الرفع المتدفق من main.py (/api/v1/ingest)
+    - يمرر مسار الملف المؤقت إلى file_reader.py دون تحميله كاملاً في الذاكرة
+============================================
+"""
+
+# المتطلبات: python-multipart
+
+import os
+import resource
+import tempfile
+from typing import Dict, Any, AsyncIterator, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+from config import UPLOAD_MAX_BYTES, UPLOAD_SPOOL_DIR
+from executors import executors
+
+
+class UploadTooLarge(Exception):
+    """تجاوز الملف المرفوع الحد الأقصى المسموح"""
+
+
+class SpooledUpload:
+    """ملف مرفوع محفوظ على القرص مع إحصاءات الذاكرة"""
+
+    def __init__(self, spool_dir: str = UPLOAD_SPOOL_DIR):
+        handle, self.path = tempfile.mkstemp(prefix="superai_upload_", dir=spool_dir)
+        self.handle = os.fdopen(handle, "wb")
+        self.size = 0
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.fields: Dict[str, str] = {}
+
+        # أكبر كمية بيانات احتُفظ بها في الذاكرة دفعة واحدة (مقياس هذا الرفع وحده)
+        self.peak_buffered = 0
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > UPLOAD_MAX_BYTES:
+            raise UploadTooLarge(f"الملف أكبر من الحد المسموح ({UPLOAD_MAX_BYTES} بايت)")
+        self.handle.write(data)
+
+    def finish(self):
+        self.handle.close()
+
+    def cleanup(self):
+        """حذف الملف المؤقت"""
+        if not self.handle.closed:
+            self.handle.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def report(self) -> Dict[str, Any]:
+        """حجم الرفع وذروة تخزينه المؤقت، مع ذروة ذاكرة العملية منذ بدئها (ru_maxrss - لا تخص هذا الرفع)"""
+        return {
+            "bytes_received": self.size,
+            "filename": self.filename,
+            "peak_buffered_bytes": self.peak_buffered,
+            "process_lifetime_peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        }
+
+
+class _MultipartSink:
+    """يوجّه أول جزء ملف في multipart إلى القرص ويجمع الحقول النصية الصغيرة"""
+
+    MAX_FIELD_BYTES = 64 * 1024
+
+    def __init__(self, upload: SpooledUpload):
+        self.upload = upload
+        self.header_field = b""
+        self.header_value = b""
+        self.headers: Dict[bytes, bytes] = {}
+        self.part_name: Optional[str] = None
+        self.part_is_file = False
+        self.file_seen = False
+        self.field_data = bytearray()
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self.headers = {}
+        self.field_data = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        self.part_name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        self.part_is_file = filename is not None and not self.file_seen
+        if self.part_is_file:
+            self.file_seen = True
+            self.upload.filename = filename.decode("utf-8", "replace")
+            self.upload.content_type = self.headers.get(b"content-type", b"").decode("latin-1") or None
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.part_is_file:
+            self.upload.write(data[start:end])
+        elif len(self.field_data) + (end - start) <= self.MAX_FIELD_BYTES:
+            self.field_data += data[start:end]
+
+    def on_part_end(self):
+        if not self.part_is_file and self.part_name:
+            self.upload.fields[self.part_name] = self.field_data.decode("utf-8", "replace")
+        self.part_is_file = False
+
+
+async def spool_request(stream: AsyncIterator[bytes], content_type: str) -> SpooledUpload:
+    """حفظ جسم الطلب (multipart أو خام/chunked) في ملف مؤقت قطعة بقطعة"""
+    upload = SpooledUpload()
+    try:
+        mime, options = parse_options_header(content_type or "")
+        if mime == b"multipart/form-data":
+            sink = _MultipartSink(upload)
+            parser = MultipartParser(options.get(b"boundary", b""), sink.callbacks())
+            write = parser.write
+        else:
+            upload.content_type = mime.decode("latin-1") or None
+            write = upload.write
+
+        async for chunk in stream:
+            if not chunk:
+                continue
+            upload.peak_buffered = max(upload.peak_buffered, len(chunk))
+            # الكتابة على القرص حاجبة - في مجمع خيوط الإدخال/الإخراج
+            await executors.run_io(write, chunk)
+
+        if mime == b"multipart/form-data":
+            parser.finalize()
+        await executors.run_io(upload.finish)
+        return upload
+    except BaseException:
+        upload.cleanup()
+        raise
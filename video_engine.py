@@ -20,6 +20,26 @@ from typing import Dict, Any, Optional
 import tempfile
 import os
 
+from executors import executors
+
+def encode_video(frames: list, fps: int = 30) -> str:
+    """ترميز الإطارات إلى mp4 وإرجاعه بصيغة base64 - تعمل داخل مجمع العمليات"""
+    # إنشاء ملف مؤقت
+    with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_file:
+        temp_path = tmp_file.name
+    
+    try:
+        # تحويل الإطارات إلى فيديو
+        clip = ImageSequenceClip(frames, fps=fps)
+        clip.write_videofile(temp_path, codec='libx264')
+        
+        # قراءة الفيديو وتحويله إلى base64
+        with open(temp_path, 'rb') as f:
+            return base64.b64encode(f.read()).decode()
+    finally:
+        # تنظيف الملف المؤقت
+        os.unlink(temp_path)
+
 class VideoSynthesis:
     """مختبر توليد وتعديل الفيديو"""
     
@@ -31,20 +51,8 @@ class VideoSynthesis:
     async def generate_from_frames(self, frames: list, fps: int = 30) -> Dict:
         """توليد فيديو من إطارات متعددة"""
         try:
-            # إنشاء ملف مؤقت
-            with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_file:
-                temp_path = tmp_file.name
-            
-            # تحويل الإطارات إلى فيديو
-            clip = ImageSequenceClip(frames, fps=fps)
-            clip.write_videofile(temp_path, codec='libx264')
-            
-            # قراءة الفيديو وتحويله إلى base64
-            with open(temp_path, 'rb') as f:
-                video_base64 = base64.b64encode(f.read()).decode()
-            
-            # تنظيف الملف المؤقت
-            os.unlink(temp_path)
+            # الترميز حسابي - يتم في مجمع العمليات
+            video_base64 = await executors.run_cpu(encode_video, frames, fps)
             
             return {
                 "status": "success",
@@ -22,16 +22,75 @@ import asyncio
 from typing import Dict, Any, Optional
 import json
 
+from executors import executors, shareable_bytes
+
+# نموذج التحليل يُحمّل مرة واحدة داخل كل عملية من مجمع العمليات
+_vit_models = {}
+
+def _load_vit():
+    """تحميل نموذج ViT عند أول استخدام داخل العملية الحالية"""
+    if not _vit_models:
+        _vit_models["processor"] = ViTImageProcessor.from_pretrained('google/vit-base-patch16-224')
+        _vit_models["model"] = ViTForImageClassification.from_pretrained('google/vit-base-patch16-224')
+    return _vit_models["processor"], _vit_models["model"]
+
+def analyze_image(image_data: Any) -> Dict:
+    """رفع الدقة إلى 8K وتحليل الصورة - تعمل داخل مجمع العمليات"""
+    processor, model = _load_vit()
+    
+    # تحويل البيانات إلى صورة
+    if isinstance(image_data, str):
+        # إذا كانت base64
+        image = Image.open(BytesIO(base64.b64decode(image_data)))
+    elif isinstance(image_data, (bytes, bytearray)):
+        # بايتات خام من إطار WebSocket ثنائي
+        image = Image.open(BytesIO(image_data))
+    else:
+        image = Image.fromarray(image_data)
+    
+    # رفع الدقة إلى 8K
+    image_8k = image.resize((7680, 4320), Image.LANCZOS)
+    
+    # تحليل الصورة
+    inputs = processor(images=image_8k, return_tensors="pt")
+    with torch.no_grad():
+        outputs = model(**inputs)
+    
+    # استخراج الميزات
+    features = outputs.logits.softmax(dim=-1)
+    
+    # تحويل الصورة إلى نص مشفر
+    buffered = BytesIO()
+    image_8k.save(buffered, format="PNG", quality=100)
+    encoded_image = base64.b64encode(buffered.getvalue()).decode()
+    
+    return {
+        "status": "success",
+        "resolution": "7680x4320 (8K)",
+        "encoded_data": encoded_image[:100] + "...",  # مختصر للإرسال
+        "analysis": {
+            "predicted_class": outputs.logits.argmax(-1).item(),
+            "confidence": features.max().item(),
+            "features": features.tolist()[0][:5]  # أول 5 خصائص
+        },
+        "metadata": {
+            "format": "PNG",
+            "size": len(encoded_image),
+            "mode": image_8k.mode
+        }
+    }
+
 class VisionNexus:
     """نظام المعالجة البصرية - دقة 8K"""
     
+    # إصدار منطق المعالجة - يدخل في مفاتيح ذاكرة الاستجابات
+    version = "1.0.0"
+    
     def __init__(self):
         self.status = "🟢 نشط"
         print("🟢 Vision Nexus - جاهز للمعالجة بدقة 8K")
         
-        # تحميل نموذج تحليل الصور
-        self.processor = ViTImageProcessor.from_pretrained('google/vit-base-patch16-224')
-        self.model = ViTForImageClassification.from_pretrained('google/vit-base-patch16-224')
+        # نموذج تحليل الصور (ViT) يُحمّل داخل عمليات مجمع التنفيذ - انظر analyze_image
         
         # تحميل نموذج توليد الصور
         self.generator = StableDiffusionPipeline.from_pretrained(
@@ -48,43 +107,8 @@ class VisionNexus:
     async def process(self, image_data: Any) -> Dict:
         """معالجة الصورة وتحويلها إلى بيانات مشفرة"""
         try:
-            # تحويل البيانات إلى صورة
-            if isinstance(image_data, str):
-                # إذا كانت base64
-                image = Image.open(BytesIO(base64.b64decode(image_data)))
-            else:
-                image = Image.fromarray(image_data)
-            
-            # رفع الدقة إلى 8K
-            image_8k = image.resize((7680, 4320), Image.LANCZOS)
-            
-            # تحليل الصورة
-            inputs = self.processor(images=image_8k, return_tensors="pt")
-            outputs = self.model(**inputs)
-            
-            # استخراج الميزات
-            features = outputs.logits.softmax(dim=-1)
-            
-            # تحويل الصورة إلى نص مشفر
-            buffered = BytesIO()
-            image_8k.save(buffered, format="PNG", quality=100)
-            encoded_image = base64.b64encode(buffered.getvalue()).decode()
-            
-            return {
-                "status": "success",
-                "resolution": "7680x4320 (8K)",
-                "encoded_data": encoded_image[:100] + "...",  # مختصر للإرسال
-                "analysis": {
-                    "predicted_class": outputs.logits.argmax(-1).item(),
-                    "confidence": features.max().item(),
-                    "features": features.tolist()[0][:5]  # أول 5 خصائص
-                },
-                "metadata": {
-                    "format": "PNG",
-                    "size": len(encoded_image),
-                    "mode": image_8k.mode
-                }
-            }
+            # الاستدلال ورفع الدقة حسابيان - يتمان في مجمع العمليات دون حجب حلقة الأحداث
+            return await executors.run_cpu(analyze_image, shareable_bytes(image_data))
         except Exception as e:
             return {
                 "status": "error",
@@ -0,0 +1,289 @@
+"""
+============================================
+🗺️ الخريطة: 01_core/ws_session.py
+📌 الربط:
+    - يستقبل الاتصالات من main.py (/ws/{client_id})
+    - ينفذ الأوامر عبر معالج الأوامر في main.py
+============================================
+"""
+
+# المتطلبات: fastapi, asyncio, msgpack (اختياري)
+#
+# صيغ الرسائل الواردة:
+#   1. JSON نصي (العملاء القدامى - الصور بصيغة base64)
+#   2. إطار رأس JSON يحمل "binary": "<الحقل>" و "size" يليه إطار/إطارات ثنائية بالبايتات الخام
+#   3. مغلف msgpack في إطار ثنائي (الحقول الثنائية بنوع bin)
+
+import asyncio
+import json
+from contextlib import suppress
+from typing import Dict, Any, AsyncIterator, Callable, Awaitable, Optional, Union
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+
+from config import WS_MAX_IN_FLIGHT, WS_MAX_BINARY_BYTES
+
+try:
+    import msgpack
+except ImportError:  # msgpack اختياري - المغلفات الثنائية غير مدعومة بدونه
+    msgpack = None
+
+# المعالج يعيد نتيجة واحدة أو مولداً غير متزامن لإطارات متتالية (الاستجابات المتدفقة)
+CommandResult = Union[Dict, AsyncIterator[Dict], None]
+CommandHandler = Callable[[Dict[str, Any]], Awaitable[CommandResult]]
+
+
+class CommandSession:
+    """جلسة WebSocket متعددة المهام - تنفيذ متزامن للأوامر الموسومة بـ request_id"""
+
+    def __init__(self, websocket: WebSocket, handler: CommandHandler,
+                 max_in_flight: int = WS_MAX_IN_FLIGHT):
+        self.websocket = websocket
+        self.handler = handler
+        self.max_in_flight = max_in_flight
+
+        # المهام الجارية مفهرسة بمعرف الطلب
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.send_lock = asyncio.Lock()
+        self.closed = False
+
+        # رسالة تنتظر بياناتها الثنائية (بعد إطار الرأس)
+        self.pending_header: Optional[Dict[str, Any]] = None
+        self.pending_chunks: list = []
+        self.pending_size = 0
+        self.pending_received = 0
+
+    async def run(self):
+        """حلقة استقبال الرسائل حتى انقطاع الاتصال"""
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+
+                if message.get("text") is not None:
+                    await self.receive_text(message["text"])
+                elif message.get("bytes") is not None:
+                    await self.receive_bytes(message["bytes"])
+        finally:
+            await self.close()
+
+    async def receive_text(self, text: str):
+        """رسالة JSON: أمر كامل أو رأس لبيانات ثنائية تالية - الرسالة الخاطئة تُرفض بإطار خطأ والجلسة تبقى مفتوحة"""
+        if self.pending_header is not None:
+            # رسالة نصية قبل اكتمال البيانات الثنائية - الرفع السابق يُلغى
+            await self.send({
+                "request_id": self.pending_header.get("request_id"),
+                "status": "error",
+                "message": "وصلت رسالة نصية قبل اكتمال البيانات الثنائية المعلنة"
+            })
+            self.pending_header = None
+            self.pending_chunks = []
+
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            await self.send({"status": "error", "message": f"رسالة JSON غير صالحة: {e}"})
+            return
+        if not isinstance(data, dict):
+            await self.send({"status": "error", "message": "الرسالة يجب أن تكون كائن JSON"})
+            return
+
+        binary_field = data.get("binary")
+        if not binary_field:
+            await self.dispatch(data)
+            return
+
+        try:
+            size = int(data.get("size", 0))
+        except (TypeError, ValueError):
+            size = 0
+        if not isinstance(binary_field, str) or size <= 0 or size > WS_MAX_BINARY_BYTES:
+            await self.send({
+                "request_id": data.get("request_id"),
+                "status": "error",
+                "message": f"حجم البيانات الثنائية غير صالح (الحد {WS_MAX_BINARY_BYTES} بايت)"
+            })
+            return
+
+        self.pending_header = data
+        self.pending_chunks = []
+        self.pending_size = size
+        self.pending_received = 0
+
+    async def receive_bytes(self, payload: bytes):
+        """إطار ثنائي: تكملة لرأس سابق أو مغلف msgpack"""
+        if self.pending_header is None:
+            await self.receive_envelope(payload)
+            return
+
+        self.pending_chunks.append(payload)
+        self.pending_received += len(payload)
+        received = self.pending_received
+        if received < self.pending_size:
+            return
+
+        data, self.pending_header = self.pending_header, None
+        chunks, self.pending_chunks = self.pending_chunks, []
+        if received > self.pending_size:
+            await self.send({
+                "request_id": data.get("request_id"),
+                "status": "error",
+                "message": "البيانات الثنائية أكبر من الحجم المعلن"
+            })
+            return
+
+        # إطار واحد يُمرر كما هو دون نسخ، والإطارات المتعددة تُجمع مرة واحدة
+        raw = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        data[data.pop("binary")] = memoryview(raw)
+        data.pop("size", None)
+        await self.dispatch(data)
+
+    async def receive_envelope(self, payload: bytes):
+        """فك مغلف msgpack - الحقول الثنائية تصل كبايتات خام"""
+        if msgpack is None:
+            await self.send({"status": "error", "message": "مغلفات msgpack غير مدعومة على هذا الخادم"})
+            return
+        try:
+            data = msgpack.unpackb(payload, raw=False)
+        except Exception as e:
+            await self.send({"status": "error", "message": f"مغلف msgpack غير صالح: {e}"})
+            return
+        if not isinstance(data, dict):
+            await self.send({"status": "error", "message": "المغلف يجب أن يكون قاموساً"})
+            return
+
+        for key, value in data.items():
+            if isinstance(value, bytes):
+                data[key] = memoryview(value)
+        await self.dispatch(data, encoding="msgpack")
+
+    async def dispatch(self, data: Dict[str, Any], encoding: str = "json"):
+        """توجيه الرسالة: تنفيذ متزامن إن وُجد request_id وإلا التنفيذ المتسلسل القديم"""
+        request_id = data.get("request_id")
+        command = data.get("command")
+
+        if command == "cancel":
+            await self.cancel(request_id, encoding)
+            return
+
+        # الوضع القديم: بدون معرف طلب يتم التنفيذ بالترتيب
+        if request_id is None:
+            try:
+                result = await self.handler(data)
+            except Exception as e:
+                # خطأ أمر واحد لا يغلق الجلسة
+                result = {"status": "error", "message": str(e)}
+            if hasattr(result, "__aiter__"):
+                await self.send_stream(result, None, encoding)
+            elif result is not None:
+                await self.send(result, encoding)
+            return
+
+        request_id = str(request_id)
+        if request_id in self.tasks:
+            await self.send({
+                "request_id": request_id,
+                "status": "error",
+                "message": "معرف الطلب قيد التنفيذ بالفعل"
+            }, encoding)
+            return
+
+        if len(self.tasks) >= self.max_in_flight:
+            await self.send({
+                "request_id": request_id,
+                "status": "error",
+                "code": "too_many_in_flight",
+                "message": f"تم تجاوز الحد الأقصى للطلبات المتزامنة ({self.max_in_flight})"
+            }, encoding)
+            return
+
+        task = asyncio.create_task(self._execute(request_id, data, encoding))
+        self.tasks[request_id] = task
+        task.add_done_callback(lambda _: self._release(request_id, task))
+
+    def _release(self, request_id: str, task: asyncio.Task):
+        """تحرير خانة الطلب بعد انتهاء مهمته"""
+        if self.tasks.get(request_id) is task:
+            del self.tasks[request_id]
+
+    async def _execute(self, request_id: str, data: Dict[str, Any], encoding: str):
+        """تنفيذ أمر واحد وإرسال نتيجته موسومة بمعرف الطلب"""
+        try:
+            result = await self.handler(data)
+            if hasattr(result, "__aiter__"):
+                await self.send_stream(result, request_id, encoding)
+                return
+            if result is None:
+                result = {"status": "error", "message": "أمر غير معروف"}
+            await self.send({**result, "request_id": request_id}, encoding)
+        except Exception as e:
+            await self.send({
+                "request_id": request_id,
+                "status": "error",
+                "message": str(e)
+            }, encoding)
+
+    async def send_stream(self, frames: AsyncIterator[Dict], request_id: Optional[str], encoding: str):
+        """إرسال إطارات الاستجابة المتدفقة - الإلغاء أو الانقطاع يغلق المولد ويوقف المصدر"""
+        try:
+            async for frame in frames:
+                if self.closed:
+                    break
+                await self.send(frame if request_id is None else {**frame, "request_id": request_id}, encoding)
+        finally:
+            await frames.aclose()
+
+    async def cancel(self, request_id: Any, encoding: str = "json") -> bool:
+        """إلغاء طلب جارٍ بمعرفه"""
+        task = self.tasks.get(str(request_id)) if request_id is not None else None
+        if task is None:
+            await self.send({
+                "request_id": request_id,
+                "status": "error",
+                "message": "لا يوجد طلب جارٍ بهذا المعرف"
+            }, encoding)
+            return False
+
+        task.cancel()
+        self._release(str(request_id), task)
+        await self.send({"request_id": str(request_id), "status": "cancelled"}, encoding)
+        return True
+
+    async def send(self, message: Dict, encoding: str = "json"):
+        """إرسال رسالة بنفس ترميز الطلب مع منع تداخل الإرسال من المهام المتوازية"""
+        if self.closed:
+            return
+        try:
+            payload = self.encode(message, encoding)
+        except Exception as e:
+            # نتيجة غير قابلة للترميز - العميل يتلقى خطأ بدل انتظار رد لا يصل
+            payload = self.encode({
+                "request_id": message.get("request_id"),
+                "status": "error",
+                "message": f"تعذر ترميز الاستجابة: {e}"
+            }, encoding)
+        async with self.send_lock:
+            # انقطاع الاتصال أثناء الإرسال - حلقة الاستقبال تغلق الجلسة
+            with suppress(Exception):
+                if encoding == "msgpack":
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+
+    @staticmethod
+    def encode(message: Dict, encoding: str) -> Union[str, bytes]:
+        if encoding == "msgpack":
+            return msgpack.packb(message, use_bin_type=True, default=str)
+        # jsonable_encoder كاستجابات HTTP (datetime و Decimal و Pydantic...)
+        return json.dumps(jsonable_encoder(message), ensure_ascii=False, separators=(",", ":"))
+
+    async def close(self):
+        """إلغاء جميع المهام الجارية عند انقطاع الاتصال"""
+        self.closed = True
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks.clear()